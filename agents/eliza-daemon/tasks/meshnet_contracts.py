@@ -83,7 +83,7 @@ class MeshnetContractHandler:
 
                 # Sign and send transaction
                 signed_tx = self.validator_account.sign_transaction(tx)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
                 logger.info(f"💸 Reward sent to {miner_address}: {reward_amount} wei, tx: {tx_hash.hex()}")
 
@@ -132,7 +132,7 @@ class MeshnetContractHandler:
 
             # Sign and send
             signed_tx = self.validator_account.sign_transaction(tx)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
             logger.info(f"🏛️ DAO proposal created: {proposal_id}, tx: {tx_hash.hex()}")
 
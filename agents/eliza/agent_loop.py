@@ -5,22 +5,31 @@ Handles autonomous DAO operations and reward proposals
 """
 
 import json
+import os
 import time
 import hashlib
+from pathlib import Path
 import requests
 from web3 import Web3
 from eth_account import Account
 import logging
 
+from scoreboard.table import RigTable, load_table
+from scoreboard.windows import EventTimeWindows
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default paths resolve against this directory, so the agent runs the same
+# from anywhere: python -m agents.eliza.agent_loop from the repository root
+AGENT_DIR = Path(__file__).resolve().parent
+
 
 class ElizaAgent:
     def __init__(
         self,
-        config_path="meshnet_policy.json",
+        config_path=str(AGENT_DIR / "meshnet_policy.json"),
         web3_provider="https://sepolia.infura.io/v3/YOUR_PROJECT_ID",
     ):
         """Initialize Eliza agent with configuration"""
@@ -37,24 +46,96 @@ class ElizaAgent:
         # Private key for Eliza (should be loaded from secure storage)
         self.private_key = None  # Load from environment or secure storage
 
+        # Rewards are settled per closed event-time window; rows arriving
+        # after their window closed are credited in the next round, rows
+        # more than lateHorizonSec behind are dropped
+        self.windows = EventTimeWindows(
+            window=self.config.get(
+                "rewardWindowSec", self.config["proposalIntervalSec"]
+            ),
+            allowed_lateness=self.config.get("allowedLatenessSec", 6 * 3600),
+            late_horizon=self.config.get("lateHorizonSec", 7 * 86400),
+        )
+        # Window start -> (rig_id, timestamp) of the rows routed to it, so
+        # rows re-read with the scoreboard are not counted twice while late
+        # ones still get through; forgotten once the window has expired
+        self.seen = {}
+        # Starts of the windows a proposal was created for
+        self.proposed = set()
+        # For scoreboards of running totals (RigTable.cumulative), rig_id ->
+        # the total last credited, so each rewrite credits only the hashes
+        # added since; closed_totals holds it as of the closed windows (the
+        # open ones are rebuilt after a restart), open_totals per open window
+        self.totals = {}
+        self.closed_totals = {}
+        self.open_totals = {}
+
+        # Watermark, pending late rows, proposed windows and the rows routed
+        # to closed windows survive restarts; open windows are rebuilt from
+        # the scoreboard
+        self.state_path = self.config.get("statePath") or os.path.join(
+            os.path.dirname(os.path.abspath(config_path)), "eliza_state.json"
+        )
+        self.load_state()
+
+    def load_state(self):
+        """Resume the reward windows saved by ``save_state``"""
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        self.windows.restore(state["windows"])
+        self.proposed = set(state["proposed"])
+        self.seen = {
+            int(start): {tuple(key) for key in keys}
+            for start, keys in state["seen"].items()
+        }
+        self.closed_totals = dict(state.get("totals", {}))
+        self.totals = dict(self.closed_totals)
+
+    def save_state(self):
+        """Atomically persist what ``load_state`` resumes"""
+        closed_until = self.windows.closed_until
+        state = {
+            "windows": self.windows.state(),
+            "proposed": sorted(self.proposed),
+            "seen": {
+                str(start): sorted(keys)
+                for start, keys in self.seen.items()
+                if start < closed_until
+            },
+            "totals": self.closed_totals,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
     def load_meshnet_scoreboard(
-        self, scoreboard_path="../../oracle/scoreboard/meshnet_scoreboard.json"
+        self,
+        scoreboard_path=str(
+            AGENT_DIR.parents[1] / "oracle/scoreboard/meshnet_scoreboard.json"
+        ),
     ):
-        """Load and parse meshnet scoreboard data"""
+        """Load meshnet scoreboard data as a RigTable from a scoreboard file of
+        any format (parsed once, re-read only on change) or a scoreboard
+        service URL (synced incrementally)"""
         try:
-            with open(scoreboard_path, "r") as f:
-                return json.load(f)
+            return load_table(scoreboard_path)
         except FileNotFoundError:
             logger.warning("Scoreboard file not found, returning empty data")
-            return {"rigs": []}
+            return RigTable()
+        except OSError as e:
+            logger.warning(f"Scoreboard unavailable ({e}), returning empty data")
+            return RigTable()
 
-    def verify_hash_and_signature(self, rig_data):
+    def verify_hash_and_signature(self, rig_id, hash_count):
         """Verify hash count and signature for a rig"""
         # Placeholder for signature verification logic
         # In production, this would verify cryptographic signatures
-        rig_id = rig_data.get("rig_id")
-        hash_count = rig_data.get("hash_count", 0)
-        signature = rig_data.get("signature", "")
 
         # Basic validation
         if hash_count < self.config["minRigProof"]:
@@ -63,22 +144,85 @@ class ElizaAgent:
         # TODO: Implement actual signature verification
         return True
 
-    def calculate_rewards(self, scoreboard_data):
+    def ingest_scoreboard(self, table):
+        """Route the rows of ``table`` not seen before into the reward
+        windows; returns how many were late"""
+        fresh = RigTable()
+        windows = self.windows
+        expired_before = windows.expired_before
+        for rig_id, wallet, hash_count, timestamp in table.rows():
+            start = windows.window_start(timestamp)
+            if start < expired_before:
+                continue
+            seen = self.seen.get(start)
+            if seen is None:
+                seen = self.seen[start] = set()
+            key = (rig_id, timestamp)
+            if key not in seen:
+                seen.add(key)
+                if table.cumulative:
+                    hash_count = self.credit_total(rig_id, hash_count, start)
+                fresh.append(rig_id, wallet, hash_count, timestamp)
+        return windows.add_table(fresh)
+
+    def credit_total(self, rig_id, total, start):
+        """Hashes a rig's running ``total``, routed to the window at
+        ``start``, adds to the last one credited; a lower total means the
+        rig's counter restarted"""
+        last = self.totals.get(rig_id, 0)
+        self.totals[rig_id] = total
+        if start < self.windows.closed_until:
+            self.closed_totals[rig_id] = total
+        else:
+            self.open_totals.setdefault(start, {})[rig_id] = total
+        return total - last if total >= last else total
+
+    def close_reward_windows(self, now=None):
+        """Rewards for every window the watermark closed, oldest first, as
+        ``(window, rewards)``; late rows are credited in the first one"""
+        rounds = []
+        for window in self.windows.advance(now):
+            table = window.table
+            adjustments = self.windows.take_adjustments()
+            if len(adjustments):
+                logger.info(
+                    f"Crediting {len(adjustments)} late rows in window "
+                    f"{window.start}-{window.end}"
+                )
+                merged = RigTable()
+                for rows in (table, adjustments):
+                    for rig_id, wallet, hash_count, timestamp in rows.rows():
+                        merged.append(rig_id, wallet, hash_count, timestamp)
+                table = merged
+            rounds.append((window, self.calculate_rewards(table)))
+        closed_until = self.windows.closed_until
+        for start in sorted(s for s in self.open_totals if s < closed_until):
+            self.closed_totals.update(self.open_totals.pop(start))
+        expired_before = self.windows.expired_before
+        for start in [start for start in self.seen if start < expired_before]:
+            del self.seen[start]
+        self.proposed = {start for start in self.proposed if start >= expired_before}
+        return rounds
+
+    def calculate_rewards(self, table):
         """Calculate rewards based on hash-weighted distribution"""
         valid_rigs = []
         total_hashes = 0
 
-        for rig in scoreboard_data.get("rigs", []):
-            if self.verify_hash_and_signature(rig):
-                valid_rigs.append(rig)
-                total_hashes += rig.get("hash_count", 0)
+        # Rig logs hold one row per sample; rewards use each rig's total
+        table = table.per_rig()
+        for rig_id, wallet, hash_count in zip(
+            table.rig_id, table.wallet, table.hash_count
+        ):
+            if self.verify_hash_and_signature(rig_id, hash_count):
+                valid_rigs.append((rig_id, wallet, hash_count))
+                total_hashes += hash_count
 
         # Calculate proportional rewards
         rewards = []
         base_reward_pool = 1000  # XMRT tokens to distribute
 
-        for rig in valid_rigs:
-            hash_count = rig.get("hash_count", 0)
+        for rig_id, wallet, hash_count in valid_rigs:
             reward_amount = (
                 int((hash_count / total_hashes) * base_reward_pool)
                 if total_hashes > 0
@@ -87,8 +231,8 @@ class ElizaAgent:
 
             rewards.append(
                 {
-                    "rig_id": rig.get("rig_id"),
-                    "wallet": rig.get("wallet_address"),
+                    "rig_id": rig_id,
+                    "wallet": wallet,
                     "hash_count": hash_count,
                     "reward_amount": reward_amount,
                 }
@@ -96,14 +240,22 @@ class ElizaAgent:
 
         return rewards
 
-    def create_proposal(self, rewards):
-        """Create a DAO proposal for reward distribution"""
+    def create_proposal(self, rewards, window=None):
+        """Create a DAO proposal for reward distribution, once per closed
+        reward window or, without one, rate limited by proposalIntervalSec"""
         if not self.config["canPropose"]:
             logger.info("Proposal creation disabled in config")
             return
+        if window is not None and window.start in self.proposed:
+            logger.info(f"Window {window.start}-{window.end} already proposed")
+            return
 
         current_time = time.time()
-        if current_time - self.last_proposal_time < self.config["proposalIntervalSec"]:
+        if (
+            window is None
+            and current_time - self.last_proposal_time
+            < self.config["proposalIntervalSec"]
+        ):
             logger.info("Proposal interval not reached")
             return
 
@@ -114,6 +266,8 @@ class ElizaAgent:
             "rewards": rewards,
             "total_amount": sum(r["reward_amount"] for r in rewards),
         }
+        if window is not None:
+            proposal_data["window"] = [window.start, window.end]
 
         # Generate proposal ID
         proposal_id = hashlib.sha256(
@@ -126,6 +280,9 @@ class ElizaAgent:
         # This would require the contract ABI and proper transaction signing
 
         self.last_proposal_time = current_time
+        if window is not None:
+            self.proposed.add(window.start)
+            self.save_state()
         return proposal_id
 
     def run_loop(self):
@@ -134,17 +291,19 @@ class ElizaAgent:
 
         while True:
             try:
-                # Fetch meshnet scoreboard
+                # Fetch meshnet scoreboard and route new rows to their windows
                 scoreboard = self.load_meshnet_scoreboard()
-
-                # Calculate rewards
-                rewards = self.calculate_rewards(scoreboard)
-
-                if rewards:
-                    # Create proposal if conditions are met
-                    proposal_id = self.create_proposal(rewards)
-                    if proposal_id:
-                        logger.info(f"Created proposal: {proposal_id}")
+                self.ingest_scoreboard(scoreboard)
+
+                # Calculate rewards for the windows that closed
+                rounds = self.close_reward_windows(time.time())
+                for window, rewards in rounds:
+                    if rewards:
+                        proposal_id = self.create_proposal(rewards, window)
+                        if proposal_id:
+                            logger.info(f"Created proposal: {proposal_id}")
+                if rounds:
+                    self.save_state()
 
                 # Sleep before next iteration
                 time.sleep(60)  # Check every minute
@@ -2,22 +2,46 @@
 """
 Meshnet Oracle Submitter
 Parses meshnet_scoreboard.json, signs data, and submits proofs to MeshMiner.sol
+
+Nonces are handed out locally and up to ``max_in_flight`` proof transactions
+are sent concurrently; receipts are collected by one background poller. In
+batch mode proofs go through MeshNetGateway.batchSubmitProofs in chunks sized
+to the gas each batch is observed to use. Proofs are signed up front, in
+batches across a process pool.
 """
 
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
-from eth_account.messages import encode_defunct
 import logging
 
+from scoreboard.batching import BatchSizer
+from scoreboard.nonces import (
+    NonceManager,
+    ReceiptTracker,
+    is_nonce_too_low,
+    replacement_gas_price,
+)
+from scoreboard.signing import SigningService
+from scoreboard.table import load_table, proof_rows
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class OracleSubmitter:
-    def __init__(self, web3_provider="https://sepolia.infura.io/v3/YOUR_PROJECT_ID"):
+    def __init__(
+        self,
+        web3_provider="https://sepolia.infura.io/v3/YOUR_PROJECT_ID",
+        max_in_flight=32,
+        receipt_timeout=600,
+        block_gas_fraction=0.5,
+        signing_processes=None,
+    ):
         self.w3 = Web3(Web3.HTTPProvider(web3_provider))
 
         # Oracle Node private key (should be loaded from secure storage)
@@ -32,22 +56,55 @@ class OracleSubmitter:
                 "Oracle private key not set. Submitter will not be able to sign transactions."
             )
 
+        # Parses the key once and signs across processes; created on first use
+        self.signer = None
+        self.signing_processes = signing_processes
+
         # Contract addresses and ABIs (to be set during deployment)
         self.mesh_miner_address = None
         self.mesh_miner_abi = None  # Load MeshMiner ABI here
         self.mesh_miner_contract = None
+        self.gateway_address = None
+        self.gateway_abi = None  # Load MeshNetGateway ABI here
+        self.gateway_contract = None
+        # Wei forwarded per proof for the cross-chain call
+        self.gateway_fee = 0
+
+        # Read once per run instead of once per transaction
+        self.chain_id = None
+        self.gas_price = None
+        self.block_gas_limit = None
+        # Share of the block gas limit one batch may use
+        self.block_gas_fraction = block_gas_fraction
+        self.batch_sizer = None
+        self.nonces = NonceManager(
+            lambda: self.w3.eth.get_transaction_count(
+                self.oracle_account.address, "pending"
+            )
+        )
+        self.max_in_flight = max_in_flight
+        self.receipts = ReceiptTracker(
+            self._get_receipt,
+            on_receipt=self._on_receipt,
+            on_timeout=self._on_receipt_timeout,
+            timeout=receipt_timeout,
+        )
 
     def load_scoreboard_data(self, scoreboard_path="meshnet_scoreboard.json"):
-        """Load and parse meshnet scoreboard data"""
+        """Load meshnet scoreboard data as a RigTable from a scoreboard file of
+        any format (parsed once, re-read only on change) or a scoreboard
+        service URL (synced incrementally)"""
         try:
-            with open(scoreboard_path, "r") as f:
-                return json.load(f)
+            return load_table(scoreboard_path)
         except FileNotFoundError:
             logger.error(f"Scoreboard file not found at {scoreboard_path}")
             return None
         except json.JSONDecodeError:
             logger.error(f"Error decoding JSON from {scoreboard_path}")
             return None
+        except OSError as e:
+            logger.error(f"Error fetching scoreboard from {scoreboard_path}: {e}")
+            return None
 
     def sign_proof_data(self, rig_id, hashes):
         """Sign the proof data with the Oracle Node's private key"""
@@ -55,76 +112,305 @@ class OracleSubmitter:
             logger.error("Oracle account not initialized. Cannot sign data.")
             return None
 
-        message = f"rigId:{rig_id},hashes:{hashes}"
-        encoded_message = encode_defunct(text=message)
-        signed_message = self.w3.eth.account.sign_message(
-            encoded_message, private_key=self.private_key
-        )
-        return signed_message.signature.hex()
+        return self._signing_service().sign_one(rig_id, hashes)
+
+    def sign_proofs(self, rig_ids, hash_counts):
+        """Signatures for many proofs at once, in order"""
+        if not self.oracle_account:
+            logger.error("Oracle account not initialized. Cannot sign data.")
+            return None
+        return self._signing_service().sign(zip(rig_ids, hash_counts))
+
+    def _signing_service(self):
+        if self.signer is None:
+            self.signer = SigningService(self.private_key, self.signing_processes)
+        return self.signer
+
+    def close(self):
+        """Stop the signing processes"""
+        if self.signer is not None:
+            self.signer.close()
+            self.signer = None
+
+    def refresh_chain_params(self):
+        """Read the chain id and gas price for the transactions that follow"""
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
+        self.gas_price = self.w3.eth.gas_price
+        self.block_gas_limit = self.w3.eth.get_block("latest")["gasLimit"]
+        gas_cap = int(self.block_gas_limit * self.block_gas_fraction)
+        if self.batch_sizer is None:
+            self.batch_sizer = BatchSizer(gas_cap)
+        else:
+            self.batch_sizer.gas_cap = gas_cap
 
     def submit_proof_to_contract(self, rig_id, hashes, signature):
-        """Submit proof to MeshMiner.sol via submitProof()"""
+        """Submit proof to MeshMiner.sol via submitProof() without waiting for
+        it to be mined; returns the transaction hash"""
         if not self.mesh_miner_contract:
             logger.error("MeshMiner contract not initialized.")
             return
+        call = self.mesh_miner_contract.functions.submitProof(
+            rig_id,
+            hashes,
+            # Remove '0x' prefix and convert to bytes
+            bytes.fromhex(signature[2:]),
+        )
+        # Estimate gas or set a reasonable limit
+        return self._send_transaction(call, f"proof for rig {rig_id.hex()}", 2000000)
+
+    def _send_transaction(
+        self, call, label, gas, value=0, on_failure=None, on_mined=None
+    ):
+        """Sign and send a contract call without waiting for it to be mined;
+        returns the transaction hash. ``on_failure()`` runs if it reverts,
+        ``on_mined(receipt)`` once it is mined"""
         if not self.oracle_account:
             logger.error("Oracle account not initialized. Cannot send transaction.")
             return
-
+        if self.gas_price is None:
+            self.refresh_chain_params()
         try:
-            # Build transaction
-            nonce = self.w3.eth.get_transaction_count(self.oracle_account.address)
-            tx = self.mesh_miner_contract.functions.submitProof(
-                rig_id,
-                hashes,
-                bytes.fromhex(signature[2:]),  # Remove '0x' prefix and convert to bytes
-            ).build_transaction(
+            # Built before a nonce is taken, so a failure here leaves no gap
+            tx = call.build_transaction(
                 {
-                    "chainId": self.w3.eth.chain_id,
-                    "gas": 2000000,  # Estimate gas or set a reasonable limit
-                    "gasPrice": self.w3.eth.gas_price,
-                    "nonce": nonce,
+                    "chainId": self.chain_id,
+                    "gas": gas,
+                    "gasPrice": self.gas_price,
+                    "value": value,
                     "from": self.oracle_account.address,
                 }
             )
+        except Exception as e:
+            logger.error(f"Error submitting {label} to contract: {e}")
+            return None
+        return self._sign_and_send(tx, label, on_failure, on_mined)
 
-            # Sign transaction
-            signed_tx = self.w3.eth.account.sign_transaction(
-                tx, private_key=self.private_key
-            )
+    def _sign_and_send(self, tx, label, on_failure=None, on_mined=None, nonce=None):
+        # A resend keeps its nonce; the original may still be in the mempool
+        resend = nonce is not None
+        retried = False
+        while True:
+            if nonce is None:
+                nonce = self.nonces.next()
+            try:
+                # Sign transaction
+                signed_tx = self.w3.eth.account.sign_transaction(
+                    dict(tx, nonce=nonce), private_key=self.private_key
+                )
+
+                # Send transaction
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception as e:
+                if is_nonce_too_low(e) and not retried and not resend:
+                    # Someone else used it: skip ahead and try once more
+                    self.nonces.resync()
+                    nonce = None
+                    retried = True
+                    continue
+                if not resend and not is_nonce_too_low(e):
+                    # Never reached the mempool: the next transaction or
+                    # fill_nonce_gaps reuses it
+                    self.nonces.release(nonce)
+                logger.error(f"Error submitting {label} to contract: {e}")
+                return None
 
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            logger.info(f"Proof submission transaction sent: {tx_hash.hex()}")
+            logger.info(f"Transaction for {label} sent: {tx_hash.hex()}")
+            self.receipts.track(tx_hash, (tx, label, on_failure, on_mined, nonce))
             return tx_hash.hex()
 
-        except Exception as e:
-            logger.error(f"Error submitting proof to contract: {e}")
+    def fill_nonce_gaps(self):
+        """Send a 0-value transfer to ourselves on every nonce that was
+        given back and not reused, so transactions with higher nonces are not
+        stuck behind the gap; returns how many were sent"""
+        filled = 0
+        for nonce in self.nonces.take_released():
+            tx = {
+                "chainId": self.chain_id,
+                "to": self.oracle_account.address,
+                "value": 0,
+                "gas": 21000,
+                "gasPrice": self.gas_price,
+                "from": self.oracle_account.address,
+            }
+            if self._sign_and_send(tx, f"nonce {nonce} gap", nonce=nonce) is None:
+                # Left for the next run's first transaction
+                self.nonces.release(nonce)
+            else:
+                filled += 1
+        return filled
+
+    def _wait_for_receipts(self):
+        """Wait for every transaction, filling nonce gaps left along the way"""
+        deadline = time.monotonic() + self.receipts.timeout * 2
+        self.fill_nonce_gaps()
+        while True:
+            if not self.receipts.wait(max(0.0, deadline - time.monotonic())):
+                logger.warning(f"{len(self.receipts)} proof transactions unconfirmed")
+                return
+            # Retries of reverted batches may have given nonces back since
+            if not self.fill_nonce_gaps():
+                return
+
+    def _get_receipt(self, tx_hash):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
             return None
 
-    def run_submitter(self, scoreboard_path="meshnet_scoreboard.json"):
-        """Main submitter logic"""
-        scoreboard_data = self.load_scoreboard_data(scoreboard_path)
-        if not scoreboard_data:
+    def _on_receipt(self, tx_hash, receipt, context):
+        _, label, on_failure, on_mined, _ = context
+        if receipt["status"] != 1:
+            logger.error(f"Transaction {tx_hash.hex()} for {label} reverted")
+            if on_failure is not None:
+                on_failure()
+        elif on_mined is not None:
+            on_mined(receipt)
+
+    def _on_receipt_timeout(self, tx_hash, context):
+        tx, label, on_failure, on_mined, nonce = context
+        confirmed = self.w3.eth.get_transaction_count(
+            self.oracle_account.address, "latest"
+        )
+        if confirmed > nonce:
+            # The nonce was used after all (e.g. by a replacement)
+            logger.warning(f"Transaction {tx_hash.hex()} for {label} was replaced")
+            return
+        # Dropped from the mempool: everything after it is stuck behind the
+        # gap, so send it again with the same nonce
+        logger.warning(
+            f"Transaction {tx_hash.hex()} for {label} not mined, "
+            f"resending nonce {nonce}"
+        )
+        self.refresh_chain_params()
+        tx = dict(tx, gasPrice=replacement_gas_price(tx["gasPrice"], self.gas_price))
+        if self._sign_and_send(tx, label, on_failure, on_mined, nonce=nonce) is None:
+            # Refused: underpriced while the original is still pending, or
+            # its nonce was mined meanwhile
+            self.receipts.track(tx_hash, context)
+
+    def submit_proof_batches(self, proofs):
+        """Submit ``(rig_id, hashes, signature)`` proofs (ids and signatures
+        as bytes) through MeshNetGateway.batchSubmitProofs without waiting for
+        them to be mined. Rigs of a batch that fails are retried one by one."""
+        if not self.gateway_contract:
+            logger.error("MeshNetGateway contract not initialized.")
+            return
+        if not self.oracle_account:
+            logger.error("Oracle account not initialized. Cannot send transaction.")
+            return
+        if self.batch_sizer is None:
+            self.refresh_chain_params()
+        sizer = self.batch_sizer
+        # Lowered whenever a batch turns out too big, so the loop always ends
+        limit = sizer.max_size
+        position = 0
+        while position < len(proofs):
+            chunk = proofs[position : position + min(sizer.size(), limit)]
+            value = self.gateway_fee * len(chunk)
+            rig_ids, hash_counts, signatures = (list(c) for c in zip(*chunk))
+            call = self.gateway_contract.functions.batchSubmitProofs(
+                rig_ids, hash_counts, signatures
+            )
+            try:
+                estimate = call.estimate_gas(
+                    {"from": self.oracle_account.address, "value": value}
+                )
+            except Exception as e:
+                # The batch would revert: find out which rigs are fine
+                logger.warning(f"Batch of {len(chunk)} proofs rejected: {e}")
+                self._submit_individually(chunk)
+                position += len(chunk)
+                continue
+            sizer.observe(len(chunk), estimate)
+            if estimate * sizer.headroom > sizer.gas_cap and len(chunk) > 1:
+                limit = len(chunk) - 1
+                continue
+            position += len(chunk)
+
+            def retry(chunk=chunk):
+                self._submit_individually(chunk)
+
+            def mined(receipt, size=len(chunk)):
+                sizer.observe(size, receipt["gasUsed"])
+
+            tx_hash = self._send_transaction(
+                call,
+                f"batch of {len(chunk)} proofs",
+                sizer.gas_limit(estimate),
+                value,
+                on_failure=retry,
+                on_mined=mined,
+            )
+            if tx_hash is None:
+                retry()
+
+    def _submit_individually(self, proofs):
+        """One MeshNetGateway.submitMiningProof transaction per proof, so one
+        bad proof does not hold back the rest of its batch"""
+        for rig_id, hashes, signature in proofs:
+            call = self.gateway_contract.functions.submitMiningProof(
+                rig_id, hashes, signature
+            )
+            label = f"proof for rig {rig_id.hex()}"
+            try:
+                estimate = call.estimate_gas(
+                    {"from": self.oracle_account.address, "value": self.gateway_fee}
+                )
+            except Exception as e:
+                logger.error(f"Error submitting {label} to contract: {e}")
+                continue
+            self._send_transaction(
+                call, label, self.batch_sizer.gas_limit(estimate), self.gateway_fee
+            )
+
+    def _submit_rig(self, row, signature):
+        rig_id, rig_bytes, hashes = row
+        if signature:
+            logger.info(f"Submitting proof for rig {rig_id} with {hashes} hashes...")
+            self.submit_proof_to_contract(rig_bytes, hashes, signature)
+        else:
+            logger.warning(f"Could not sign proof for rig {rig_id}")
+
+    def _submit_batched(self, rows, signatures):
+        proofs = [
+            (rig_bytes, hashes, bytes.fromhex(signature[2:]))
+            for (_, rig_bytes, hashes), signature in zip(rows, signatures)
+        ]
+        logger.info(f"Submitting {len(proofs)} proofs in batches...")
+        self.submit_proof_batches(proofs)
+
+    def run_submitter(self, scoreboard_path="meshnet_scoreboard.json", batch=False):
+        """Main submitter logic; ``batch`` packs proofs into
+        MeshNetGateway.batchSubmitProofs calls"""
+        table = self.load_scoreboard_data(scoreboard_path)
+        if not table:
             return
+        if table.skipped:
+            logger.warning(f"Skipping {table.skipped} malformed rig records")
 
-        for rig_data in scoreboard_data.get("rigs", []):
-            rig_id = rig_data.get("rig_id")
-            hashes = rig_data.get("hash_count")
-
-            if rig_id and hashes is not None:
-                signature = self.sign_proof_data(rig_id, hashes)
-                if signature:
-                    logger.info(
-                        f"Submitting proof for rig {rig_id} with {hashes} hashes..."
-                    )
-                    self.submit_proof_to_contract(
-                        bytes.fromhex(rig_id[2:]), hashes, signature
-                    )  # Convert rig_id to bytes
-                else:
-                    logger.warning(f"Could not sign proof for rig {rig_id}")
+        # Rig logs hold one row per sample; proofs cover each rig's total
+        rows, rejected = proof_rows(table.per_rig())
+        for rig_id in rejected:
+            logger.warning(f"Skipping rig {rig_id!r}: not a 32-byte hex rig id")
+        if self.oracle_account and (
+            self.gateway_contract if batch else self.mesh_miner_contract
+        ):
+            self.refresh_chain_params()
+        signatures = self.sign_proofs([r[0] for r in rows], [r[2] for r in rows])
+        if signatures is None:
+            return
+        self.receipts.start()
+        try:
+            if batch:
+                self._submit_batched(rows, signatures)
             else:
-                logger.warning(f"Skipping malformed rig data: {rig_data}")
+                with ThreadPoolExecutor(max_workers=self.max_in_flight) as senders:
+                    # list() surfaces exceptions raised while submitting
+                    list(senders.map(self._submit_rig, rows, signatures))
+            self._wait_for_receipts()
+        finally:
+            self.receipts.stop()
 
 
 if __name__ == "__main__":
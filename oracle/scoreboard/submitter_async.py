@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Asyncio version of the Meshnet Oracle Submitter
+
+Same proofs as submitter.py, sent through web3's async provider so reads,
+sends and confirmation waits overlap instead of blocking one another:
+
+- up to ``max_in_flight`` transactions are being built and sent at once;
+- nonces are handed out locally, seeded with one pending-count read;
+- one poller follows new blocks and fetches receipts only for the
+  outstanding transactions they contain, instead of a
+  ``wait_for_transaction_receipt`` per transaction.
+
+A run therefore takes about as many round trips as there are blocks until
+the last proof is mined, however many rigs there are.
+"""
+
+import asyncio
+import json
+import logging
+
+from eth_account import Account
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+
+from scoreboard.nonces import (
+    BlockReceiptTracker,
+    NonceManager,
+    is_nonce_too_low,
+    replacement_gas_price,
+)
+from scoreboard.signing import SigningService
+from scoreboard.table import load_table, proof_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncOracleSubmitter:
+    def __init__(
+        self,
+        web3_provider="https://sepolia.infura.io/v3/YOUR_PROJECT_ID",
+        max_in_flight=32,
+        receipt_timeout=600,
+        poll_interval=2.0,
+        signing_processes=None,
+    ):
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3_provider))
+
+        # Oracle Node private key (should be loaded from secure storage)
+        self.private_key = None  # Load from environment or secure storage
+        self.oracle_account = None
+
+        if self.private_key:
+            self.oracle_account = Account.from_key(self.private_key)
+            logger.info(f"Oracle account loaded: {self.oracle_account.address}")
+        else:
+            logger.warning(
+                "Oracle private key not set. "
+                "Submitter will not be able to sign transactions."
+            )
+        self.signer = None
+        self.signing_processes = signing_processes
+
+        # Contract addresses and ABIs (to be set during deployment)
+        self.mesh_miner_address = None
+        self.mesh_miner_abi = None  # Load MeshMiner ABI here
+        self.mesh_miner_contract = None
+
+        # Read once per run instead of once per transaction
+        self.chain_id = None
+        self.gas_price = None
+        # Seeded by refresh_chain_params
+        self.nonces = NonceManager()
+        self.max_in_flight = max_in_flight
+        self._send_window = None
+        self.receipts = BlockReceiptTracker(
+            lambda: self.w3.eth.block_number,
+            self._block_transactions,
+            self._get_receipt,
+            on_receipt=self._on_receipt,
+            on_timeout=self._on_receipt_timeout,
+            poll_interval=poll_interval,
+            timeout=receipt_timeout,
+        )
+
+    async def load_scoreboard_data(self, scoreboard_path="meshnet_scoreboard.json"):
+        """Load meshnet scoreboard data as a RigTable (see submitter.py)"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, load_table, scoreboard_path)
+        except FileNotFoundError:
+            logger.error(f"Scoreboard file not found at {scoreboard_path}")
+            return None
+        except json.JSONDecodeError:
+            logger.error(f"Error decoding JSON from {scoreboard_path}")
+            return None
+        except OSError as e:
+            logger.error(f"Error fetching scoreboard from {scoreboard_path}: {e}")
+            return None
+
+    async def sign_proofs(self, rig_ids, hash_counts):
+        """Proof signatures in order, signed across the process pool"""
+        if not self.oracle_account:
+            logger.error("Oracle account not initialized. Cannot sign data.")
+            return None
+        if self.signer is None:
+            self.signer = SigningService(self.private_key, self.signing_processes)
+        loop = asyncio.get_running_loop()
+        messages = list(zip(rig_ids, hash_counts))
+        return await loop.run_in_executor(None, self.signer.sign, messages)
+
+    def close(self):
+        """Stop the signing processes"""
+        if self.signer is not None:
+            self.signer.close()
+            self.signer = None
+
+    async def refresh_chain_params(self):
+        """Read the chain id, gas price and pending nonce concurrently"""
+        chain_id, self.gas_price, pending = await asyncio.gather(
+            self.w3.eth.chain_id,
+            self.w3.eth.gas_price,
+            self.w3.eth.get_transaction_count(self.oracle_account.address, "pending"),
+        )
+        if self.chain_id is None:
+            self.chain_id = chain_id
+        self.nonces.resync(pending)
+
+    def _window(self):
+        # Created on first use, inside the running event loop
+        if self._send_window is None:
+            self._send_window = asyncio.Semaphore(self.max_in_flight)
+        return self._send_window
+
+    async def submit_proof_to_contract(self, rig_id, hashes, signature):
+        """Submit proof to MeshMiner.sol via submitProof() without waiting for
+        it to be mined; returns the transaction hash"""
+        if not self.mesh_miner_contract:
+            logger.error("MeshMiner contract not initialized.")
+            return
+        if not self.oracle_account:
+            logger.error("Oracle account not initialized. Cannot send transaction.")
+            return
+        label = f"proof for rig {rig_id.hex()}"
+        async with self._window():
+            try:
+                # Built before a nonce is taken, so a failure here leaves no gap
+                tx = await self.mesh_miner_contract.functions.submitProof(
+                    rig_id,
+                    hashes,
+                    # Remove '0x' prefix and convert to bytes
+                    bytes.fromhex(signature[2:]),
+                ).build_transaction(
+                    {
+                        "chainId": self.chain_id,
+                        "gas": 2000000,  # Estimate gas or set a reasonable limit
+                        "gasPrice": self.gas_price,
+                        "from": self.oracle_account.address,
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error submitting {label} to contract: {e}")
+                return None
+            return await self._sign_and_send(tx, label)
+
+    async def _sign_and_send(self, tx, label, nonce=None):
+        # A resend keeps its nonce; the original may still be in the mempool
+        resend = nonce is not None
+        retried = False
+        while True:
+            if nonce is None:
+                nonce = self.nonces.next()
+            try:
+                # The account holds the parsed key; ECDSA stays off the loop
+                signed_tx = await asyncio.get_running_loop().run_in_executor(
+                    None, self.oracle_account.sign_transaction, dict(tx, nonce=nonce)
+                )
+                tx_hash = await self.w3.eth.send_raw_transaction(
+                    signed_tx.raw_transaction
+                )
+            except Exception as e:
+                if is_nonce_too_low(e) and not retried and not resend:
+                    # Someone else used it: skip ahead and try once more
+                    self.nonces.resync(
+                        await self.w3.eth.get_transaction_count(
+                            self.oracle_account.address, "pending"
+                        )
+                    )
+                    nonce = None
+                    retried = True
+                    continue
+                if not resend and not is_nonce_too_low(e):
+                    # Never reached the mempool: the next transaction or
+                    # fill_nonce_gaps reuses it
+                    self.nonces.release(nonce)
+                logger.error(f"Error submitting {label} to contract: {e}")
+                return None
+            break
+
+        logger.info(f"Transaction for {label} sent: {tx_hash.hex()}")
+        self.receipts.track(bytes(tx_hash), (tx, label, nonce))
+        return tx_hash.hex()
+
+    async def fill_nonce_gaps(self):
+        """Send a 0-value transfer to ourselves on every nonce that was
+        given back and not reused, so transactions with higher nonces are not
+        stuck behind the gap; returns how many were sent"""
+        filled = 0
+        for nonce in self.nonces.take_released():
+            tx = {
+                "chainId": self.chain_id,
+                "to": self.oracle_account.address,
+                "value": 0,
+                "gas": 21000,
+                "gasPrice": self.gas_price,
+                "from": self.oracle_account.address,
+            }
+            async with self._window():
+                sent = await self._sign_and_send(tx, f"nonce {nonce} gap", nonce)
+            if sent is None:
+                # Left for the next run's first transaction
+                self.nonces.release(nonce)
+            else:
+                filled += 1
+        return filled
+
+    async def _block_transactions(self, number):
+        block = await self.w3.eth.get_block(number)
+        return [bytes(tx_hash) for tx_hash in block["transactions"]]
+
+    async def _get_receipt(self, tx_hash):
+        try:
+            return await self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def _on_receipt(self, tx_hash, receipt, context):
+        if receipt["status"] != 1:
+            logger.error(f"Transaction {tx_hash.hex()} for {context[1]} reverted")
+
+    async def _on_receipt_timeout(self, tx_hash, context):
+        tx, label, nonce = context
+        confirmed = await self.w3.eth.get_transaction_count(
+            self.oracle_account.address, "latest"
+        )
+        if confirmed > nonce:
+            # The nonce was used after all (e.g. by a replacement)
+            logger.warning(f"Transaction {tx_hash.hex()} for {label} was replaced")
+            return
+        # Dropped from the mempool: everything after it is stuck behind the
+        # gap, so send it again with the same nonce
+        logger.warning(
+            f"Transaction {tx_hash.hex()} for {label} not mined, "
+            f"resending nonce {nonce}"
+        )
+        self.gas_price = await self.w3.eth.gas_price
+        tx = dict(tx, gasPrice=replacement_gas_price(tx["gasPrice"], self.gas_price))
+        async with self._window():
+            sent = await self._sign_and_send(tx, label, nonce)
+        if sent is None:
+            # Refused: underpriced while the original is still pending, or
+            # its nonce was mined meanwhile, in a block already searched
+            receipt = await self._get_receipt(tx_hash)
+            if receipt is not None:
+                self._on_receipt(tx_hash, receipt, context)
+            else:
+                self.receipts.track(tx_hash, context)
+
+    async def _submit_rig(self, row, signature):
+        rig_id, rig_bytes, hashes = row
+        if signature:
+            logger.info(f"Submitting proof for rig {rig_id} with {hashes} hashes...")
+            await self.submit_proof_to_contract(rig_bytes, hashes, signature)
+        else:
+            logger.warning(f"Could not sign proof for rig {rig_id}")
+
+    async def run_submitter(self, scoreboard_path="meshnet_scoreboard.json"):
+        """Main submitter logic"""
+        table = await self.load_scoreboard_data(scoreboard_path)
+        if not table:
+            return
+        if table.skipped:
+            logger.warning(f"Skipping {table.skipped} malformed rig records")
+
+        # Rig logs hold one row per sample; proofs cover each rig's total
+        rows, rejected = proof_rows(table.per_rig())
+        for rig_id in rejected:
+            logger.warning(f"Skipping rig {rig_id!r}: not a 32-byte hex rig id")
+        signatures = await self.sign_proofs([r[0] for r in rows], [r[2] for r in rows])
+        if signatures is None:
+            return
+        if self.mesh_miner_contract:
+            await self.refresh_chain_params()
+        await self.receipts.start()
+        try:
+            # gather re-raises the first exception raised while submitting
+            await asyncio.gather(
+                *(
+                    self._submit_rig(row, signature)
+                    for row, signature in zip(rows, signatures)
+                )
+            )
+            await self.fill_nonce_gaps()
+            if not await self.receipts.wait(self.receipts.timeout * 2):
+                logger.warning(f"{len(self.receipts)} proof transactions unconfirmed")
+        finally:
+            await self.receipts.stop()
+
+
+if __name__ == "__main__":
+    # Example usage (replace with actual contract addresses and private keys);
+    # see submitter.py
+    submitter = AsyncOracleSubmitter()
+    # submitter.private_key = "YOUR_ORACLE_PRIVATE_KEY"
+    # submitter.mesh_miner_address = "YOUR_MESH_MINER_CONTRACT_ADDRESS"
+    # submitter.mesh_miner_abi = [...] # Your MeshMiner ABI
+
+    # if submitter.mesh_miner_address and submitter.mesh_miner_abi:
+    #     submitter.mesh_miner_contract = submitter.w3.eth.contract(
+    #         address=submitter.mesh_miner_address, abi=submitter.mesh_miner_abi
+    #     )
+
+    try:
+        asyncio.run(submitter.run_submitter(scoreboard_path="meshnet_scoreboard.json"))
+    finally:
+        submitter.close()
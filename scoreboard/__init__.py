@@ -0,0 +1,35 @@
+"""
+MESHNET scoreboard service internals.
+
+Shared building blocks for the ``update_scoreboard.py`` endpoint and the
+consumers of ``meshnet_scoreboard.json``. The exports below are imported
+on first use, so the rig-side tools (``tail``, ``sync``, ``rig_agent``) load
+without the server stack.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "LogCompactor": ".wal",
+    "ScoreboardService": ".service",
+    "ScoreboardStore": ".store",
+    "WriteAheadLog": ".wal",
+    "WriteBehindPublisher": ".publisher",
+    "open_store": ".store",
+}
+
+__all__ = [
+    "LogCompactor",
+    "ScoreboardService",
+    "ScoreboardStore",
+    "WriteAheadLog",
+    "WriteBehindPublisher",
+    "open_store",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -0,0 +1,371 @@
+"""
+Memory-mapped readers for archived rig logs and scoreboard snapshots
+
+Audits replay months of archived data; ``json.load`` or line-by-line reads
+pull whole multi-gigabyte files through Python. The readers here map the file
+instead and keep a sparse time index next to it (``<file>.idx``), so a time
+range query only touches the pages of the blocks that can hold matching rows:
+
+- ``JsonlArchive`` (Termux rig logs, session logs): one index entry per
+  ``block_bytes`` of lines with the block's min/max timestamp, found with a
+  regex over the mapped bytes rather than by parsing JSON. Appending to the
+  log only re-indexes the last block. ``lines()`` yields memoryviews into the
+  map without copying; ``records()`` parses them.
+- ``BinaryArchive`` (``meshnet_scoreboard.bin``): numeric columns are
+  memoryviews cast straight out of the map, one index entry per
+  ``block_rows`` rows. Only the string table is decoded into Python strings.
+
+Min/max per block keeps queries exact when timestamps are out of order; they
+are just less selective. Views handed out stay valid until ``close()``.
+
+    python -m scoreboard.archive scoreboard-2024-05.jsonl --since 1714521600
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .binary import MAGIC, TYPECODES, from_le, read_header
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+BLOCK_BYTES = 1024 * 1024
+BLOCK_ROWS = 16384
+FINGERPRINT_BYTES = 4096
+
+# (first row or byte offset, end, min timestamp, max timestamp); the
+# timestamps are None for blocks without any
+Block = Tuple[int, int, Optional[int], Optional[int]]
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _overlaps(block: Block, start: Optional[int], end: Optional[int]) -> bool:
+    if start is None and end is None:
+        return True
+    low, high = block[2], block[3]
+    if low is None:
+        return False
+    return (start is None or high >= start) and (end is None or low < end)
+
+
+def _in_range(value: Any, start: Optional[int], end: Optional[int]) -> bool:
+    if start is None and end is None:
+        return True
+    if type(value) not in (int, float):
+        return False
+    return (start is None or value >= start) and (end is None or value < end)
+
+
+class _Archive:
+    def __init__(self, path: str, persist_index: bool):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.persist_index = persist_index
+        self._mm = _map(path)
+        self.blocks: List[Block] = []
+
+    def close(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Views handed out are still alive; the map goes with them
+                pass
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _fingerprint(self) -> str:
+        return hashlib.sha1(self._mm[:FINGERPRINT_BYTES]).hexdigest()
+
+    def _load_index(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("params") != params or index.get("fingerprint") != (
+            self._fingerprint()
+        ):
+            return None
+        return index
+
+    def _save_index(self, params: Dict[str, Any], **fields):
+        if not self.persist_index:
+            return
+        index = dict(fields, params=params, fingerprint=self._fingerprint())
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            # Read-only archive directories still work, just unindexed
+            logger.debug(f"Could not save index {self.index_path}: {e}")
+
+
+class JsonlArchive(_Archive):
+    def __init__(
+        self,
+        path: str,
+        time_key: str = "timestamp",
+        block_bytes: int = BLOCK_BYTES,
+        persist_index: bool = True,
+    ):
+        super().__init__(path, persist_index)
+        self.time_key = time_key
+        self.block_bytes = block_bytes
+        # End of the last complete line
+        self.end = 0
+        # Integer value of the time key on one line, without parsing it
+        self._time = re.compile(
+            rb'"' + re.escape(time_key.encode("utf-8")) + rb'"\s*:\s*(-?\d+)'
+        )
+        if self._mm is not None:
+            self._build_index()
+
+    def _build_index(self):
+        mm = self._mm
+        params = {
+            "version": INDEX_VERSION,
+            "time_key": self.time_key,
+            "block_bytes": self.block_bytes,
+        }
+        self.end = mm.rfind(b"\n") + 1
+        index = self._load_index(params)
+        blocks: List[Block] = []
+        position = 0
+        if index is not None and index["end"] <= self.end:
+            # Append-only log: keep every block but the last, which may
+            # have been short
+            blocks = [tuple(b) for b in index["blocks"][:-1]]
+            position = blocks[-1][1] if blocks else 0
+        search = self._time.finditer
+        while position < self.end:
+            block_end = mm.find(b"\n", position + self.block_bytes - 1, self.end)
+            block_end = self.end if block_end < 0 else block_end + 1
+            times = [int(m.group(1)) for m in search(mm, position, block_end)]
+            if times:
+                blocks.append((position, block_end, min(times), max(times)))
+            else:
+                blocks.append((position, block_end, None, None))
+            position = block_end
+        self.blocks = blocks
+        if index is None or index["end"] != self.end:
+            self._save_index(params, end=self.end, blocks=blocks)
+
+    def lines(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[memoryview]:
+        """Lines whose time key is in ``[start, end)``, as views into the
+        map (without a range, every line including those without a time)"""
+        if self._mm is None:
+            return
+        mm = self._mm
+        view = memoryview(mm)
+        unbounded = start is None and end is None
+        search = self._time.search
+        for block in self.blocks:
+            if not _overlaps(block, start, end):
+                continue
+            position, block_end = block[0], block[1]
+            while position < block_end:
+                newline = mm.find(b"\n", position, block_end)
+                if unbounded:
+                    yield view[position:newline]
+                else:
+                    match = search(mm, position, newline)
+                    if match is not None and _in_range(int(match.group(1)), start, end):
+                        yield view[position:newline]
+                position = newline + 1
+
+    def records(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[Any]:
+        """Parsed lines in ``[start, end)``; unparsable lines are skipped"""
+        for line in self.lines(start, end):
+            try:
+                record = json.loads(line.tobytes())
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            # The regex may have matched a nested key; check the real one
+            if isinstance(record, dict) and _in_range(
+                record.get(self.time_key), start, end
+            ):
+                yield record
+
+
+class BinaryArchive(_Archive):
+    def __init__(
+        self,
+        path: str,
+        time_key: str = "timestamp",
+        block_rows: int = BLOCK_ROWS,
+        persist_index: bool = True,
+    ):
+        super().__init__(path, persist_index)
+        if self._mm is None or self._mm[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a MESHNET binary scoreboard snapshot")
+        self.time_key = time_key
+        self.block_rows = block_rows
+        try:
+            self._parse()
+        except ValueError:
+            # A format version this reader does not know
+            self.close()
+            raise ValueError(f"{path} is not a MESHNET binary scoreboard snapshot")
+        self._strings: Optional[List[str]] = None
+        self._tail: Optional[Dict[str, Any]] = None
+        self._build_index()
+
+    def _parse(self):
+        view = memoryview(self._mm)
+        header = read_header(view)
+        self.layout = header.layout
+        self.rows = rows = header.rows
+        self._string_count = header.string_count
+        self._string_span = header.strings
+        offset = header.columns
+
+        self.columns: Dict[str, Any] = {}
+        self.kinds: Dict[str, str] = {}
+        for name, kind in header.schema:
+            typecode = TYPECODES[kind]
+            size = array(typecode).itemsize * rows
+            raw = view[offset : offset + size]
+            if sys.byteorder == "little":
+                self.columns[name] = raw.cast(typecode)
+            else:
+                self.columns[name] = from_le(typecode, raw)
+            self.kinds[name] = kind
+            offset += size
+        self._tail_offset = offset
+
+    def _build_index(self):
+        times = self.columns.get(self.time_key)
+        if times is None or self.kinds[self.time_key] == "s":
+            # Nothing to index: every block may match an unbounded query only
+            self.blocks = [(0, self.rows, None, None)] if self.rows else []
+            return
+        params = {
+            "version": INDEX_VERSION,
+            "time_key": self.time_key,
+            "block_rows": self.block_rows,
+        }
+        size = len(self._mm)
+        index = self._load_index(params)
+        if index is not None and index["size"] == size:
+            self.blocks = [tuple(b) for b in index["blocks"]]
+            return
+        blocks: List[Block] = []
+        for first in range(0, self.rows, self.block_rows):
+            chunk = times[first : first + self.block_rows]
+            blocks.append((first, first + len(chunk), min(chunk), max(chunk)))
+        self.blocks = blocks
+        self._save_index(params, size=size, blocks=blocks)
+
+    def close(self):
+        # The column views pin the map
+        self.columns = {}
+        super().close()
+
+    def strings(self) -> List[str]:
+        """The interned string table, decoded once"""
+        if self._strings is None:
+            low, high = self._string_span
+            self._strings = (
+                str(self._mm[low:high], "utf-8").split("\0")
+                if self._string_count
+                else []
+            )
+        return self._strings
+
+    def overflow(self) -> List[Tuple[int, Any]]:
+        """``(position, record)`` of the rows kept as JSON"""
+        if self._tail is None:
+            (length,) = struct.unpack_from("<Q", self._mm, self._tail_offset)
+            start = self._tail_offset + 8
+            self._tail = json.loads(self._mm[start : start + length])
+        return [tuple(row) for row in self._tail["rows"]]
+
+    def records(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[Any]:
+        """Records whose time key is in ``[start, end)``: the columnar rows
+        in order, then the matching overflow rows"""
+        strings = self.strings() if "s" in self.kinds.values() else []
+        getters: List[Tuple[str, Callable[[int], Any]]] = []
+        for name, column in self.columns.items():
+            if self.kinds[name] == "s":
+                getters.append((name, lambda i, c=column: strings[c[i]]))
+            else:
+                getters.append((name, column.__getitem__))
+        times = self.columns.get(self.time_key)
+        check = times is not None and not (start is None and end is None)
+        for block in self.blocks:
+            if not _overlaps(block, start, end):
+                continue
+            for i in range(block[0], block[1]):
+                if check and not _in_range(times[i], start, end):
+                    continue
+                yield {name: get(i) for name, get in getters}
+        for _, record in self.overflow():
+            if isinstance(record, dict) and _in_range(
+                record.get(self.time_key), start, end
+            ):
+                yield record
+            elif start is None and end is None:
+                yield record
+
+
+def open_archive(path: str, **kwargs):
+    """``BinaryArchive`` for binary snapshots, else ``JsonlArchive``"""
+    with open(path, "rb") as f:
+        binary = f.read(4) == MAGIC
+    return BinaryArchive(path, **kwargs) if binary else JsonlArchive(path, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a time range of an archive")
+    parser.add_argument("path", help="JSONL rig/session log or binary snapshot")
+    parser.add_argument("--since", type=int, default=None)
+    parser.add_argument("--until", type=int, default=None, help="exclusive")
+    parser.add_argument("--time-key", default="timestamp")
+    parser.add_argument("--count", action="store_true", help="only count records")
+    args = parser.parse_args()
+
+    with open_archive(args.path, time_key=args.time_key) as archive:
+        count = 0
+        out = sys.stdout
+        for record in archive.records(args.since, args.until):
+            count += 1
+            if not args.count:
+                out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if args.count:
+            print(count)
+
+
+if __name__ == "__main__":
+    main()
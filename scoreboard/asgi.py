@@ -0,0 +1,459 @@
+"""
+Asynchronous (ASGI) front end for the scoreboard service
+
+Exposes the same ``/submit`` and ``/submit/batch`` contract as the Flask app
+plus read endpoints, without depending on a web framework. Blocking work never
+runs on the event loop: submissions from concurrent requests are coalesced by
+a single committer task and written to the log with one fsync per group, and
+large reads are serialised in a worker thread. The full scoreboard is served
+from a pre-serialised, pre-gzipped cache that honours ``If-None-Match``.
+
+Submissions are rate limited per source IP and per node (429), and rejected
+early with a 503 once too many nodes are waiting to be committed.
+
+Routes:
+    POST /submit               {node_id, hashrate, timestamp}
+    POST /submit/batch         JSON array or NDJSON of the above, optionally
+                               with Content-Encoding: gzip
+    GET  /scoreboard           full scoreboard document (ETag, gzip)
+    GET  /scoreboard/changes   records upserted since a version (?since=
+                               &epoch=), full document when too far behind
+    GET  /scoreboard/<node_id> one node
+    GET  /history              fleet submissions (?start=&end=&limit=)
+    GET  /history/<node_id>    one node's submissions (same parameters)
+    GET  /rollups              aggregated hashrate (?node_id=&start=&end=
+                               &resolution=1m|1h|1d, fleet-wide by default)
+    GET  /top                  leaderboard (?k=10)
+    GET  /rank/<node_id>       rank and percentile of one node
+    GET  /percentile           fleet hashrate at a percentile (?p=50)
+    GET  /health               liveness and store size
+    GET  /metrics              service counters (write backlog, duplicate
+                               filter size and false-positive rates)
+"""
+
+import asyncio
+import json
+import logging
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from .batch import BatchFormatError, decode_body, parse_batch
+from .cache import SnapshotCache
+from .ratelimit import SubmissionLimiter, retry_after_header
+from .service import ScoreboardService
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class _Committer:
+    """Funnels submissions from many requests into grouped log appends.
+
+    While a node's report waits for the next group, reports for the same
+    node are coalesced into the one with the newest timestamp, so a chatty
+    rig costs one log record per group and every waiting request is answered
+    by that one commit. The reports it replaced still reach the history.
+    """
+
+    def __init__(self, service: ScoreboardService, max_group: int):
+        self.service = service
+        self.max_group = max_group
+        # node id -> [newest record, futures of every request it answers,
+        #             superseded records]
+        self._pending: "OrderedDict[Any, list]" = OrderedDict()
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # One writer thread: groups are appended strictly in arrival order
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="scoreboard-commit"
+        )
+
+    def start(self):
+        if self._task is None:
+            self._ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._executor.shutdown(wait=True)
+
+    def depth(self) -> int:
+        """Number of distinct nodes waiting to be committed"""
+        return len(self._pending)
+
+    async def submit(self, record: Dict[str, Any]):
+        future = asyncio.get_running_loop().create_future()
+        node_id = record["node_id"]
+        key = node_id if isinstance(node_id, str) else object()
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [record, [future], []]
+        else:
+            # Backlogs arrive out of order: keep the newest report
+            if record["timestamp"] >= entry[0]["timestamp"]:
+                record, entry[0] = entry[0], record
+            entry[1].append(future)
+            entry[2].append(record)
+        self._ready.set()
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._pending:
+                group = []
+                while self._pending and len(group) < self.max_group:
+                    group.append(self._pending.popitem(last=False)[1])
+                records = [record for record, _, _ in group]
+                futures = [f for _, waiting, _ in group for f in waiting]
+                superseded = [r for _, _, replaced in group for r in replaced]
+                try:
+                    await loop.run_in_executor(
+                        self._executor,
+                        self.service.submit_many,
+                        records,
+                        superseded,
+                    )
+                except Exception as e:
+                    logger.error(f"Error committing scoreboard submissions: {e}")
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for future in futures:
+                    if not future.done():
+                        future.set_result(None)
+
+
+class ScoreboardApp:
+    def __init__(
+        self,
+        service: ScoreboardService,
+        max_batch_records: int = 50000,
+        max_commit_group: int = 1024,
+        limiter: Optional[SubmissionLimiter] = None,
+        max_queue_depth: int = 20000,
+        trust_forwarded: bool = False,
+    ):
+        self.service = service
+        self.max_batch_records = max_batch_records
+        self.limiter = limiter
+        self.max_queue_depth = max_queue_depth
+        # Only honour X-Forwarded-For behind a proxy that sets it
+        self.trust_forwarded = trust_forwarded
+        self._committer = _Committer(service, max_commit_group)
+        self.cache = SnapshotCache(service.store)
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------
+    # ASGI plumbing
+    # ------------------------------------------------------------------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._ensure_started()
+            status, payload, headers = await self._dispatch(scope, receive)
+            await self._send_json(send, status, payload, headers)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self._ensure_started()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _ensure_started(self):
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.service.start)
+            self._committer.start()
+            self._started = True
+
+    async def shutdown(self):
+        if not self._started:
+            return
+        await self._committer.stop()
+        await asyncio.get_running_loop().run_in_executor(None, self.service.stop)
+        self._started = False
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status: int, payload, headers: Headers = ()):
+        if payload is None:
+            body, content_headers = b"", []
+        else:
+            if isinstance(payload, bytes):
+                body = payload
+            else:
+                body = json.dumps(payload).encode()
+            content_headers = [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": content_headers + list(headers),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+
+    async def _dispatch(self, scope, receive) -> Tuple[int, Any, Headers]:
+        method = scope["method"]
+        path = scope["path"].rstrip("/") or "/"
+
+        if path == "/submit" and method == "POST":
+            return await self._submit(await self._read_body(receive), scope)
+        if path == "/submit/batch" and method == "POST":
+            return await self._submit_batch(await self._read_body(receive), scope)
+        if path == "/scoreboard" and method == "GET":
+            return await self._scoreboard(scope)
+        if path == "/scoreboard/changes" and method == "GET":
+            return await self._changes(scope)
+        if path.startswith("/scoreboard/") and method == "GET":
+            return self._node(path[len("/scoreboard/") :])
+        if path == "/history" and method == "GET":
+            return await self._history(None, scope)
+        if path.startswith("/history/") and method == "GET":
+            return await self._history(path[len("/history/") :], scope)
+        if path == "/rollups" and method == "GET":
+            return await self._rollups(scope)
+        if path == "/top" and method == "GET":
+            return self._top(scope)
+        if path.startswith("/rank/") and method == "GET":
+            return self._rank(path[len("/rank/") :])
+        if path == "/percentile" and method == "GET":
+            return self._percentile(scope)
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "nodes": len(self.service.store)}, []
+        if path == "/metrics" and method == "GET":
+            return 200, self.service.metrics(), []
+        return 404, {"error": "Not found"}, []
+
+    def _client_ip(self, scope) -> Optional[str]:
+        if self.trust_forwarded:
+            for name, value in scope.get("headers") or []:
+                if name == b"x-forwarded-for":
+                    return value.decode().split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else None
+
+    def _shed(self):
+        """Fail fast while the commit queue is too deep to drain in time"""
+        if self._committer.depth() >= self.max_queue_depth:
+            return 503, {"error": "Server busy"}, [(b"retry-after", b"1")]
+        return None
+
+    def _limit(self, node_id: Optional[str], scope):
+        if self.limiter is None:
+            return None
+        wait = self.limiter.check(node_id, self._client_ip(scope))
+        if wait:
+            header = retry_after_header(wait).encode()
+            return 429, {"error": "Rate limit exceeded"}, [(b"retry-after", header)]
+        return None
+
+    async def _submit(self, body: bytes, scope):
+        rejected = self._shed()
+        if rejected:
+            return rejected
+        # As in the Flask app, the schema reports every malformed body, JSON
+        # or not, as a 400
+        try:
+            data = json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        node_id = data.get("node_id") if isinstance(data, dict) else None
+        if not isinstance(node_id, str):
+            node_id = None
+        rejected = self._limit(node_id, scope)
+        if rejected:
+            return rejected
+        record, error = self.service.validate(data)
+        if error:
+            return 400, {"error": error}, []
+
+        await self._committer.submit(record)
+        return 200, {"status": "success", "updated": record}, []
+
+    async def _submit_batch(self, body: bytes, scope):
+        rejected = self._shed() or self._limit(None, scope)
+        if rejected:
+            return rejected
+        encoding = dict(scope.get("headers") or []).get(b"content-encoding")
+        try:
+            body = decode_body(body, encoding.decode() if encoding else None)
+            records, errors = parse_batch(body)
+        except (BatchFormatError, UnicodeDecodeError) as e:
+            return 400, {"error": str(e)}, []
+        if len(records) > self.max_batch_records:
+            return (
+                413,
+                {"error": f"Batch exceeds {self.max_batch_records} records"},
+                [],
+            )
+
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            None, self.service.submit_batch, records, errors
+        )
+        counts = Counter(r["status"] for r in results)
+        return 200, {"status": "success", "counts": counts, "results": results}, []
+
+    async def _scoreboard(self, scope):
+        snapshot = self.cache.current()
+        if snapshot is None:
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(None, self.cache.get)
+
+        headers = [
+            (b"etag", snapshot.etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"vary", b"accept-encoding"),
+        ]
+        request_headers = dict(scope.get("headers") or [])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode()
+        if if_none_match:
+            tags = {t.strip() for t in if_none_match.split(",")}
+            tags |= {t[2:] for t in tags if t.startswith("W/")}
+            if "*" in tags or snapshot.etag in tags:
+                return 304, None, headers
+        if b"gzip" in request_headers.get(b"accept-encoding", b""):
+            headers.append((b"content-encoding", b"gzip"))
+            return 200, snapshot.gzip_body, headers
+        return 200, snapshot.body, headers
+
+    async def _changes(self, scope):
+        query = self._query(scope)
+        try:
+            since = int(query.get("since", 0))
+        except ValueError:
+            return 400, {"error": "since must be an integer"}, []
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, self.service.store.changes_since, since, query.get("epoch")
+        )
+        return 200, result, []
+
+    def _node(self, node_id: str):
+        record = self.service.store.get(node_id)
+        if record is None:
+            return 404, {"error": "Unknown node"}, []
+        return 200, dict(record), []
+
+    @staticmethod
+    def _query(scope) -> Dict[str, str]:
+        query = parse_qs(scope.get("query_string", b"").decode())
+        return {k: v[0] for k, v in query.items()}
+
+    async def _history(self, node_id: Optional[str], scope):
+        history = self.service.history
+        if history is None:
+            return 404, {"error": "History is disabled"}, []
+        query = self._query(scope)
+        try:
+            start = float(query["start"]) if "start" in query else None
+            end = float(query["end"]) if "end" in query else None
+            limit = int(query["limit"]) if "limit" in query else None
+        except ValueError:
+            return 400, {"error": "start/end must be numbers, limit an integer"}, []
+
+        loop = asyncio.get_running_loop()
+        if node_id is None:
+            rows = await loop.run_in_executor(
+                None, history.fleet_history, start, end, limit
+            )
+        else:
+            rows = await loop.run_in_executor(
+                None, history.node_history, node_id, start, end, limit
+            )
+        return 200, {"node_id": node_id, "submissions": rows}, []
+
+    async def _rollups(self, scope):
+        history = self.service.history
+        if history is None or history.rollups is None:
+            return 404, {"error": "Rollups are disabled"}, []
+        query = self._query(scope)
+        try:
+            start = int(query["start"]) if "start" in query else None
+            end = int(query["end"]) if "end" in query else None
+        except ValueError:
+            return 400, {"error": "start/end must be integers"}, []
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                None,
+                history.rollup,
+                query.get("node_id"),
+                start,
+                end,
+                query.get("resolution"),
+            )
+        except ValueError as e:
+            return 400, {"error": str(e)}, []
+        return 200, result, []
+
+    def _top(self, scope):
+        try:
+            k = int(self._query(scope).get("k", 10))
+        except ValueError:
+            return 400, {"error": "k must be an integer"}, []
+        k = max(0, min(k, 1000))
+        return 200, {"top": self.service.store.top(k)}, []
+
+    def _rank(self, node_id: str):
+        standing = self.service.store.standing(node_id)
+        if standing is None:
+            return 404, {"error": "Unknown node"}, []
+        return 200, standing, []
+
+    def _percentile(self, scope):
+        try:
+            p = float(self._query(scope).get("p", 50))
+        except ValueError:
+            return 400, {"error": "p must be a number"}, []
+        value = self.service.store.score_at_percentile(p)
+        return 200, {"percentile": p, "hashrate": value}, []
@@ -0,0 +1,76 @@
+"""
+Parsing and validation for bulk scoreboard submissions
+
+Rigs that were offline upload their buffered reports in one request, either
+as a JSON array or as NDJSON (one JSON object per line), optionally gzipped
+(``Content-Encoding: gzip``).
+"""
+
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# Largest batch body accepted after decompression
+MAX_INFLATED_BYTES = 64 * 1024 * 1024
+
+
+class BatchFormatError(ValueError):
+    """The request body is not a JSON array or NDJSON"""
+
+
+def decode_body(
+    body: bytes,
+    content_encoding: Optional[str],
+    limit: int = MAX_INFLATED_BYTES,
+) -> bytes:
+    """Undo a gzip ``Content-Encoding``, refusing bodies that inflate past
+    ``limit`` bytes"""
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding != "gzip":
+        raise BatchFormatError(f"Unsupported Content-Encoding: {encoding}")
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, limit + 1)
+    except zlib.error as e:
+        raise BatchFormatError(f"Invalid gzip body: {e}") from None
+    if len(data) > limit:
+        raise BatchFormatError(f"Batch inflates past {limit} bytes")
+    # A cut-off upload inflates to a prefix of the batch without an error
+    if not inflater.eof:
+        raise BatchFormatError("Truncated gzip body")
+    if inflater.unused_data:
+        raise BatchFormatError("Trailing data after gzip body")
+    return data
+
+
+def parse_batch(body: bytes) -> Tuple[List[Any], Dict[int, str]]:
+    """Split a batch body into records.
+
+    Returns the records plus a map of index -> error for NDJSON lines that
+    could not be parsed, so one bad line does not reject the whole batch.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        return [], {}
+
+    if text.startswith("["):
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise BatchFormatError(f"Invalid JSON array: {e}") from None
+        return records, {}
+
+    records: List[Any] = []
+    errors: Dict[int, str] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            errors[len(records)] = f"Invalid JSON: {e.msg}"
+            records.append(None)
+    return records, errors
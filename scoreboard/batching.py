@@ -0,0 +1,93 @@
+"""
+Gas-aware batch sizing for multi-proof transactions
+
+``MeshNetGateway.batchSubmitProofs`` takes up to ten proofs per call. Bigger
+batches amortise the fixed transaction cost (21000 base gas, the call and
+its bookkeeping) over more proofs, but a batch whose gas exceeds the block or
+configured limit can never be mined. ``BatchSizer`` fits
+``gas = overhead + per_proof * size`` to the gas actually observed (estimates
+and receipts), weighting recent batches more so it follows contract or
+network changes, and picks the largest size whose predicted gas fits under
+``gas_cap`` with ``headroom`` to spare.
+"""
+
+import math
+import threading
+from typing import Optional, Tuple
+
+# require(rigIds.length <= 10) in MeshNetGateway.batchSubmitProofs
+MAX_BATCH_PROOFS = 10
+
+
+class BatchSizer:
+    def __init__(
+        self,
+        gas_cap: int,
+        max_size: int = MAX_BATCH_PROOFS,
+        headroom: float = 1.2,
+        decay: float = 0.9,
+    ):
+        if gas_cap <= 0 or max_size < 1:
+            raise ValueError("gas_cap must be positive and max_size >= 1")
+        self.gas_cap = gas_cap
+        self.max_size = max_size
+        self.headroom = headroom
+        self.decay = decay
+        # Exponentially decayed sums for the least-squares fit
+        self._w = 0.0
+        self._n = 0.0
+        self._g = 0.0
+        self._nn = 0.0
+        self._ng = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, size: int, gas: int):
+        """Record the gas one batch of ``size`` proofs used (or was
+        estimated to use)"""
+        if size < 1 or gas <= 0:
+            return
+        with self._lock:
+            d = self.decay
+            self._w = self._w * d + 1
+            self._n = self._n * d + size
+            self._g = self._g * d + gas
+            self._nn = self._nn * d + size * size
+            self._ng = self._ng * d + size * gas
+
+    def model(self) -> Optional[Tuple[float, float]]:
+        """``(overhead, per_proof)`` gas, or None before any observation"""
+        with self._lock:
+            if not self._w:
+                return None
+            w, n, g = self._w, self._n, self._g
+            spread = self._nn - n * n / w
+            if spread > 1e-9:
+                per_proof = (self._ng - n * g / w) / spread
+                overhead = (g - per_proof * n) / w
+                if per_proof > 0 and overhead >= 0:
+                    return overhead, per_proof
+            # One batch size seen so far (or a nonsensical fit): charge
+            # everything per proof, which over- rather than underestimates
+            return 0.0, g / n
+
+    def predict(self, size: int) -> Optional[float]:
+        model = self.model()
+        if model is None:
+            return None
+        overhead, per_proof = model
+        return overhead + per_proof * size
+
+    def size(self) -> int:
+        """Proofs to put in the next batch"""
+        model = self.model()
+        if model is None:
+            # The first batch is estimated before it is sent, which tells us
+            # whether it fits
+            return self.max_size
+        overhead, per_proof = model
+        fits = math.floor((self.gas_cap / self.headroom - overhead) / per_proof)
+        return max(1, min(self.max_size, fits))
+
+    def gas_limit(self, estimate: int) -> int:
+        """Transaction gas limit for a batch estimated at ``estimate``"""
+        return min(self.gas_cap, math.ceil(estimate * self.headroom))
@@ -0,0 +1,249 @@
+"""
+Compact binary scoreboard snapshot
+
+A columnar alternative to the pretty-printed ``meshnet_scoreboard.json``,
+written next to it as ``meshnet_scoreboard.bin``. The column schema is taken
+from the first record: string columns hold indexes into one interned string
+table, numeric columns are packed int64/float64 arrays. Records that do not
+match the schema exactly (other keys, key order or value types) are kept as
+JSON in an overflow section, so decoding always reproduces the document.
+
+Layout (little-endian):
+
+    magic "MSHB" | version u8 | layout u8 | reserved u16 | rows u32 | cols u16
+    per column:   name length u16 | name utf-8 | kind u8 ("s", "q" or "d")
+    strings:      count u32 | length u64 | NUL-separated utf-8
+    per column:   packed values for the regular rows
+    overflow:     length u64 | JSON {"rows": [[position, record]...], "extra"}
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import repeat
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+MAGIC = b"MSHB"
+FORMAT_VERSION = 1
+LAYOUTS = ("list", "rigs")
+
+_HEADER = struct.Struct("<4sBBHIH")
+# Array typecode of each column kind; string columns hold table indexes
+TYPECODES = {"s": "I", "q": "q", "d": "d"}
+_INT64 = (-(2**63), 2**63 - 1)
+
+
+class SnapshotHeader(NamedTuple):
+    """Everything in front of the packed columns"""
+
+    layout: str
+    # Regular rows, i.e. the length of every column
+    rows: int
+    # (name, kind) per column
+    schema: List[Tuple[str, str]]
+    string_count: int
+    # Byte span of the NUL-separated string table
+    strings: Tuple[int, int]
+    # Offset of the first column
+    columns: int
+
+
+def binary_path_for(json_path: str) -> str:
+    """``meshnet_scoreboard.json`` -> ``meshnet_scoreboard.bin``"""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+def is_binary_snapshot(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == MAGIC
+    except OSError:
+        return False
+
+
+def _kind(value) -> str:
+    if isinstance(value, str):
+        # NUL separates the interned strings
+        return "" if "\0" in value else "s"
+    if isinstance(value, bool):
+        return ""
+    if isinstance(value, int) and _INT64[0] <= value <= _INT64[1]:
+        return "q"
+    if isinstance(value, float):
+        return "d"
+    return ""
+
+
+def _to_le(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_le(typecode: str, data: bytes) -> array:
+    """An array of little-endian packed values"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _rows(keys: List[str], columns: List[list]) -> List[dict]:
+    if len(keys) == 3:
+        # The list layout's shape; a dict display builds rows about twice as
+        # fast as dict(zip(...))
+        k0, k1, k2 = keys
+        return [{k0: a, k1: b, k2: c} for a, b, c in zip(*columns)]
+    return list(map(dict, map(zip, repeat(keys), zip(*columns))))
+
+
+def _merge(regular: List[Any], overflow: List[list]) -> List[Any]:
+    """Interleave the regular rows with ``[position, record]`` overflow rows,
+    which ``encode`` writes in ascending position order"""
+    if not overflow:
+        return regular
+    merged: List[Any] = []
+    taken = 0
+    for position, record in overflow:
+        count = position - len(merged)
+        merged.extend(regular[taken : taken + count])
+        taken += count
+        merged.append(record)
+    merged.extend(regular[taken:])
+    return merged
+
+
+def encode(document) -> bytes:
+    """Serialise a scoreboard document (list or ``{"rigs": [...]}``)"""
+    if isinstance(document, dict):
+        layout = "rigs"
+        records = document.get("rigs", [])
+        extra = {k: v for k, v in document.items() if k != "rigs"}
+    else:
+        layout = "list"
+        records = document
+        extra = {}
+
+    schema: List[Tuple[str, str]] = []
+    if records and isinstance(records[0], dict):
+        schema = [(k, _kind(v)) for k, v in records[0].items()]
+        if not all(kind for _, kind in schema):
+            schema = []
+    keys = tuple(k for k, _ in schema)
+    kinds = [kind for _, kind in schema]
+
+    strings: Dict[str, int] = {}
+    columns = [array(TYPECODES[kind]) for kind in kinds]
+    overflow = []
+    for position, record in enumerate(records):
+        if (
+            not keys
+            or not isinstance(record, dict)
+            or tuple(record) != keys
+            or any(_kind(v) != kind for v, kind in zip(record.values(), kinds))
+        ):
+            overflow.append([position, record])
+            continue
+        for column, kind, value in zip(columns, kinds, record.values()):
+            if kind == "s":
+                value = strings.setdefault(value, len(strings))
+            column.append(value)
+
+    table = "\0".join(strings).encode("utf-8")
+    parts = [
+        _HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            LAYOUTS.index(layout),
+            0,
+            len(records) - len(overflow),
+            len(schema),
+        )
+    ]
+    for name, kind in schema:
+        raw = name.encode("utf-8")
+        parts.append(struct.pack("<H", len(raw)) + raw + kind.encode())
+    parts.append(struct.pack("<IQ", len(strings), len(table)) + table)
+    parts.extend(_to_le(column) for column in columns)
+    tail = json.dumps({"rows": overflow, "extra": extra}, separators=(",", ":"))
+    tail_bytes = tail.encode("utf-8")
+    parts.append(struct.pack("<Q", len(tail_bytes)) + tail_bytes)
+    return b"".join(parts)
+
+
+def read_header(data) -> SnapshotHeader:
+    """Parse the header, column schema and string table position of an
+    encoded snapshot (bytes, a memoryview or a memory map)"""
+    view = memoryview(data)
+    magic, version, layout, _, rows, ncols = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a MESHNET binary scoreboard snapshot")
+    offset = _HEADER.size
+
+    schema = []
+    for _ in range(ncols):
+        (length,) = struct.unpack_from("<H", view, offset)
+        offset += 2
+        name = bytes(view[offset : offset + length]).decode("utf-8")
+        offset += length
+        schema.append((name, chr(view[offset])))
+        offset += 1
+
+    count, length = struct.unpack_from("<IQ", view, offset)
+    offset += 12
+    return SnapshotHeader(
+        LAYOUTS[layout], rows, schema, count, (offset, offset + length), offset + length
+    )
+
+
+def decode(data: bytes):
+    """Rebuild the scoreboard document written by ``encode``"""
+    view = memoryview(data)
+    header = read_header(view)
+    rows = header.rows
+    strings: List[str] = []
+    if header.string_count:
+        start, end = header.strings
+        strings = str(view[start:end], "utf-8").split("\0")
+    offset = header.columns
+
+    columns: List[Any] = []
+    for _, kind in header.schema:
+        typecode = TYPECODES[kind]
+        size = array(typecode).itemsize * rows
+        values = from_le(typecode, view[offset : offset + size])
+        offset += size
+        if kind == "s":
+            columns.append([strings[i] for i in values])
+        else:
+            columns.append(values.tolist())
+
+    (tail_length,) = struct.unpack_from("<Q", view, offset)
+    offset += 8
+    tail = json.loads(bytes(view[offset : offset + tail_length]).decode("utf-8"))
+
+    keys = [name for name, _ in header.schema]
+    records = _merge(_rows(keys, columns), tail["rows"])
+
+    if header.layout == "rigs":
+        return dict(tail["extra"], rigs=records)
+    return records
+
+
+def write_snapshot(path: str, document):
+    """Atomically write ``document`` as a binary snapshot"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode(document))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str):
+    with open(path, "rb") as f:
+        return decode(f.read())
@@ -0,0 +1,73 @@
+"""
+Pre-serialised scoreboard snapshot for read endpoints
+
+Pollers usually fetch an unchanged scoreboard. ``SnapshotCache`` keeps the
+JSON bytes, their gzip encoding and an ETag for the store version they were
+built from, and only rebuilds when a write has bumped the version. Rebuilds
+are rate limited by ``max_staleness`` so a busy write stream cannot turn every
+read into a full serialisation.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from .store import ScoreboardStore
+
+
+class CachedSnapshot(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+    gzip_body: bytes
+
+
+class SnapshotCache:
+    def __init__(
+        self,
+        store: ScoreboardStore,
+        max_staleness: float = 1.0,
+        compresslevel: int = 6,
+    ):
+        self.store = store
+        self.max_staleness = max_staleness
+        self.compresslevel = compresslevel
+        self._snapshot: Optional[CachedSnapshot] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[CachedSnapshot]:
+        """The cached snapshot if it can be served without rebuilding"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if snapshot.version == self.store.version:
+            return snapshot
+        if time.monotonic() - self._built_at < self.max_staleness:
+            return snapshot
+        return None
+
+    def get(self) -> CachedSnapshot:
+        """Return the cached snapshot, rebuilding it if it is out of date"""
+        snapshot = self.current()
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            # Another thread may have rebuilt while we waited
+            snapshot = self.current()
+            if snapshot is not None:
+                return snapshot
+            version = self.store.version
+            body = json.dumps(self.store.snapshot(), separators=(",", ":")).encode()
+            snapshot = CachedSnapshot(
+                version=version,
+                etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+                body=body,
+                gzip_body=gzip.compress(body, compresslevel=self.compresslevel),
+            )
+            self._snapshot = snapshot
+            self._built_at = time.monotonic()
+            return snapshot
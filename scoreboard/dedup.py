@@ -0,0 +1,210 @@
+"""
+Probabilistic duplicate suppression for ingested records
+
+Retried syncs and mesh relays deliver the same ``(rig id, timestamp)`` report
+more than once. ``Deduplicator`` answers "seen before?" from a scalable Bloom
+filter and only asks the exact source of truth (the scoreboard history, a
+window's contents, ...) when the filter says "maybe". A "no" from the filter
+is always right, so unseen records never pay for the exact check, and the
+filter costs about 2 bytes per key at a 0.1% false-positive rate instead of
+a Python set entry per key.
+
+``check_and_add`` checks a key and, when it is new, claims it in one step:
+until ``release`` is called (once the record is in the source of truth), a
+concurrent check of the same key reports a duplicate. Keys older than
+``seeded_since`` were not loaded into the filter, so a filter miss on one of
+them is confirmed too.
+
+``ScalableBloomFilter`` starts with one filter sized for ``capacity`` keys and
+adds a larger one (``growth`` times the previous capacity, with an error rate
+tightened by ``tightening``) whenever the newest fills up. The error rates
+form a geometric series summing to ``error_rate``, so the compound
+false-positive rate stays below it without knowing the final key count.
+"""
+
+import hashlib
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_CAPACITY = 100000
+DEFAULT_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests (double hashing)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        ln2 = math.log(2)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / ln2**2))
+        self.hashes = max(1, round(self.size / capacity * ln2))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.bits_set = 0
+
+    def _positions(self, digest: bytes) -> List[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add(self, digest: bytes):
+        bits = self.bits
+        for p in self._positions(digest):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                self.bits_set += 1
+        self.count += 1
+
+    def current_error_rate(self) -> float:
+        """False-positive probability at the current fill"""
+        return (self.bits_set / self.size) ** self.hashes
+
+
+class ScalableBloomFilter:
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(capacity, error_rate * (1 - tightening))]
+
+    @staticmethod
+    def digest(key: bytes) -> bytes:
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def __contains__(self, key: bytes) -> bool:
+        digest = self.digest(key)
+        # The newest filter holds the most keys
+        return any(digest in f for f in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def add(self, key: bytes):
+        newest = self.filters[-1]
+        if newest.count >= newest.capacity:
+            newest = BloomFilter(
+                newest.capacity * self.growth, newest.error_rate * self.tightening
+            )
+            self.filters.append(newest)
+        newest.add(self.digest(key))
+
+    def memory_bytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
+
+    def current_error_rate(self) -> float:
+        """Estimated probability that an unseen key is reported as seen"""
+        miss = 1.0
+        for f in self.filters:
+            miss *= 1 - f.current_error_rate()
+        return 1 - miss
+
+
+def record_key(node_id: str, timestamp: Any) -> bytes:
+    return f"{node_id}\0{timestamp}".encode("utf-8")
+
+
+class Deduplicator:
+    """A Bloom filter in front of an exact ``confirm(node_id, timestamp)``"""
+
+    def __init__(
+        self,
+        confirm: Callable[[str, Any], bool],
+        seen: Optional[ScalableBloomFilter] = None,
+    ):
+        self.confirm = confirm
+        self.seen = seen if seen is not None else ScalableBloomFilter()
+        # Timestamps before this were not added to the filter
+        self.seeded_since = -math.inf
+        # Claimed by check_and_add, not yet in the source of truth
+        self._pending: Set[bytes] = set()
+        self.checks = 0
+        self.maybe = 0
+        self.duplicates = 0
+        self.false_positives = 0
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, node_id: str, timestamp: Any) -> bool:
+        key = record_key(node_id, timestamp)
+        with self._lock:
+            self.checks += 1
+            if key not in self.seen:
+                return False
+            self.maybe += 1
+        duplicate = self.confirm(node_id, timestamp)
+        with self._lock:
+            if duplicate:
+                self.duplicates += 1
+            else:
+                self.false_positives += 1
+        return duplicate
+
+    def check_and_add(self, node_id: str, timestamp: Any) -> bool:
+        """Whether the key was seen before; if not, add it and hold it as
+        pending until ``release``"""
+        key = record_key(node_id, timestamp)
+        with self._lock:
+            self.checks += 1
+            if key in self._pending:
+                self.duplicates += 1
+                return True
+            hit = key in self.seen
+            if not hit:
+                self.seen.add(key)
+            self._pending.add(key)
+            unseeded = (
+                isinstance(timestamp, (int, float)) and timestamp < self.seeded_since
+            )
+            if not hit and not unseeded:
+                return False
+            self.maybe += 1
+        duplicate = self.confirm(node_id, timestamp)
+        with self._lock:
+            if duplicate:
+                self._pending.discard(key)
+                self.duplicates += 1
+            elif hit:
+                self.false_positives += 1
+        return duplicate
+
+    def release(self, keys: Iterable[Tuple[str, Any]]):
+        """Drop the pending claims on ``(node_id, timestamp)`` keys"""
+        with self._lock:
+            for node_id, timestamp in keys:
+                self._pending.discard(record_key(node_id, timestamp))
+
+    def add(self, node_id: str, timestamp: Any):
+        key = record_key(node_id, timestamp)
+        with self._lock:
+            self.seen.add(key)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            unseen = self.checks - self.duplicates
+            return {
+                "keys": len(self.seen),
+                "filters": len(self.seen.filters),
+                "memory_bytes": self.seen.memory_bytes(),
+                "checks": self.checks,
+                "exact_checks": self.maybe,
+                "duplicates": self.duplicates,
+                "false_positives": self.false_positives,
+                # Share of unconfirmed records the filter sent to the exact
+                # check
+                "observed_fp_rate": self.false_positives / unseen if unseen else 0.0,
+                "estimated_fp_rate": self.seen.current_error_rate(),
+            }
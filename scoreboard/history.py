@@ -0,0 +1,308 @@
+"""
+SQLite-backed scoreboard history
+
+``meshnet_scoreboard.json`` only holds the latest report per node. The history
+store keeps every accepted submission in an embedded SQLite database (WAL
+journal mode) so uptime, averages and reward windows can be computed later.
+
+Rows are buffered in memory and written by a background thread with one
+``executemany`` per batch. When rollups are enabled the same transaction
+updates the 1m/1h/1d buckets (see ``rollups.py``). The write-ahead log stays
+the source of truth for the live scoreboard; a crash can lose at most the last
+``flush_interval`` of history rows.
+
+Export the latest-per-node view for JSON consumers with:
+
+    python -m scoreboard.history export history.sqlite3 meshnet_scoreboard.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .rollups import Rollups
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    node_id TEXT NOT NULL,
+    hashrate NUMERIC NOT NULL,
+    timestamp NUMERIC NOT NULL,
+    received_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_node_ts
+    ON submissions (node_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_submissions_ts
+    ON submissions (timestamp);
+"""
+
+
+class HistoryStore:
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 5000,
+        rollups: Optional[Rollups] = None,
+        prune_interval: float = 600.0,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.rollups = rollups
+        self.prune_interval = prune_interval
+
+        self._local = threading.local()
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        # (node_id, timestamp) -> count of rows not yet committed
+        self._pending: Dict[Tuple[str, Any], int] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        if self.rollups is not None:
+            self.rollups.create_schema(conn)
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="scoreboard-history", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def record(self, records: Iterable[Dict[str, Any]]):
+        """Queue submissions for insertion"""
+        now = time.time()
+        rows = [(r["node_id"], r["hashrate"], r["timestamp"], now) for r in records]
+        pending = self._pending
+        with self._pending_lock:
+            for row in rows:
+                key = (row[0], row[2])
+                pending[key] = pending.get(key, 0) + 1
+        with self._lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+        if pending >= self.flush_batch_size:
+            self._wakeup.set()
+
+    def backlog(self) -> int:
+        """Rows buffered but not yet written"""
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Write buffered rows in one transaction; returns the row count.
+        Rows a failed transaction did not write go back to the buffer."""
+        with self._write_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO submissions (node_id, hashrate, timestamp, "
+                        "received_at) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                    if self.rollups is not None:
+                        self.rollups.apply(conn, rows)
+            except Exception:
+                # Still pending, so contains() keeps answering for them
+                with self._lock:
+                    self._buffer[:0] = rows
+                raise
+            # Committed, so contains() finds them in the table from now on
+            pending = self._pending
+            with self._pending_lock:
+                for row in rows:
+                    key = (row[0], row[2])
+                    count = pending.pop(key) - 1
+                    if count:
+                        pending[key] = count
+            return len(rows)
+
+    def prune(self) -> int:
+        """Apply the rollup retention policies"""
+        if self.rollups is None:
+            return 0
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                return self.rollups.prune(conn)
+
+    def _run(self):
+        last_prune = time.monotonic()
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if time.monotonic() - last_prune >= self.prune_interval:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error writing scoreboard history: {e}")
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _range(start, end) -> tuple:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        return clauses, params
+
+    def _select(self, clauses, params, limit) -> List[Dict[str, Any]]:
+        sql = "SELECT node_id, hashrate, timestamp, received_at FROM submissions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = params + [int(limit)]
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def node_history(
+        self,
+        node_id: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Submissions of one node with ``start <= timestamp < end``"""
+        clauses, params = self._range(start, end)
+        return self._select(["node_id = ?"] + clauses, [node_id] + params, limit)
+
+    def fleet_history(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Submissions of every node with ``start <= timestamp < end``"""
+        clauses, params = self._range(start, end)
+        return self._select(clauses, params, limit)
+
+    def rollup(
+        self,
+        node_id: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        resolution: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Aggregated buckets for a node, or the fleet when node_id is None"""
+        if self.rollups is None:
+            raise ValueError("Rollups are not enabled for this history store")
+        return self.rollups.query(self._connect(), node_id, start, end, resolution)
+
+    def contains(self, node_id: str, timestamp: Any) -> bool:
+        """Whether a submission of ``node_id`` at ``timestamp`` was recorded,
+        flushed or not"""
+        # Rows leave the pending keys only once committed
+        with self._pending_lock:
+            if (node_id, timestamp) in self._pending:
+                return True
+        cursor = self._connect().execute(
+            "SELECT 1 FROM submissions WHERE node_id = ? AND timestamp = ?",
+            (node_id, timestamp),
+        )
+        return cursor.fetchone() is not None
+
+    def keys(self, start: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """``(node_id, timestamp)`` of every flushed submission with
+        ``timestamp >= start``"""
+        clauses, params = self._range(start, None)
+        sql = "SELECT node_id, timestamp FROM submissions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        cursor = self._connect().execute(sql, params)
+        return (tuple(row) for row in cursor)
+
+    def latest(self) -> List[Dict[str, Any]]:
+        """Newest submission per node (by timestamp; backlogs arrive out of
+        order), in order of first appearance, i.e. the list layout of
+        meshnet_scoreboard.json"""
+        rows = self._connect().execute(
+            """
+            SELECT s.node_id, s.hashrate, s.timestamp
+            FROM submissions s
+            JOIN (
+                SELECT node_id, MIN(id) AS first_id
+                FROM submissions GROUP BY node_id
+            ) g ON s.node_id = g.node_id
+            WHERE s.id = (
+                SELECT t.id FROM submissions t WHERE t.node_id = s.node_id
+                ORDER BY t.timestamp DESC, t.id DESC LIMIT 1
+            )
+            ORDER BY g.first_id
+            """
+        )
+        return [dict(row) for row in rows]
+
+    def export_snapshot(self, path: str, indent: Optional[int] = 2):
+        """Write the latest-per-node view as a JSON scoreboard file"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.latest(), f, indent=indent)
+        os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoreboard history tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write meshnet_scoreboard.json")
+    export.add_argument("database")
+    export.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        HistoryStore(args.database).export_snapshot(args.output)
+
+
+if __name__ == "__main__":
+    main()
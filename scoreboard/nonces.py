@@ -0,0 +1,321 @@
+"""
+Local nonce allocation and receipt tracking for oracle transactions
+
+Asking the node for ``get_transaction_count`` before every transaction costs a
+round trip per proof and breaks as soon as two transactions are in flight.
+``NonceManager`` reads the pending nonce once and hands nonces out locally:
+
+- a nonce whose send failed before reaching the mempool is ``release``-d and
+  handed out again before any new one. A gap that would stall every later
+  transaction can only remain when nothing else is sent after the failure,
+  so callers ``take_released`` at the end of a run and fill those nonces
+  (e.g. with a 0-value transfer to themselves);
+- on "nonce too low" (another sender used it, or a restart lost track)
+  ``resync`` re-reads the pending count and skips ahead;
+- a transaction resent on its own nonce replaces the pending one only at a
+  higher gas price (``replacement_gas_price``).
+
+``ReceiptTracker`` collects receipts for all outstanding transactions from one
+background thread instead of a blocking wait per transaction, and reports
+transactions that never confirm so their nonce can be reused.
+``BlockReceiptTracker`` does the same on asyncio, driven by new blocks: it
+reads each new block's transaction hashes once and only fetches receipts for
+the outstanding transactions it finds there, so the number of calls follows
+the number of blocks rather than the number of transactions.
+
+All of them only take callables, so they work with any web3 client.
+"""
+
+import asyncio
+import heapq
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Messages clients return for an already used nonce (geth, erigon, besu,
+# nethermind)
+NONCE_TOO_LOW = ("nonce too low", "nonce has already been used", "oldnonce")
+
+
+def is_nonce_too_low(error: BaseException) -> bool:
+    message = str(error).lower()
+    return any(text in message for text in NONCE_TOO_LOW)
+
+
+def replacement_gas_price(original: int, current: int) -> int:
+    """Gas price for resending a transaction on its nonce: clients refuse a
+    replacement less than 10% above the pending one (geth), so at least
+    12.5% above ``original``, or the current price if that is higher"""
+    return max(current, original + -(-original // 8))
+
+
+class NonceManager:
+    def __init__(self, fetch_pending: Optional[Callable[[], int]] = None):
+        # e.g. lambda: w3.eth.get_transaction_count(address, "pending"); async
+        # clients pass none and seed it with resync(pending) instead
+        self._fetch = fetch_pending
+        self._next: Optional[int] = None
+        self._released: List[int] = []
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        """The next nonce to sign with"""
+        with self._lock:
+            if self._released:
+                return heapq.heappop(self._released)
+            if self._next is None:
+                self._next = self._fetch()
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Give back a nonce whose transaction never reached the network"""
+        with self._lock:
+            if self._next is not None and nonce < self._next:
+                if nonce not in self._released:
+                    heapq.heappush(self._released, nonce)
+
+    def take_released(self) -> List[int]:
+        """Remove and return the released nonces nothing has reused"""
+        with self._lock:
+            released, self._released = sorted(self._released), []
+            return released
+
+    def resync(self, pending: Optional[int] = None) -> int:
+        """Re-read the pending nonce (or take ``pending``) after "nonce too
+        low"; returns the next fresh nonce. Released nonces the chain has
+        moved past are dropped."""
+        if pending is None:
+            pending = self._fetch()
+        with self._lock:
+            self._released = [n for n in self._released if n >= pending]
+            heapq.heapify(self._released)
+            self._next = pending if self._next is None else max(self._next, pending)
+            logger.info(f"Nonces resynced: pending {pending}, next {self._next}")
+            return self._next
+
+
+class ReceiptTracker:
+    def __init__(
+        self,
+        get_receipt: Callable[[Any], Optional[Any]],
+        on_receipt: Optional[Callable[[Any, Any, Any], None]] = None,
+        on_timeout: Optional[Callable[[Any, Any], None]] = None,
+        poll_interval: float = 2.0,
+        timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # get_receipt(tx_hash) returns None while the transaction is pending,
+        # e.g. w3.eth.get_transaction_receipt with TransactionNotFound caught
+        self._get_receipt = get_receipt
+        self.on_receipt = on_receipt
+        self.on_timeout = on_timeout
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._clock = clock
+        # tx hash -> (context, deadline)
+        self._pending: Dict[Any, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(self, tx_hash: Any, context: Any = None):
+        with self._lock:
+            self._pending[tx_hash] = (context, self._clock() + self.timeout)
+
+    def poll(self) -> Tuple[List[Tuple[Any, Any, Any]], List[Tuple[Any, Any]]]:
+        """Check every outstanding transaction once; returns
+        ``([(tx_hash, receipt, context)], [(tx_hash, context)] timed out)``"""
+        with self._lock:
+            pending = list(self._pending.items())
+        confirmed, expired = [], []
+        now = self._clock()
+        for tx_hash, (context, deadline) in pending:
+            try:
+                receipt = self._get_receipt(tx_hash)
+            except Exception as e:
+                logger.warning(f"Receipt lookup for {tx_hash} failed: {e}")
+                receipt = None
+            if receipt is not None:
+                confirmed.append((tx_hash, receipt, context))
+            elif now >= deadline:
+                expired.append((tx_hash, context))
+        with self._lock:
+            for tx_hash, *_ in confirmed:
+                self._pending.pop(tx_hash, None)
+            for tx_hash, _ in expired:
+                self._pending.pop(tx_hash, None)
+        for tx_hash, receipt, context in confirmed:
+            if self.on_receipt is not None:
+                self.on_receipt(tx_hash, receipt, context)
+        for tx_hash, context in expired:
+            if self.on_timeout is not None:
+                self.on_timeout(tx_hash, context)
+        # After the callbacks, which may track follow-up transactions
+        with self._lock:
+            if not self._pending:
+                self._idle.notify_all()
+        return confirmed, expired
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="receipt-tracker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is outstanding (the background thread must be
+        running); returns False on timeout"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Receipt polling failed: {e}")
+
+
+class BlockReceiptTracker:
+    def __init__(
+        self,
+        block_number: Callable[[], Awaitable[int]],
+        block_transactions: Callable[[int], Awaitable[Iterable[Any]]],
+        get_receipt: Callable[[Any], Awaitable[Any]],
+        on_receipt: Optional[Callable[[Any, Any, Any], Any]] = None,
+        on_timeout: Optional[Callable[[Any, Any], Any]] = None,
+        poll_interval: float = 2.0,
+        timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # block_transactions(number) returns the hashes in that block, in the
+        # same form as the tracked ones; callbacks may be coroutines
+        self._block_number = block_number
+        self._block_transactions = block_transactions
+        self._get_receipt = get_receipt
+        self.on_receipt = on_receipt
+        self.on_timeout = on_timeout
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._clock = clock
+        self._pending: Dict[Any, Tuple[Any, float]] = {}
+        # Last block already searched
+        self.block: Optional[int] = None
+        # Found in a block, receipt not fetched yet
+        self._mined: Dict[Any, None] = {}
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, tx_hash: Any, context: Any = None):
+        self._pending[tx_hash] = (context, self._clock() + self.timeout)
+        if self._idle is not None:
+            self._idle.clear()
+
+    async def poll(self) -> Tuple[List[Tuple[Any, Any, Any]], List[Tuple[Any, Any]]]:
+        """Search the blocks mined since the last poll; returns
+        ``([(tx_hash, receipt, context)], [(tx_hash, context)] timed out)``"""
+        head = await self._block_number()
+        if self.block is None:
+            self.block = head - 1
+        numbers = range(self.block + 1, head + 1)
+        blocks = await asyncio.gather(*(self._block_transactions(n) for n in numbers))
+        self.block = max(self.block, head)
+        for hashes in blocks:
+            self._mined.update((h, None) for h in hashes if h in self._pending)
+        found = list(self._mined)
+        receipts = await asyncio.gather(
+            *(self._get_receipt(h) for h in found), return_exceptions=True
+        )
+        confirmed = []
+        for tx_hash, receipt in zip(found, receipts):
+            if isinstance(receipt, BaseException):
+                # Retried on the next poll
+                logger.warning(f"Receipt lookup for {tx_hash} failed: {receipt}")
+                continue
+            del self._mined[tx_hash]
+            if receipt is None:
+                # Reorganised out of its block; left to the timeout
+                continue
+            confirmed.append((tx_hash, receipt, self._pending.pop(tx_hash)[0]))
+        now = self._clock()
+        expired = [
+            (tx_hash, context)
+            for tx_hash, (context, deadline) in self._pending.items()
+            if now >= deadline and tx_hash not in self._mined
+        ]
+        for tx_hash, _ in expired:
+            del self._pending[tx_hash]
+        for tx_hash, receipt, context in confirmed:
+            if self.on_receipt is not None:
+                await _maybe_await(self.on_receipt(tx_hash, receipt, context))
+        for tx_hash, context in expired:
+            if self.on_timeout is not None:
+                await _maybe_await(self.on_timeout(tx_hash, context))
+        # After the callbacks, which may track follow-up transactions
+        if not self._pending and self._idle is not None:
+            self._idle.set()
+        return confirmed, expired
+
+    async def start(self):
+        """Start polling from the current block; call before sending"""
+        if self._task is not None:
+            return
+        self.block = await self._block_number()
+        self._idle = asyncio.Event()
+        if not self._pending:
+            self._idle.set()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Until nothing is outstanding (polling must be running); returns
+        False on timeout"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Receipt polling failed: {e}")
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        await result
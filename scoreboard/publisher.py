@@ -0,0 +1,187 @@
+"""
+Write-behind git publisher for meshnet_scoreboard.json
+
+Keeps one long-lived clone of the scoreboard repository and publishes the
+in-memory ScoreboardStore as a single commit/push once enough nodes have
+changed or the flush interval is reached. Durability of the individual
+submissions is handled by the write-ahead log, not by git.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional, Set
+
+from .binary import binary_path_for, write_snapshot
+from .store import ScoreboardStore
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindPublisher:
+    def __init__(
+        self,
+        repo_url: str,
+        clone_dir: str,
+        store: ScoreboardStore,
+        scoreboard_file: str = "meshnet_scoreboard.json",
+        flush_interval: float = 30.0,
+        flush_batch_size: int = 500,
+        binary: bool = False,
+    ):
+        self.repo_url = repo_url
+        self.clone_dir = clone_dir
+        self.store = store
+        self.scoreboard_file = scoreboard_file
+        self.flush_interval = flush_interval
+        self.flush_batch_size = max(1, flush_batch_size)
+        # Also commit the binary snapshot (see binary.py) for fast readers
+        self.binary = binary
+
+        self.repo = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def scoreboard_path(self) -> str:
+        return os.path.join(self.clone_dir, self.scoreboard_file)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def open_working_copy(self):
+        """Reuse the existing clone if there is one, otherwise clone"""
+        if self.repo is not None:
+            return self.repo
+        # GitPython is only needed on the publishing side
+        from git import Repo
+
+        if os.path.isdir(os.path.join(self.clone_dir, ".git")):
+            logger.info(f"Reusing scoreboard working copy at {self.clone_dir}")
+            self.repo = Repo(self.clone_dir)
+        else:
+            logger.info(f"Cloning scoreboard repository into {self.clone_dir}")
+            self.repo = Repo.clone_from(self.repo_url, self.clone_dir)
+        return self.repo
+
+    def start(self):
+        """Start the flush thread; the first flush covers every node in the
+        store, since updates recovered from the log may never have been
+        pushed"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.open_working_copy()
+            key = self.store.key
+            self._pending.update(
+                r[key] for r in self.store if isinstance(r.get(key), str)
+            )
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="scoreboard-publisher", daemon=True
+            )
+            self._thread.start()
+        logger.info("Scoreboard publisher started")
+
+    def stop(self, flush=True):
+        """Stop the flush thread, optionally publishing what is still queued"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        thread.join()
+        self._thread = None
+        if flush:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Queueing
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, node_id: str):
+        """Note that ``node_id`` changed in the store since the last push"""
+        with self._lock:
+            self._pending.add(node_id)
+            pending = len(self._pending)
+        if pending >= self.flush_batch_size:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Publish all changed nodes as one commit; returns the number sent"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = set()
+            if not batch:
+                return 0
+
+            try:
+                self._publish(batch)
+            except Exception as e:
+                logger.error(f"Error publishing scoreboard batch: {e}")
+                with self._lock:
+                    # The store already holds the updates, only re-mark them
+                    self._pending |= batch
+                return 0
+
+            logger.info(f"Published {len(batch)} scoreboard updates")
+            return len(batch)
+
+    def _publish(self, batch: Set[str]):
+        if not batch:
+            return
+        origin = self.repo.remote(name="origin")
+        branch = self.repo.active_branch.name
+        origin.fetch()
+        self.repo.git.reset("--hard", f"origin/{branch}")
+
+        # The service is the only writer of the scoreboard file, so the store
+        # is authoritative and is written over the freshly fetched copy
+        document = self.store.snapshot()
+        with open(self.scoreboard_path, "w") as f:
+            json.dump(document, f, indent=2)
+        files = [self.scoreboard_file]
+        if self.binary:
+            write_snapshot(binary_path_for(self.scoreboard_path), document)
+            files.append(binary_path_for(self.scoreboard_file))
+
+        # A file the repository does not have yet (e.g. the first binary
+        # snapshot) is untracked rather than dirty
+        if not any(
+            self.repo.is_dirty(path=name, untracked_files=True) for name in files
+        ):
+            return
+        self.repo.git.add(*files)
+        if len(batch) == 1:
+            node_id = next(iter(batch))
+            record = self.store.get(node_id) or {}
+            timestamp = record.get("timestamp", int(time.time()))
+            message = f"Update from {node_id} at {timestamp}"
+        else:
+            message = f"Update {len(batch)} nodes at {int(time.time())}"
+        self.repo.index.commit(message)
+        origin.push(f"HEAD:{branch}").raise_if_error()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
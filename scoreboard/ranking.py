@@ -0,0 +1,211 @@
+"""
+Order-statistics index over node hashrate
+
+A treap (randomised balanced binary search tree) whose nodes carry subtree
+sizes, keyed by ``(-hashrate, node_id)`` so rank 1 is the fastest rig and ties
+are broken deterministically. Updates, rank-of, k-th and percentile lookups
+are O(log n) expected; top-K is O(log n + K). Nothing is ever re-sorted.
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+Key = Tuple[float, str]
+
+
+class _Node:
+    __slots__ = ("key", "prio", "left", "right", "size")
+
+    def __init__(self, key: Key, prio: float):
+        self.key = key
+        self.prio = prio
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.size = 1
+
+
+def _size(t: Optional[_Node]) -> int:
+    return t.size if t is not None else 0
+
+
+def _update(t: _Node):
+    t.size = 1 + _size(t.left) + _size(t.right)
+
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps where every key in ``a`` sorts before ``b``"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        _update(a)
+        return a
+    b.left = _merge(a, b.left)
+    _update(b)
+    return b
+
+
+def _split(t: Optional[_Node], key: Key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into keys ``< key`` and keys ``>= key``"""
+    if t is None:
+        return None, None
+    if t.key < key:
+        left, right = _split(t.right, key)
+        t.right = left
+        _update(t)
+        return t, right
+    left, right = _split(t.left, key)
+    t.left = right
+    _update(t)
+    return left, t
+
+
+def _delete(t: Optional[_Node], key: Key) -> Optional[_Node]:
+    if t is None:
+        return None
+    if t.key == key:
+        return _merge(t.left, t.right)
+    if key < t.key:
+        t.left = _delete(t.left, key)
+    else:
+        t.right = _delete(t.right, key)
+    _update(t)
+    return t
+
+
+class RankIndex:
+    def __init__(self, seed: Optional[int] = None):
+        self._root: Optional[_Node] = None
+        self._keys: Dict[str, Key] = {}
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def _key(node_id: str, hashrate: float) -> Key:
+        return (-hashrate, node_id)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def build(self, items: List[Tuple[str, float]]):
+        """Replace the index with ``(node_id, hashrate)`` pairs in O(n log n)
+        for the sort plus O(n) for the tree (Cartesian tree construction)"""
+        self._keys = {node_id: self._key(node_id, h) for node_id, h in items}
+        stack: List[_Node] = []
+        for key in sorted(self._keys.values()):
+            node = _Node(key, self._random.random())
+            last = None
+            while stack and stack[-1].prio < node.prio:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self._root = stack[0] if stack else None
+        self._fix_sizes(self._root)
+
+    @staticmethod
+    def _fix_sizes(root: Optional[_Node]):
+        # Post-order without recursion; the built tree can be deep before
+        # sizes are known
+        order, stack = [], [root] if root is not None else []
+        while stack:
+            t = stack.pop()
+            order.append(t)
+            if t.left is not None:
+                stack.append(t.left)
+            if t.right is not None:
+                stack.append(t.right)
+        for t in reversed(order):
+            _update(t)
+
+    def update(self, node_id: str, hashrate: float):
+        old = self._keys.get(node_id)
+        key = self._key(node_id, hashrate)
+        if old == key:
+            return
+        if old is not None:
+            self._root = _delete(self._root, old)
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key, self._random.random())), right)
+        self._keys[node_id] = key
+
+    def remove(self, node_id: str):
+        old = self._keys.pop(node_id, None)
+        if old is not None:
+            self._root = _delete(self._root, old)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._keys
+
+    def rank(self, node_id: str) -> Optional[int]:
+        """1-based rank by hashrate (1 = highest), None if not indexed"""
+        key = self._keys.get(node_id)
+        if key is None:
+            return None
+        t, rank = self._root, 0
+        while t is not None:
+            if key < t.key:
+                t = t.left
+            elif key == t.key:
+                return rank + _size(t.left) + 1
+            else:
+                rank += _size(t.left) + 1
+                t = t.right
+        return None
+
+    def at(self, rank: int) -> Optional[Tuple[str, float]]:
+        """``(node_id, hashrate)`` at a 1-based rank"""
+        if rank < 1 or rank > len(self):
+            return None
+        t = self._root
+        while t is not None:
+            left = _size(t.left)
+            if rank <= left:
+                t = t.left
+            elif rank == left + 1:
+                return t.key[1], -t.key[0]
+            else:
+                rank -= left + 1
+                t = t.right
+        return None
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        """The ``k`` highest-hashrate nodes, fastest first"""
+        result: List[Tuple[str, float]] = []
+        stack: List[_Node] = []
+        t = self._root
+        while (stack or t is not None) and len(result) < k:
+            while t is not None:
+                stack.append(t)
+                t = t.left
+            t = stack.pop()
+            result.append((t.key[1], -t.key[0]))
+            t = t.right
+        return result
+
+    def percentile(self, node_id: str) -> Optional[float]:
+        """Share of the other nodes this node outranks, 0-100"""
+        rank = self.rank(node_id)
+        if rank is None:
+            return None
+        n = len(self)
+        return 100.0 if n == 1 else 100.0 * (n - rank) / (n - 1)
+
+    def value_at_percentile(self, p: float) -> Optional[float]:
+        """Hashrate at percentile ``p`` (0 = slowest, 50 = median, 100 = fastest)"""
+        n = len(self)
+        if n == 0:
+            return None
+        p = min(100.0, max(0.0, p))
+        rank = n - int(round(p / 100.0 * (n - 1)))
+        return self.at(rank)[1]
@@ -0,0 +1,86 @@
+"""
+Token-bucket rate limiting for scoreboard submissions
+
+Each key (a node id or a source IP) gets a bucket of ``burst`` tokens that
+refills at ``rate`` tokens per second. Buckets for keys that have gone quiet
+are evicted least-recently-used first, so memory stays bounded no matter how
+many distinct ids a misbehaving client invents.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token for ``key``.
+
+        Returns 0.0 when the request is allowed, otherwise the number of
+        seconds until a token will be available.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                tokens, last = bucket
+                bucket[0] = min(self.burst, tokens + (now - last) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            if self.rate <= 0:
+                return math.inf
+            return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SubmissionLimiter:
+    """Per-source-IP and per-node limits applied to every submission"""
+
+    def __init__(
+        self,
+        node_rate: float = 0.2,
+        node_burst: float = 5,
+        ip_rate: float = 50.0,
+        ip_burst: float = 200,
+    ):
+        self.by_node = TokenBucketLimiter(node_rate, node_burst)
+        self.by_ip = TokenBucketLimiter(ip_rate, ip_burst)
+
+    def check(
+        self,
+        node_id: Optional[str],
+        client_ip: Optional[str],
+        now: Optional[float] = None,
+    ) -> float:
+        """Return 0.0 if allowed, else a Retry-After value in seconds"""
+        if client_ip:
+            wait = self.by_ip.acquire(client_ip, now)
+            if wait:
+                return wait
+        if node_id:
+            return self.by_node.acquire(node_id, now)
+        return 0.0
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(min(seconds, 3600))))
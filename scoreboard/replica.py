@@ -0,0 +1,81 @@
+"""
+Incrementally updated local copy of a remote scoreboard
+
+``ScoreboardReplica`` polls ``GET /scoreboard/changes`` of the scoreboard
+service and applies only the records that changed since its last sync,
+replacing its contents when the service answers with a full document (first
+sync, service restart, or a change log that no longer reaches back far
+enough).
+
+``open_scoreboard`` lets the oracle submitter and the Eliza agent point their
+scoreboard setting at either a JSON file or a service URL.
+"""
+
+import json
+import threading
+import urllib.request
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from .store import ScoreboardStore, open_store
+
+Fetch = Callable[[int, Optional[str]], Dict[str, Any]]
+
+
+class ScoreboardReplica:
+    def __init__(self, url: str, timeout: float = 10.0, fetch: Optional[Fetch] = None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.store = ScoreboardStore()
+        self.epoch: Optional[str] = None
+        self.version = 0
+        self._fetch = fetch or self._http_fetch
+        self._lock = threading.Lock()
+
+    def _http_fetch(self, since: int, epoch: Optional[str]) -> Dict[str, Any]:
+        query: Dict[str, Any] = {"since": since}
+        if epoch is not None:
+            query["epoch"] = epoch
+        url = f"{self.url}/scoreboard/changes?{urlencode(query)}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def apply(self, response: Dict[str, Any]) -> int:
+        """Apply one ``/scoreboard/changes`` response; returns the number of
+        records it carried"""
+        if response["full"]:
+            self.store.replace(response["scoreboard"])
+            applied = len(self.store)
+        else:
+            self.store.upsert_many(response["changes"])
+            applied = len(response["changes"])
+        self.epoch = response["epoch"]
+        self.version = response["version"]
+        return applied
+
+    def refresh(self) -> int:
+        """Fetch and apply the changes since the last sync.
+
+        Raises ``OSError`` (``urllib.error.URLError``) or ``ValueError`` when
+        the service cannot be reached or answers garbage; the replica keeps
+        its previous state in that case.
+        """
+        with self._lock:
+            return self.apply(self._fetch(self.version, self.epoch))
+
+
+_replicas: Dict[str, ScoreboardReplica] = {}
+_replicas_lock = threading.Lock()
+
+
+def open_scoreboard(location: str) -> ScoreboardStore:
+    """Store for a scoreboard file (see ``open_store``) or, for an http(s)
+    URL, a shared replica of that service brought up to date"""
+    if not location.startswith(("http://", "https://")):
+        return open_store(location)
+    with _replicas_lock:
+        replica = _replicas.get(location)
+        if replica is None:
+            replica = _replicas[location] = ScoreboardReplica(location)
+    replica.refresh()
+    return replica.store
@@ -0,0 +1,218 @@
+"""
+On-device rig agent keeping rolling per-session aggregates
+
+``miner_meshnet.sh`` used to append every per-minute sample of
+``log_hash_count`` to ``/sdcard/MESHNET/scoreboard.json``. It now pipes the
+samples into this agent instead, which folds them into one open aggregate per
+rig and only writes compacted sessions to flash:
+
+    {"rig_id": "rig-1", "start": 1700000000, "end": 1700003540,
+     "interval": 60, "samples": 60, "total_hashes": 252000,
+     "min_rate": 70.0, "max_rate": 80.0}
+
+A session is closed and appended to the session log once it spans ``window``
+seconds, or when the rig was silent for longer than ``max_gap`` (the phone
+slept or mining stopped). ``python -m scoreboard.sync --sessions`` uploads
+the session log as ``{node_id, hashrate, timestamp}`` reports with the
+session's mean rate.
+
+The open aggregates live in memory and are checkpointed to ``<log>.open``
+every ``checkpoint_interval`` seconds of sample time, after each closed
+session and on exit, so a crash loses at most one checkpoint interval.
+
+    ... | python -m scoreboard.rig_agent /sdcard/MESHNET/sessions.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+from typing import Any, Dict, Optional
+
+from .tail import TERMUX_LOG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class RigAgent:
+    def __init__(
+        self,
+        sessions_path: str,
+        interval: float = TERMUX_LOG_INTERVAL,
+        window: float = 3600,
+        max_gap: Optional[float] = None,
+        checkpoint_interval: Optional[float] = None,
+    ):
+        self.sessions_path = sessions_path
+        self.state_path = sessions_path + ".open"
+        self.interval = interval
+        self.window = window
+        # A missed sample or two does not end a session
+        self.max_gap = max_gap if max_gap is not None else 3 * interval
+        self.checkpoint_interval = (
+            checkpoint_interval if checkpoint_interval is not None else window
+        )
+        self.open: Dict[str, Dict[str, Any]] = self._load_state()
+        self._dirty = False
+        self._checkpointed_at: Optional[float] = None
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable agent state {self.state_path}: {e}")
+            return {}
+
+    def add(self, line: Any) -> bool:
+        """Fold one ``{timestamp, rig_id, hash_count}`` sample into its
+        rig's session; returns False for samples that are not usable"""
+        if not isinstance(line, dict):
+            return False
+        rig_id = line.get("rig_id")
+        hashes = line.get("hash_count")
+        timestamp = line.get("timestamp")
+        if (
+            not isinstance(rig_id, str)
+            or type(hashes) not in (int, float)
+            or type(timestamp) not in (int, float)
+            or hashes < 0
+        ):
+            return False
+
+        session = self.open.get(rig_id)
+        if session is not None and not (
+            session["end"] < timestamp <= session["end"] + self.max_gap
+        ):
+            # Gap in mining, or the clock went backwards
+            self._close(rig_id)
+            session = None
+        rate = hashes / self.interval
+        if session is None:
+            session = self.open[rig_id] = {
+                "rig_id": rig_id,
+                "start": timestamp,
+                "end": timestamp,
+                "interval": self.interval,
+                "samples": 1,
+                "total_hashes": hashes,
+                "min_rate": rate,
+                "max_rate": rate,
+            }
+        else:
+            session["end"] = timestamp
+            session["samples"] += 1
+            session["total_hashes"] += hashes
+            session["min_rate"] = min(session["min_rate"], rate)
+            session["max_rate"] = max(session["max_rate"], rate)
+        self._dirty = True
+
+        if session["end"] - session["start"] + self.interval >= self.window:
+            self._close(rig_id)
+        if self._checkpointed_at is None:
+            self._checkpointed_at = timestamp
+        elif timestamp - self._checkpointed_at >= self.checkpoint_interval:
+            self.checkpoint()
+            self._checkpointed_at = timestamp
+        return True
+
+    def _close(self, rig_id: str):
+        session = self.open.pop(rig_id)
+        with open(self.sessions_path, "a") as f:
+            f.write(json.dumps(session, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        # Otherwise a restart would resume the session just written
+        self._dirty = True
+        self.checkpoint()
+
+    def close_all(self):
+        """Close every open session, e.g. when mining stops"""
+        for rig_id in list(self.open):
+            self._close(rig_id)
+        self.checkpoint()
+
+    def checkpoint(self):
+        """Persist the open sessions if they changed"""
+        if not self._dirty:
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.open, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+        self._dirty = False
+
+    def backfill(self, path: str) -> int:
+        """Compact a raw per-minute log left by older miner scripts into
+        sessions, then remove it; returns the number of samples folded"""
+        folded = 0
+        try:
+            with open(path, "rb") as f:
+                for raw in f:
+                    try:
+                        folded += self.add(json.loads(raw))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+        except FileNotFoundError:
+            return 0
+        self.checkpoint()
+        os.remove(path)
+        logger.info(f"Compacted {folded} samples from {path}")
+        return folded
+
+
+def session_submission(line: Any) -> Any:
+    """Map a session summary to a ``{node_id, hashrate, timestamp}`` report
+    carrying the session's mean rate"""
+    if not isinstance(line, dict):
+        return line
+    try:
+        hashrate = line["total_hashes"] / (line["samples"] * line["interval"])
+    except (KeyError, TypeError, ZeroDivisionError):
+        hashrate = None
+    submission = {
+        "node_id": line.get("rig_id"),
+        "hashrate": hashrate,
+        "timestamp": line.get("end"),
+    }
+    return {k: v for k, v in submission.items() if v is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate per-minute rig samples read from stdin"
+    )
+    parser.add_argument("sessions", help="e.g. /sdcard/MESHNET/sessions.jsonl")
+    parser.add_argument("--window", type=float, default=3600)
+    parser.add_argument("--interval", type=float, default=TERMUX_LOG_INTERVAL)
+    parser.add_argument("--backfill", default=None, help="raw log to compact first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    agent = RigAgent(args.sessions, interval=args.interval, window=args.window)
+    if args.backfill:
+        agent.backfill(args.backfill)
+    # Termux stops background jobs with SIGTERM; close sessions on the way out
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for raw in sys.stdin:
+            try:
+                sample = json.loads(raw)
+            except json.JSONDecodeError:
+                sample = None
+            if not agent.add(sample):
+                logger.warning(f"Ignoring sample: {raw.strip()[:200]}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Multi-resolution hashrate rollups
+
+Submissions are folded into count/sum/min/max buckets at 1-minute, 1-hour and
+1-day resolution, per node and fleet-wide (node id ``*``). Buckets live in the
+history database and are updated incrementally in the same transaction that
+inserts the raw rows, so they never need recomputing and survive restarts.
+
+Each resolution has its own retention. Range queries use the coarsest
+resolution whose bucket boundaries line up with the requested range and whose
+retention still covers it.
+"""
+
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+FLEET = "*"
+
+# (name, bucket width in seconds, default retention in seconds or None)
+RESOLUTIONS: Tuple[Tuple[str, int, Optional[int]], ...] = (
+    ("1m", 60, 2 * 86400),
+    ("1h", 3600, 90 * 86400),
+    ("1d", 86400, None),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    node_id TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (resolution, node_id, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO rollups (resolution, node_id, bucket, count, sum, min, max)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, node_id, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+class Rollups:
+    def __init__(self, retention: Optional[Dict[str, Optional[int]]] = None):
+        retention = retention or {}
+        self.resolutions = [
+            (name, step, retention.get(name, default))
+            for name, step, default in RESOLUTIONS
+        ]
+
+    def create_schema(self, conn: sqlite3.Connection):
+        conn.executescript(SCHEMA)
+
+    def apply(self, conn: sqlite3.Connection, rows: Iterable[tuple]):
+        """Fold ``(node_id, hashrate, timestamp, ...)`` rows into the buckets.
+
+        Rows are pre-aggregated in memory so each touched bucket costs one
+        upsert per batch. Call inside the transaction inserting the rows.
+        """
+        buckets: Dict[tuple, list] = {}
+        for row in rows:
+            node_id, value, timestamp = row[0], float(row[1]), int(row[2])
+            for _, step, _ in self.resolutions:
+                start = timestamp - timestamp % step
+                for key in ((step, node_id, start), (step, FLEET, start)):
+                    agg = buckets.get(key)
+                    if agg is None:
+                        buckets[key] = [1, value, value, value]
+                    else:
+                        agg[0] += 1
+                        agg[1] += value
+                        if value < agg[2]:
+                            agg[2] = value
+                        if value > agg[3]:
+                            agg[3] = value
+        conn.executemany(UPSERT, [key + tuple(agg) for key, agg in buckets.items()])
+
+    def prune(self, conn: sqlite3.Connection, now: Optional[float] = None) -> int:
+        """Drop buckets that fell out of their resolution's retention"""
+        now = time.time() if now is None else now
+        removed = 0
+        for _, step, retention in self.resolutions:
+            if retention is None:
+                continue
+            cur = conn.execute(
+                "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                (step, now - retention),
+            )
+            removed += cur.rowcount
+        return removed
+
+    def choose_resolution(
+        self,
+        start: Optional[float],
+        end: Optional[float],
+        now: Optional[float] = None,
+    ) -> Tuple[str, int]:
+        """Coarsest resolution aligned with ``[start, end)`` and retained for
+        all of it; falls back to the finest resolution still retained"""
+        now = time.time() if now is None else now
+
+        def retained(retention):
+            if retention is None:
+                return True
+            return start is not None and start >= now - retention
+
+        def aligned(step):
+            return all(t is None or t % step == 0 for t in (start, end))
+
+        for name, step, retention in reversed(self.resolutions):
+            if aligned(step) and retained(retention):
+                return name, step
+        for name, step, retention in self.resolutions:
+            if retained(retention):
+                return name, step
+        name, step, _ = self.resolutions[-1]
+        return name, step
+
+    def query(
+        self,
+        conn: sqlite3.Connection,
+        node_id: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        resolution: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Buckets for one node (or the fleet) starting in ``[start, end)``"""
+        if resolution is None:
+            resolution, step = self.choose_resolution(start, end)
+        else:
+            steps = {name: step for name, step, _ in self.resolutions}
+            if resolution not in steps:
+                raise ValueError(f"Unknown resolution: {resolution}")
+            step = steps[resolution]
+
+        sql = (
+            "SELECT bucket, count, sum, min, max FROM rollups "
+            "WHERE resolution = ? AND node_id = ?"
+        )
+        params: List[Any] = [step, node_id or FLEET]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(end)
+        sql += " ORDER BY bucket"
+
+        buckets = [
+            {
+                "start": bucket,
+                "count": count,
+                "sum": total,
+                "min": low,
+                "max": high,
+                "avg": total / count,
+            }
+            for bucket, count, total, low, high in conn.execute(sql, params)
+        ]
+        return {
+            "node_id": node_id,
+            "resolution": resolution,
+            "step": step,
+            "buckets": buckets,
+        }
@@ -0,0 +1,133 @@
+"""
+Precompiled validation and coercion of scoreboard records
+
+A schema is a sequence of ``(field, converter)`` pairs compiled once into a
+single validator function. Each converter checks one field and returns its
+coerced value (``hashrate``/``timestamp`` become ints, hex node ids are
+lower-cased without a ``0x`` prefix), testing the exact type first so the
+common well-formed record costs one dict copy and a few type checks.
+
+The validator returns ``(record, None)`` with a coerced copy of the input, or
+``(None, error)``; the input is never modified.
+"""
+
+import math
+import re
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+Converter = Callable[[Any], Any]
+Validator = Callable[[Any], Tuple[Optional[Dict[str, Any]], Optional[str]]]
+
+# Limits of the submission schema
+MAX_HASHRATE = 10**15
+MAX_TIMESTAMP = 2**32 - 1
+MAX_NODE_ID_LENGTH = 128
+NODE_ID_FORMATS = ("token", "hex")
+
+
+class _Invalid(Exception):
+    pass
+
+
+def integer(field: str, minimum: int, maximum: int) -> Converter:
+    """Accept ints, finite floats (truncated) and numeric strings"""
+    range_error = f"{field} must be between {minimum} and {maximum}"
+    type_error = f"{field} must be a number"
+
+    def convert(value):
+        kind = type(value)
+        if kind is not int:
+            if kind is str:
+                try:
+                    value = int(value)
+                except ValueError:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        raise _Invalid(type_error) from None
+                    kind = float
+            elif kind is not float:
+                # bool is a subclass of int, but never a valid count
+                raise _Invalid(type_error)
+            if kind is float:
+                if not math.isfinite(value):
+                    raise _Invalid(type_error)
+                value = int(value)
+        if value < minimum or value > maximum:
+            raise _Invalid(range_error)
+        return value
+
+    return convert
+
+
+def hex_id(field: str, max_length: int = MAX_NODE_ID_LENGTH) -> Converter:
+    """Hex strings, optionally ``0x``-prefixed, normalised to lower case"""
+    digits = frozenset("0123456789abcdef")
+    error = f"{field} must be a hex string of at most {max_length} digits"
+
+    def convert(value):
+        if type(value) is not str:
+            raise _Invalid(error)
+        if value[:2] in ("0x", "0X"):
+            value = value[2:]
+        value = value.lower()
+        if not value or len(value) > max_length or not digits.issuperset(value):
+            raise _Invalid(error)
+        return value
+
+    return convert
+
+
+def token_id(field: str, max_length: int = MAX_NODE_ID_LENGTH) -> Converter:
+    """Printable identifiers such as user-chosen rig ids"""
+    match = re.compile(rf"[A-Za-z0-9_.:@-]{{1,{max_length}}}\Z").match
+    error = (
+        f"{field} must be 1-{max_length} characters of letters, digits "
+        f"and _ . : @ -"
+    )
+
+    def convert(value):
+        if type(value) is not str or match(value) is None:
+            raise _Invalid(error)
+        return value
+
+    return convert
+
+
+def compile_schema(fields: Sequence[Tuple[str, Converter]]) -> Validator:
+    """Build one validator function for the given field converters"""
+    converters = tuple(fields)
+    names = tuple(name for name, _ in converters)
+
+    def validate(data):
+        if type(data) is not dict:
+            return None, "Record must be a JSON object"
+        record = data.copy()
+        try:
+            for name, convert in converters:
+                record[name] = convert(data[name])
+        except KeyError:
+            missing = [name for name in names if name not in data]
+            return None, f"Missing fields: {', '.join(missing)}"
+        except _Invalid as e:
+            return None, str(e)
+        return record, None
+
+    return validate
+
+
+def submission_schema(node_id_format: str = "token") -> Validator:
+    """Validator for ``{node_id, hashrate, timestamp}`` reports"""
+    if node_id_format not in NODE_ID_FORMATS:
+        raise ValueError(f"Unknown node id format: {node_id_format}")
+    node_id = hex_id if node_id_format == "hex" else token_id
+    return compile_schema(
+        (
+            ("node_id", node_id("node_id")),
+            ("hashrate", integer("hashrate", 0, MAX_HASHRATE)),
+            ("timestamp", integer("timestamp", 0, MAX_TIMESTAMP)),
+        )
+    )
+
+
+validate_submission = submission_schema()
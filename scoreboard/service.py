@@ -0,0 +1,344 @@
+"""
+Scoreboard service core
+
+Ties the in-memory store, the write-ahead log, the log compactor, the
+optional SQLite history and the optional git publisher together. Web front
+ends only validate requests and call ``submit``.
+
+With ``shards > 1`` every shard (see ``shards.py``) has its own log and
+compactor; a batch touching several shards appends to them concurrently.
+
+Batches keep only the newest report per node in the live store, but every
+report reaches the history. With a ``dedup`` filter (which needs the history
+to confirm against), reports whose ``(node_id, timestamp)`` the history
+already holds are dropped on every ingest path without touching the log, the
+history or the publisher; ``submit_batch`` answers them as ``duplicate``
+(see ``dedup.py``). A report's key is checked and claimed in one step, so of
+two identical reports arriving together only one gets through. The filter is
+seeded at startup with the history of the last ``dedup_horizon`` seconds;
+older reports are confirmed against the history directly.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import shards as sharding
+from .dedup import Deduplicator, ScalableBloomFilter
+from .history import HistoryStore
+from .publisher import WriteBehindPublisher
+from .schema import Validator, validate_submission
+from .store import SCORE_FIELDS, ScoreboardStore, read_document
+from .wal import LogCompactor, WriteAheadLog
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreboardService:
+    def __init__(
+        self,
+        data_dir: str,
+        store: Optional[ScoreboardStore] = None,
+        publisher: Optional[WriteBehindPublisher] = None,
+        history: Optional[HistoryStore] = None,
+        snapshot_file: str = "meshnet_scoreboard.json",
+        compact_interval: float = 300.0,
+        sync_delay: float = 0.002,
+        binary_snapshot: bool = True,
+        shards: int = 1,
+        validator: Optional[Validator] = None,
+        dedup: Optional[ScalableBloomFilter] = None,
+        dedup_horizon: Optional[float] = 7 * 86400,
+    ):
+        os.makedirs(data_dir, exist_ok=True)
+        sharding.prepare(data_dir, shards, snapshot_file)
+        self.data_dir = data_dir
+        self.snapshot_file = snapshot_file
+        self.store = store if store is not None else ScoreboardStore(ranked=True)
+        self.publisher = publisher
+        self.history = history
+        # Checks and coerces incoming reports (see schema.py)
+        self.validate = validator or validate_submission
+        self.dedup: Optional[Deduplicator] = None
+        if dedup is not None:
+            if history is None:
+                raise ValueError("dedup needs a history store to confirm against")
+            self.dedup = Deduplicator(history.contains, dedup)
+        self.dedup_horizon = dedup_horizon
+        self.shards = shards
+        self.wals: List[WriteAheadLog] = []
+        self.compactors: List[LogCompactor] = []
+        paths = sharding.shard_paths(data_dir, shards, snapshot_file)
+        for index, (wal_path, snapshot_path) in enumerate(paths):
+            wal = WriteAheadLog(wal_path, sync_delay=sync_delay)
+            self.wals.append(wal)
+            self.compactors.append(
+                LogCompactor(
+                    self.store,
+                    wal,
+                    snapshot_path,
+                    interval=compact_interval,
+                    binary=binary_snapshot,
+                    select=sharding.selector(index, shards),
+                )
+            )
+        # The only log and compactor unless sharded
+        self.wal = self.wals[0]
+        self.compactor = self.compactors[0]
+        self._appenders: Optional[ThreadPoolExecutor] = None
+        if shards > 1:
+            self._appenders = ThreadPoolExecutor(
+                max_workers=shards, thread_name_prefix="scoreboard-shard"
+            )
+
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """Recover state from snapshot + log, then start background work"""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            seed_path = None
+            if self.publisher is not None:
+                self.publisher.open_working_copy()
+                seed_path = self.publisher.scoreboard_path
+            self._recover(seed_path)
+            if self.dedup is not None:
+                self._seed_dedup()
+            for compactor in self.compactors:
+                compactor.start()
+            if self.history is not None:
+                self.history.start()
+            if self.publisher is not None:
+                self.publisher.start()
+            self._started = True
+
+    def stop(self):
+        with self._lock:
+            if not self._started:
+                return
+            if self.publisher is not None:
+                self.publisher.stop()
+            if self.history is not None:
+                self.history.stop()
+            for compactor in self.compactors:
+                compactor.stop()
+            for wal in self.wals:
+                wal.close()
+            if self._appenders is not None:
+                self._appenders.shutdown()
+            self._started = False
+
+    def _recover(self, seed_path: Optional[str]):
+        if self.shards == 1:
+            self.compactor.recover(self._apply, seed_path=seed_path)
+            return
+        document = sharding.read_snapshots(
+            self.data_dir, self.shards, self.snapshot_file
+        )
+        if document is not None:
+            self.store.replace(document)
+        elif seed_path and os.path.exists(seed_path):
+            self.store.replace(read_document(seed_path))
+        replayed = sum(wal.replay(self._apply) for wal in self.wals)
+        logger.info(
+            f"Recovered scoreboard: {len(self.store)} nodes in {self.shards} "
+            f"shards, {replayed} records replayed from the logs"
+        )
+
+    def _wal_for(self, node_id: str) -> WriteAheadLog:
+        return self.wals[sharding.shard_of(node_id, self.shards)]
+
+    def _append_many(
+        self,
+        records: List[Dict[str, Any]],
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Append records to their shards' logs, one fsync per shard, with
+        the shards written concurrently; returns the accepted records"""
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for record in records:
+            shard = sharding.shard_of(record["node_id"], self.shards)
+            groups.setdefault(shard, []).append(record)
+        if len(groups) <= 1:
+            wal = self.wals[next(iter(groups), 0)]
+            return wal.append_many(records, apply=self._apply, accept=accept)
+        futures = [
+            self._appenders.submit(
+                self.wals[shard].append_many, group, self._apply, accept
+            )
+            for shard, group in groups.items()
+        ]
+        accepted = {id(r) for future in futures for r in future.result()}
+        return [r for r in records if id(r) in accepted]
+
+    def _seed_dedup(self):
+        since = None
+        if self.dedup_horizon is not None:
+            since = time.time() - self.dedup_horizon
+            self.dedup.seeded_since = since
+        for node_id, timestamp in self.history.keys(since):
+            self.dedup.add(node_id, timestamp)
+
+    def _is_duplicate(self, record: Dict[str, Any], seen: Set[Tuple[str, Any]]) -> bool:
+        """Whether ``record`` repeats one in ``seen`` (this call's records)
+        or, with dedup, one received before; adds it to ``seen`` if not,
+        claimed until ``_release(seen)``"""
+        key = (record["node_id"], record["timestamp"])
+        if key in seen or (self.dedup is not None and self.dedup.check_and_add(*key)):
+            return True
+        seen.add(key)
+        return False
+
+    def _release(self, seen: Set[Tuple[str, Any]]):
+        """Drop a call's dedup claims once its records reached the history
+        (or failed to)"""
+        if self.dedup is not None and seen:
+            self.dedup.release(seen)
+
+    def _apply(self, record: Dict[str, Any]):
+        self.store.upsert(record, SCORE_FIELDS)
+
+    def _committed(
+        self,
+        records: List[Dict[str, Any]],
+        samples: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Fan durable records out to the publisher, and every accepted
+        sample (``records`` unless given) out to history"""
+        if samples is None:
+            samples = records
+        if self.history is not None:
+            self.history.record(samples)
+        if self.publisher is not None:
+            for record in records:
+                self.publisher.mark_dirty(record["node_id"])
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Apply a validated record; returns once it is durable in the log,
+        False if it was a duplicate and dropped"""
+        seen: Set[Tuple[str, Any]] = set()
+        if self._is_duplicate(record, seen):
+            return False
+        try:
+            self._wal_for(record["node_id"]).append(record, apply=self._apply)
+            self._committed([record])
+        finally:
+            self._release(seen)
+        return True
+
+    def submit_many(
+        self,
+        records: List[Dict[str, Any]],
+        superseded: Sequence[Dict[str, Any]] = (),
+    ) -> List[Dict[str, Any]]:
+        """Apply validated records in order, sharing one fsync per shard;
+        returns the records that were not duplicates. ``superseded`` reports,
+        replaced by a newer one for their node before reaching the log, are
+        only recorded in history."""
+        seen: Set[Tuple[str, Any]] = set()
+        try:
+            records = [r for r in records if not self._is_duplicate(r, seen)]
+            samples = records + [
+                r for r in superseded if not self._is_duplicate(r, seen)
+            ]
+            if records:
+                self._append_many(records)
+            if samples:
+                self._committed(records, samples)
+        finally:
+            self._release(seen)
+        return records
+
+    def _is_newer(self, record: Dict[str, Any]) -> bool:
+        existing = self.store.get(record["node_id"])
+        if existing is None:
+            return True
+        current = existing.get("timestamp")
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            return True
+        return record["timestamp"] >= current
+
+    def submit_batch(
+        self, records: List[Any], errors: Optional[Dict[int, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Validate many reports, record every one in history and apply them
+        to the live scoreboard with last-writer-wins by timestamp.
+
+        Returns one result per input record, in order, with a status of
+        ``applied``, ``stale`` (older than what the scoreboard holds),
+        ``superseded`` (a newer report for the node is in the same batch),
+        ``duplicate`` (already received, here or earlier in the batch) or
+        ``invalid``. Stale and superseded reports are still recorded in
+        history: an offline rig uploading its backlog sends mostly those.
+        """
+        errors = errors or {}
+        results: List[Dict[str, Any]] = [{} for _ in records]
+        seen: Set[Tuple[str, Any]] = set()
+        try:
+            self._submit_batch(records, errors, results, seen)
+        finally:
+            self._release(seen)
+        return results
+
+    def _submit_batch(
+        self,
+        records: List[Any],
+        errors: Dict[int, str],
+        results: List[Dict[str, Any]],
+        seen: Set[Tuple[str, Any]],
+    ):
+        valid: Dict[int, Dict[str, Any]] = {}
+        latest: Dict[str, int] = {}
+        validate = self.validate
+        for i, data in enumerate(records):
+            record, error = (None, errors[i]) if i in errors else validate(data)
+            if error:
+                results[i] = {"index": i, "status": "invalid", "error": error}
+                continue
+            node_id = record["node_id"]
+            if self._is_duplicate(record, seen):
+                results[i] = {"index": i, "node_id": node_id, "status": "duplicate"}
+                continue
+            valid[i] = record
+            prev = latest.get(node_id)
+            if prev is not None and record["timestamp"] < valid[prev]["timestamp"]:
+                results[i] = {"index": i, "node_id": node_id, "status": "superseded"}
+                continue
+            if prev is not None:
+                results[prev] = {
+                    "index": prev,
+                    "node_id": node_id,
+                    "status": "superseded",
+                }
+            latest[node_id] = i
+
+        candidates = [valid[i] for i in latest.values()]
+        accepted = self._append_many(candidates, accept=self._is_newer)
+        accepted_ids = {id(r) for r in accepted}
+        for node_id, i in latest.items():
+            status = "applied" if id(valid[i]) in accepted_ids else "stale"
+            results[i] = {"index": i, "node_id": node_id, "status": status}
+
+        self._committed(accepted, list(valid.values()))
+
+    def backlog(self) -> int:
+        """Accepted records not yet durable in the log or written to the
+        history; grows when the disk falls behind the submissions"""
+        backlog = sum(wal.backlog() for wal in self.wals)
+        if self.history is not None:
+            backlog += self.history.backlog()
+        return backlog
+
+    def metrics(self) -> Dict[str, Any]:
+        """Operational counters for monitoring"""
+        metrics: Dict[str, Any] = {"nodes": len(self.store), "backlog": self.backlog()}
+        if self.dedup is not None:
+            metrics["dedup"] = self.dedup.metrics()
+        return metrics
@@ -0,0 +1,231 @@
+"""
+Scoreboard shards partitioned by node id
+
+With ``shards > 1`` the service splits its durable state by a stable hash of
+the node id: every shard has its own directory (``shard-000`` ...) holding its
+own write-ahead log and snapshot, and its own log lock and group-commit fsync,
+so submissions for different shards are written in parallel. The in-memory
+store stays whole, so reads, ranking and the published scoreboard see every
+shard without further merging.
+
+The shard count is recorded in ``shards.json`` in the data directory; an
+unsharded directory (the layout used before sharding) has no manifest and
+counts as one shard. Change the count offline, with the service stopped:
+
+    python -m scoreboard.shards reshard ~/.meshnet 8
+    python -m scoreboard.shards export ~/.meshnet meshnet_scoreboard.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import zlib
+from typing import Any, Callable, List, Optional, Tuple
+
+from .binary import binary_path_for
+from .store import SCORE_FIELDS, ScoreboardStore, read_document, resolve_snapshot
+from .wal import WriteAheadLog
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "shards.json"
+WAL_FILE = "scoreboard.wal"
+
+
+def shard_of(node_id: Optional[str], count: int) -> int:
+    """Shard holding ``node_id``; records without an id live in shard 0"""
+    if count <= 1 or node_id is None:
+        return 0
+    return zlib.crc32(node_id.encode("utf-8")) % count
+
+
+def selector(index: int, count: int) -> Optional[Callable[[Optional[str]], bool]]:
+    """``ScoreboardStore.snapshot`` filter for one shard"""
+    if count <= 1:
+        return None
+    return lambda node_id: shard_of(node_id, count) == index
+
+
+def shard_paths(data_dir: str, count: int, snapshot_file: str) -> List[Tuple[str, str]]:
+    """``(log path, snapshot path)`` of every shard"""
+    if count <= 1:
+        return [
+            (os.path.join(data_dir, WAL_FILE), os.path.join(data_dir, snapshot_file))
+        ]
+    dirs = [os.path.join(data_dir, f"shard-{i:03d}") for i in range(count)]
+    return [(os.path.join(d, WAL_FILE), os.path.join(d, snapshot_file)) for d in dirs]
+
+
+def stored_count(data_dir: str) -> int:
+    """Shard count the data directory was written with"""
+    try:
+        with open(os.path.join(data_dir, MANIFEST)) as f:
+            return int(json.load(f)["shards"])
+    except FileNotFoundError:
+        return 1
+
+
+def prepare(data_dir: str, count: int, snapshot_file: str):
+    """Create the shard directories, or raise ValueError when the data
+    directory was written with a different shard count"""
+    stored = stored_count(data_dir)
+    if stored == 1 and count > 1:
+        # A fresh directory can start sharded; an unsharded one with data can't
+        wal_path, snapshot_path = shard_paths(data_dir, 1, snapshot_file)[0]
+        if not _shard_files(wal_path, snapshot_path):
+            stored = count
+    if stored != count:
+        raise ValueError(
+            f"{data_dir} holds {stored} scoreboard shard(s), not {count}; "
+            f"run: python -m scoreboard.shards reshard {data_dir} {count}"
+        )
+    for wal_path, _ in shard_paths(data_dir, count, snapshot_file):
+        os.makedirs(os.path.dirname(wal_path), exist_ok=True)
+    if count > 1:
+        _write_manifest(data_dir, count)
+
+
+def _write_manifest(data_dir: str, count: int):
+    path = os.path.join(data_dir, MANIFEST)
+    if count <= 1:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path + ".tmp", "w") as f:
+        json.dump({"shards": count}, f)
+    os.replace(path + ".tmp", path)
+
+
+def merge_documents(documents: List[Any]):
+    """Concatenate shard snapshots into one scoreboard document"""
+    if not documents:
+        return []
+    if any(isinstance(d, dict) for d in documents):
+        merged = {}
+        rigs: List[Any] = []
+        for document in documents:
+            if isinstance(document, dict):
+                merged.update({k: v for k, v in document.items() if k != "rigs"})
+                rigs.extend(document.get("rigs", []))
+            else:
+                rigs.extend(document)
+        merged["rigs"] = rigs
+        return merged
+    return [record for document in documents for record in document]
+
+
+def read_snapshots(data_dir: str, count: int, snapshot_file: str) -> Optional[Any]:
+    """Merged shard snapshots, or None when no shard has one yet"""
+    documents = [
+        read_document(snapshot_path)
+        for _, snapshot_path in shard_paths(data_dir, count, snapshot_file)
+        if os.path.exists(resolve_snapshot(snapshot_path))
+    ]
+    return merge_documents(documents) if documents else None
+
+
+def load_data_dir(
+    data_dir: str, snapshot_file: str = "meshnet_scoreboard.json"
+) -> ScoreboardStore:
+    """Rebuild the scoreboard from every shard's snapshot and log"""
+    count = stored_count(data_dir)
+    store = ScoreboardStore()
+    document = read_snapshots(data_dir, count, snapshot_file)
+    if document is not None:
+        store.replace(document)
+    for wal_path, _ in shard_paths(data_dir, count, snapshot_file):
+        if not os.path.exists(wal_path):
+            continue
+        wal = WriteAheadLog(wal_path)
+        try:
+            wal.replay(lambda record: store.upsert(record, SCORE_FIELDS))
+        finally:
+            wal.close()
+    return store
+
+
+def reshard(
+    data_dir: str,
+    count: int,
+    snapshot_file: str = "meshnet_scoreboard.json",
+    binary: bool = True,
+):
+    """Rewrite the data directory with ``count`` shards. Offline only: the
+    service must not be running."""
+    if count < 1:
+        raise ValueError("The shard count must be at least 1")
+    old_count = stored_count(data_dir)
+    store = load_data_dir(data_dir, snapshot_file)
+
+    staging = os.path.join(data_dir, ".reshard-new")
+    backup = os.path.join(data_dir, ".reshard-old")
+    for path in (staging, backup):
+        shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(staging)
+    for index, (_, snapshot_path) in enumerate(
+        shard_paths(staging, count, snapshot_file)
+    ):
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        store.save(
+            snapshot_path,
+            indent=None,
+            binary=binary,
+            select=selector(index, count),
+        )
+
+    # Move the old files aside before moving the new ones in; if this is
+    # interrupted, the previous state is left in .reshard-old
+    os.makedirs(backup)
+    if old_count > 1:
+        for wal_path, _ in shard_paths(data_dir, old_count, snapshot_file):
+            shard_dir = os.path.dirname(wal_path)
+            if os.path.isdir(shard_dir):
+                os.replace(shard_dir, os.path.join(backup, os.path.basename(shard_dir)))
+    else:
+        for path in _shard_files(*shard_paths(data_dir, 1, snapshot_file)[0]):
+            os.replace(path, os.path.join(backup, os.path.basename(path)))
+    for name in os.listdir(staging):
+        os.replace(os.path.join(staging, name), os.path.join(data_dir, name))
+    _write_manifest(data_dir, count)
+    shutil.rmtree(staging)
+    shutil.rmtree(backup)
+    logger.info(f"Resharded {len(store)} nodes from {old_count} to {count} shards")
+
+
+def _shard_files(wal_path: str, snapshot_path: str) -> List[str]:
+    """Snapshots and non-empty log segments of one shard"""
+    paths = [
+        p for p in (snapshot_path, binary_path_for(snapshot_path)) if os.path.exists(p)
+    ]
+    directory, wal_name = os.path.split(wal_path)
+    if os.path.isdir(directory):
+        paths += [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name == wal_name or name.startswith(wal_name + ".")
+        ]
+    return [p for p in paths if p != wal_path or os.path.getsize(p) > 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoreboard shard tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    resharding = sub.add_parser("reshard", help="change the shard count")
+    resharding.add_argument("data_dir")
+    resharding.add_argument("shards", type=int)
+    export = sub.add_parser("export", help="write one merged scoreboard file")
+    export.add_argument("data_dir")
+    export.add_argument("output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "reshard":
+        reshard(args.data_dir, args.shards)
+    elif args.command == "export":
+        load_data_dir(args.data_dir).save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Parallel proof signing with a preloaded oracle key
+
+``w3.eth.account.sign_message(..., private_key=hex)`` parses the key and
+derives its public key (an elliptic-curve multiplication as costly as the
+signature itself) on every call, then signs on one core. ``SigningService``
+parses the key once per process and signs batches of ``(rig_id, hashes)``
+proof messages across a process pool, returning the signatures in input
+order. Small batches are signed in-process, where the pool's
+pickling round trip would cost more than it saves.
+
+Signatures are byte-for-byte those of ``sign_message(encode_defunct(text=
+proof_message(rig_id, hashes)))``: EIP-191 personal messages with ``v`` of
+27 or 28, as ``0x``-prefixed hex.
+
+Needs ``eth_account`` (and the ``eth_keys``/``eth_utils`` it depends on),
+imported only when the service is created.
+"""
+
+import multiprocessing
+import os
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+# Messages per pool task: large enough to amortise pickling, small enough to
+# spread a batch over every worker
+CHUNK_SIZE = 512
+
+# Worker state, set once per process by _init_worker
+_key: Any = None
+
+
+def proof_message(rig_id: str, hashes: int) -> str:
+    """The text the oracle signs for one rig's proof"""
+    return f"rigId:{rig_id},hashes:{hashes}"
+
+
+def _load_key(private_key: str):
+    from eth_keys import keys
+
+    if private_key.startswith("0x"):
+        private_key = private_key[2:]
+    return keys.PrivateKey(bytes.fromhex(private_key))
+
+
+def _sign(key, rig_id: str, hashes: int) -> str:
+    from eth_utils import keccak
+
+    # encode_defunct(text=...) followed by the EIP-191 hash
+    body = proof_message(rig_id, hashes).encode("utf-8")
+    digest = keccak(
+        b"\x19Ethereum Signed Message:\n" + str(len(body)).encode("ascii") + body
+    )
+    v, r, s = key.sign_msg_hash(digest).vrs
+    return (
+        "0x" + (r.to_bytes(32, "big") + s.to_bytes(32, "big") + bytes((v + 27,))).hex()
+    )
+
+
+def _init_worker(private_key: str):
+    global _key
+    _key = _load_key(private_key)
+
+
+def _sign_chunk(messages: Sequence[Tuple[str, int]]) -> List[str]:
+    key = _key
+    return [_sign(key, rig_id, hashes) for rig_id, hashes in messages]
+
+
+class SigningService:
+    def __init__(
+        self,
+        private_key: str,
+        processes: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self._key = _load_key(private_key)
+        self.address = self._key.public_key.to_checksum_address()
+        self._private_key = private_key
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def sign_one(self, rig_id: str, hashes: int) -> str:
+        return _sign(self._key, rig_id, hashes)
+
+    def sign(self, messages: Iterable[Tuple[str, int]]) -> List[str]:
+        """Signatures for ``(rig_id, hashes)`` messages, in order"""
+        messages = list(messages)
+        size = self.chunk_size
+        if self.processes <= 1 or len(messages) <= size:
+            return [self.sign_one(rig_id, hashes) for rig_id, hashes in messages]
+        if self._pool is None:
+            # Workers receive the key once, not with every task
+            self._pool = multiprocessing.Pool(
+                self.processes, initializer=_init_worker, initargs=(self._private_key,)
+            )
+        chunks = [messages[i : i + size] for i in range(0, len(messages), size)]
+        signatures: List[str] = []
+        for chunk in self._pool.imap(_sign_chunk, chunks):
+            signatures.extend(chunk)
+        return signatures
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,358 @@
+"""
+Indexed in-memory scoreboard store
+
+Holds scoreboard records in a dict keyed by node id so lookups and upserts are
+O(1) instead of a linear scan of the JSON list. Understands both scoreboard
+layouts used in the repo:
+
+- ``list``: ``[{"node_id", "hashrate", "timestamp"}, ...]`` as written by
+  ``update_scoreboard.py``
+- ``rigs``: ``{"rigs": [{"rig_id", "hash_count", ...}, ...]}`` as read by the
+  oracle submitter and the Eliza agent
+
+``to_document()`` reproduces the document the store was loaded from, so
+callers that used ``json.load`` get the same data back.
+
+With ``ranked=True`` the store also maintains an order-statistics index over
+the score field (see ``ranking.py``) for top-K, rank and percentile queries.
+
+Every upsert bumps ``version`` and is recorded in a bounded change log, so
+``changes_since(version)`` can hand replicas just the records that changed
+(see ``replica.py``). ``epoch`` identifies one store instance; versions are
+only comparable within an epoch.
+
+``save(path, binary=True)`` also writes the compact binary snapshot (see
+``binary.py``) next to the JSON file, and ``load``/``open_store`` prefer it
+whenever it is at least as new as the JSON.
+"""
+
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .binary import (
+    binary_path_for,
+    is_binary_snapshot,
+    read_snapshot,
+    write_snapshot,
+)
+from .ranking import RankIndex
+
+LAYOUT_KEYS = {"list": "node_id", "rigs": "rig_id"}
+# Field each layout ranks nodes by
+SCORE_KEYS = {"list": "hashrate", "rigs": "hash_count"}
+
+# Fields a /submit copies onto an existing scoreboard entry
+SCORE_FIELDS = ("hashrate", "timestamp")
+
+
+class ScoreboardStore:
+    def __init__(
+        self, layout: str = "list", ranked: bool = False, change_log: int = 100000
+    ):
+        if layout not in LAYOUT_KEYS:
+            raise ValueError(f"Unknown scoreboard layout: {layout}")
+        self.layout = layout
+        self.key = LAYOUT_KEYS[layout]
+        # Insertion ordered, so iteration matches the order of the JSON list.
+        # Records without a usable key (or duplicates of an earlier key) are
+        # kept under private tuple keys to round-trip the document unchanged.
+        self._records: Dict[Any, Dict[str, Any]] = {}
+        self._extra: Dict[str, Any] = {}
+        self._unindexed = 0
+        # Bumped by every change; lets caches tell whether they are stale
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:16]
+        # (version, node id) per upsert; covers the versions above _log_floor
+        self.change_log_size = max(1, change_log)
+        self._changes: "deque[tuple]" = deque()
+        self._log_floor = 0
+        self.ranking: Optional[RankIndex] = RankIndex() if ranked else None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Loading and serialisation
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_document(cls, document) -> "ScoreboardStore":
+        """Build a store from a parsed scoreboard document of either layout"""
+        store = cls()
+        store.replace(document)
+        return store
+
+    def replace(self, document):
+        """Swap the store contents for a parsed scoreboard document"""
+        with self._lock:
+            if isinstance(document, dict):
+                self.layout = "rigs"
+                self._extra = {k: v for k, v in document.items() if k != "rigs"}
+                records = document.get("rigs", [])
+            else:
+                self.layout = "list"
+                self._extra = {}
+                records = document
+            self.key = LAYOUT_KEYS[self.layout]
+            self._records = {}
+            self._unindexed = 0
+            for record in records:
+                self._add_loaded(record)
+            if self.ranking is not None:
+                self._build_ranking()
+            self.version += 1
+            self._changes.clear()
+            self._log_floor = self.version
+
+    def enable_ranking(self):
+        """Start maintaining the order-statistics index"""
+        with self._lock:
+            if self.ranking is None:
+                self.ranking = RankIndex()
+                self._build_ranking()
+
+    def _build_ranking(self):
+        field = SCORE_KEYS[self.layout]
+        self.ranking.build(
+            [
+                (node_id, record[field])
+                for node_id, record in self._records.items()
+                if isinstance(node_id, str) and _is_score(record.get(field))
+            ]
+        )
+
+    def _rerank(self, node_id: str, record: Dict[str, Any]):
+        score = record.get(SCORE_KEYS[self.layout])
+        if _is_score(score):
+            self.ranking.update(node_id, score)
+        else:
+            self.ranking.remove(node_id)
+
+    @classmethod
+    def load(cls, path: str) -> "ScoreboardStore":
+        """Parse a scoreboard file; raises like ``json.load`` would"""
+        return cls.from_document(read_document(path))
+
+    def _add_loaded(self, record):
+        node_id = record.get(self.key) if isinstance(record, dict) else None
+        if not isinstance(node_id, str) or node_id in self._records:
+            self._records[(None, self._unindexed)] = record
+            self._unindexed += 1
+        else:
+            self._records[node_id] = record
+
+    def to_document(self):
+        """Return the scoreboard in the layout it was loaded with"""
+        with self._lock:
+            records = list(self._records.values())
+        if self.layout == "rigs":
+            return dict(self._extra, rigs=records)
+        return records
+
+    def snapshot(self, select: Optional[Callable[[Optional[str]], bool]] = None):
+        """Like ``to_document`` but with copied records, safe to serialise
+        while other threads keep upserting.
+
+        ``select`` keeps only the records whose node id it accepts (``None``
+        stands for records without a usable id).
+        """
+        with self._lock:
+            records = [
+                dict(r) if isinstance(r, dict) else r
+                for key, r in self._records.items()
+                if select is None or select(key if isinstance(key, str) else None)
+            ]
+        if self.layout == "rigs":
+            return dict(self._extra, rigs=records)
+        return records
+
+    def save(
+        self,
+        path: str,
+        indent: Optional[int] = 2,
+        binary: bool = False,
+        select: Optional[Callable[[Optional[str]], bool]] = None,
+    ):
+        """Atomically write the store (or the ``select``-ed part of it, see
+        ``snapshot``) as a JSON scoreboard file, plus the binary snapshot
+        next to it when ``binary`` is set"""
+        document = self.snapshot(select)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(document, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if binary:
+            # Written second, so its mtime marks it as fresh for readers
+            write_snapshot(binary_path_for(path), document)
+
+    # ------------------------------------------------------------------
+    # Queries and updates
+    # ------------------------------------------------------------------
+
+    def get(self, node_id: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(node_id)
+
+    def upsert(
+        self, record: Dict[str, Any], fields: Optional[Sequence[str]] = None
+    ) -> bool:
+        """Insert or update a record by its node id.
+
+        ``fields`` restricts which keys of ``record`` are copied onto an
+        existing entry; new entries are always stored whole. Returns True when
+        the node was not on the scoreboard before.
+        """
+        node_id = record[self.key]
+        with self._lock:
+            self.version += 1
+            existing = self._records.get(node_id)
+            if existing is None:
+                # Copy, so later updates never alias the caller's dict
+                existing = self._records[node_id] = dict(record)
+                inserted = True
+            else:
+                if fields is None:
+                    existing.update(record)
+                else:
+                    existing.update({k: record[k] for k in fields if k in record})
+                inserted = False
+            if self.ranking is not None:
+                self._rerank(node_id, existing)
+            if len(self._changes) >= self.change_log_size:
+                self._log_floor = self._changes.popleft()[0]
+            self._changes.append((self.version, node_id))
+            return inserted
+
+    def upsert_many(
+        self,
+        records: Iterable[Dict[str, Any]],
+        fields: Optional[Sequence[str]] = None,
+    ) -> int:
+        """Upsert several records under one lock; returns how many were new"""
+        with self._lock:
+            return sum(self.upsert(r, fields) for r in records)
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        """Records upserted after version ``since``, oldest change first.
+
+        Falls back to the full document (``"full": True``) when the change
+        log no longer reaches back to ``since``, or ``since``/``epoch`` come
+        from another store instance.
+        """
+        with self._lock:
+            response = {"epoch": self.epoch, "version": self.version}
+            if (
+                (epoch is not None and epoch != self.epoch)
+                or since < self._log_floor
+                or since > self.version
+            ):
+                response.update(full=True, scoreboard=self.snapshot())
+                return response
+            changed: Dict[str, None] = {}
+            for version, node_id in reversed(self._changes):
+                if version <= since:
+                    break
+                changed[node_id] = None
+            response.update(
+                full=False,
+                changes=[dict(self._records[n]) for n in reversed(list(changed))],
+            )
+            return response
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._records.values())
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._records
+
+    # ------------------------------------------------------------------
+    # Ranking (requires ranked=True)
+    # ------------------------------------------------------------------
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """Records of the ``k`` highest-scoring nodes, fastest first"""
+        with self._lock:
+            return [
+                dict(self._records[node_id], rank=i)
+                for i, (node_id, _) in enumerate(self.ranking.top(k), start=1)
+            ]
+
+    def standing(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Rank and percentile of one node among all ranked nodes"""
+        with self._lock:
+            rank = self.ranking.rank(node_id)
+            if rank is None:
+                return None
+            score_key = SCORE_KEYS[self.layout]
+            return {
+                self.key: node_id,
+                score_key: self._records[node_id].get(score_key),
+                "rank": rank,
+                "of": len(self.ranking),
+                "percentile": self.ranking.percentile(node_id),
+            }
+
+    def score_at_percentile(self, p: float) -> Optional[float]:
+        """Score at fleet percentile ``p`` (50 = median)"""
+        with self._lock:
+            return self.ranking.value_at_percentile(p)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.records())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+def _is_score(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def resolve_snapshot(path: str) -> str:
+    """The file to read for ``path``: its binary snapshot when that exists and
+    is not older than the JSON (or the JSON is missing), else ``path``"""
+    if is_binary_snapshot(path):
+        return path
+    binary_path = binary_path_for(path)
+    try:
+        binary_mtime = os.stat(binary_path).st_mtime_ns
+    except OSError:
+        return path
+    try:
+        json_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return binary_path
+    return binary_path if binary_mtime >= json_mtime else path
+
+
+def read_document(path: str):
+    """Parse a scoreboard document from JSON or from its binary snapshot"""
+    resolved = resolve_snapshot(path)
+    if resolved != path or is_binary_snapshot(path):
+        return read_snapshot(resolved)
+    with open(path) as f:
+        return json.load(f)
+
+
+_open_stores: Dict[str, tuple] = {}
+_open_lock = threading.Lock()
+
+
+def open_store(path: str) -> ScoreboardStore:
+    """Return a shared store for ``path``, parsing the file only when it has
+    changed since the last call. Raises FileNotFoundError/JSONDecodeError."""
+    path = os.path.abspath(path)
+    resolved = resolve_snapshot(path)
+    st = os.stat(resolved)
+    signature = (resolved, st.st_mtime_ns, st.st_size)
+    with _open_lock:
+        cached = _open_stores.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        store = ScoreboardStore.load(path)
+        _open_stores[path] = (signature, store)
+        return store
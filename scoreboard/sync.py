@@ -0,0 +1,185 @@
+"""
+Offline sync client for Termux rig logs
+
+Replaces the ``sync_data()`` placeholder of ``scripts/termux/miner_meshnet.sh``.
+Unsynced lines of ``/sdcard/MESHNET/scoreboard.json`` are read with
+``JsonlTail`` in chunks, converted to ``{node_id, hashrate, timestamp}``
+reports and POSTed gzipped as NDJSON to ``/submit/batch``; with
+``--sessions`` the session log of ``rig_agent.py`` is uploaded instead. The checkpoint
+only moves past a chunk once the server has answered 200, so after a dropped
+connection or a reboot the next sync resumes from the last acknowledged byte
+offset. An acknowledged-but-unconfirmed chunk may be sent again: the
+service's history records every report, so the replay is only dropped where
+the server deduplicates ``(node_id, timestamp)`` (``SCOREBOARD_DEDUP``, on
+by default), which answers its reports as ``duplicate``.
+
+When everything in the log has been acknowledged the log is cleared. It is
+renamed first and only deleted if nothing was appended in the meantime;
+otherwise the unsent tail is picked up from the renamed file next time.
+
+    python -m scoreboard.sync /sdcard/MESHNET/scoreboard.json http://host:7860
+"""
+
+import argparse
+import functools
+import glob
+import gzip
+import json
+import logging
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from .rig_agent import session_submission
+from .tail import TERMUX_LOG_INTERVAL, JsonlTail, termux_submission
+
+logger = logging.getLogger(__name__)
+
+SEALED_SUFFIX = ".sealed"
+
+
+class SyncError(Exception):
+    """The server could not be reached or refused a chunk"""
+
+
+class SyncClient:
+    def __init__(
+        self,
+        path: str,
+        url: str,
+        checkpoint_path: Optional[str] = None,
+        chunk_bytes: int = 256 * 1024,
+        timeout: float = 30.0,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        interval: float = TERMUX_LOG_INTERVAL,
+        sleep: Callable[[float], None] = time.sleep,
+        convert: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.path = path
+        self.url = url.rstrip("/") + "/submit/batch"
+        self.tail = JsonlTail(path, checkpoint_path, batch_bytes=chunk_bytes)
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        # Maps a log line to a report
+        self.convert = convert or functools.partial(
+            termux_submission, interval=interval
+        )
+        self._sleep = sleep
+
+    def sync(self) -> Counter:
+        """Upload everything not yet acknowledged, then clear the log.
+
+        Raises SyncError when a chunk still fails after ``max_attempts``;
+        the acknowledged chunks stay acknowledged.
+        """
+        counts: Counter = Counter()
+        inodes = {self.tail.checkpoint["inode"]}
+        for batch in self.tail.batches():
+            reports = [self.convert(line) for line in batch.records]
+            if reports:
+                counts.update(self._upload(reports))
+            counts["unparsable"] += batch.errors
+            self.tail.commit(batch.checkpoint)
+            inodes.add(batch.checkpoint["inode"])
+        # Rotated logs the reader has moved past are fully acknowledged
+        inodes.discard(self.tail.checkpoint["inode"])
+        inodes.discard(None)
+        self._release(inodes)
+        return +counts
+
+    def _upload(self, reports) -> Counter:
+        raw = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in reports)
+        body = gzip.compress(raw.encode("utf-8"))
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            method="POST",
+            headers={
+                "Content-Type": "application/x-ndjson",
+                "Content-Encoding": "gzip",
+            },
+        )
+        for attempt in range(1, self.max_attempts + 1):
+            delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    result = json.load(response)
+                return Counter(result.get("counts", {}))
+            except urllib.error.HTTPError as e:
+                if e.code not in (429, 500, 502, 503, 504):
+                    raise SyncError(f"Server rejected chunk: HTTP {e.code}") from None
+                retry_after = e.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                error = f"HTTP {e.code}"
+            except (OSError, ValueError) as e:
+                # Dropped connections, timeouts and truncated responses
+                error = str(e)
+            if attempt < self.max_attempts:
+                logger.warning(f"Upload failed ({error}), retrying in {delay:.1f}s")
+                self._sleep(delay)
+        raise SyncError(f"Upload failed after {self.max_attempts} attempts: {error}")
+
+    def _release(self, finished_inodes):
+        """Delete log files whose every byte has been acknowledged"""
+        checkpoint = self.tail.checkpoint
+        candidates = [self.path] + glob.glob(glob.escape(self.path) + ".*")
+        for path in candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if path != self.path and st.st_ino in finished_inodes:
+                os.remove(path)
+                logger.info(f"Cleared synced log {path}")
+                continue
+            if st.st_ino != checkpoint["inode"] or st.st_size != checkpoint["offset"]:
+                continue
+            if path == self.path:
+                # The miner may append at any moment: move the log aside
+                # first and only delete it if nothing slipped in
+                sealed = self.path + SEALED_SUFFIX
+                os.replace(self.path, sealed)
+                if os.path.getsize(sealed) != checkpoint["offset"]:
+                    return
+                path = sealed
+            os.remove(path)
+            self.tail.commit({"inode": None, "offset": 0, "fingerprint": ""})
+            logger.info(f"Cleared synced log {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload a Termux rig log")
+    parser.add_argument("log", help="e.g. /sdcard/MESHNET/scoreboard.json")
+    parser.add_argument("url", help="scoreboard service, e.g. http://host:7860")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--chunk-kb", type=int, default=256)
+    parser.add_argument(
+        "--sessions", action="store_true", help="the log holds session summaries"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    client = SyncClient(
+        args.log,
+        args.url,
+        args.checkpoint,
+        chunk_bytes=args.chunk_kb * 1024,
+        convert=session_submission if args.sessions else None,
+    )
+    try:
+        counts = client.sync()
+    except SyncError as e:
+        logger.error(f"Sync incomplete, will resume next time: {e}")
+        raise SystemExit(1)
+    logger.info(f"Sync complete: {dict(counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+One columnar view over every scoreboard format
+
+Scoreboard data exists in four shapes:
+
+- ``list``: ``[{"node_id", "hashrate", "timestamp"}, ...]`` written by the
+  scoreboard service (``update_scoreboard.py``);
+- ``rigs``: ``{"rigs": [{"rig_id", "hash_count", "wallet_address", ...}]}``
+  as read by the oracle submitter and the Eliza agent;
+- ``termux``: the JSONL rig log of ``miner_meshnet.sh``, one
+  ``{"timestamp", "rig_id", "hash_count"}`` sample per line;
+- ``sessions``: the JSONL session summaries of ``rig_agent.py``.
+
+``load_table`` detects the format and normalizes the rows into a ``RigTable``
+of parallel ``rig_id``, ``wallet``, ``hash_count``, ``timestamp`` and
+``hashrate`` columns. Consumers read the columns instead of picking keys out
+of dicts. A ``list`` record's hashrate (a rate, not a count of hashes) lands
+in ``hashrate`` with a ``hash_count`` of 0; a session's total hashes and end
+time land in ``hash_count`` and ``timestamp``. A missing hashrate is 0, a
+missing wallet None. Rows without a timestamp (the ``rigs`` layout has none)
+get the time they were read: the file's modification time, or the time the
+table was built for a service URL. A rewritten scoreboard therefore yields
+new rows instead of repeating the old ones. A ``rigs`` row's hash_count is
+the rig's running total, so such tables are marked ``cumulative``: a
+consumer crediting rows across rewrites credits the difference between
+totals, not each total again. Rows without an id, or with neither a
+count nor a hashrate, are skipped and counted in ``skipped``, as are counts
+that do not fit in 64 bits. An empty file is an empty table.
+"""
+
+import json
+import math
+import os
+import time
+import weakref
+from array import array
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from .binary import LAYOUTS, MAGIC
+from .replica import open_scoreboard
+from .store import ScoreboardStore, resolve_snapshot
+
+FORMATS = ("list", "rigs", "termux", "sessions")
+
+# Key aliases per column, in order of preference
+ID_KEYS = ("rig_id", "node_id")
+COUNT_KEYS = ("hash_count", "total_hashes")
+TIME_KEYS = ("timestamp", "end")
+WALLET_KEYS = ("wallet_address", "wallet")
+
+_INT64 = (-(2**63), 2**63 - 1)
+
+
+class RigTable:
+    """Parallel columns, one row per scoreboard entry or log sample"""
+
+    def __init__(self):
+        self.rig_id: List[str] = []
+        self.wallet: List[Optional[str]] = []
+        self.hash_count = array("q")
+        self.timestamp = array("q")
+        self.hashrate = array("d")
+        self.skipped = 0
+        # hash_count is a running total per rig rather than per row
+        self.cumulative = False
+
+    def __len__(self) -> int:
+        return len(self.rig_id)
+
+    def append(
+        self,
+        rig_id: str,
+        wallet: Optional[str],
+        hash_count: int,
+        timestamp: int = 0,
+        hashrate: float = 0.0,
+    ):
+        self.rig_id.append(rig_id)
+        self.wallet.append(wallet)
+        self.hash_count.append(hash_count)
+        self.timestamp.append(timestamp)
+        self.hashrate.append(hashrate)
+
+    def rows(self) -> Iterator[Tuple[str, Optional[str], int, int]]:
+        """``(rig_id, wallet, hash_count, timestamp)`` tuples"""
+        return zip(self.rig_id, self.wallet, self.hash_count, self.timestamp)
+
+    def per_rig(self) -> "RigTable":
+        """One row per rig in order of first appearance: hash counts summed
+        (saturating at 64 bits), the latest timestamp and its hashrate, and
+        the last wallet seen"""
+        index = {}
+        table = RigTable()
+        table.skipped = self.skipped
+        table.cumulative = self.cumulative
+        low, high = _INT64
+        for rig_id, wallet, hash_count, timestamp, hashrate in zip(
+            self.rig_id, self.wallet, self.hash_count, self.timestamp, self.hashrate
+        ):
+            i = index.get(rig_id)
+            if i is None:
+                index[rig_id] = len(table)
+                table.append(rig_id, wallet, hash_count, timestamp, hashrate)
+                continue
+            table.hash_count[i] = min(max(table.hash_count[i] + hash_count, low), high)
+            if timestamp >= table.timestamp[i]:
+                table.timestamp[i] = timestamp
+                table.hashrate[i] = hashrate
+            if wallet is not None:
+                table.wallet[i] = wallet
+        return table
+
+
+def _first(record: dict, keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        value = record.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _integer(value: Any) -> Optional[int]:
+    """``value`` as an int64, None if it is not a number or out of range"""
+    kind = type(value)
+    if kind is float and math.isfinite(value):
+        value = int(value)
+    elif kind is not int:
+        return None
+    return value if _INT64[0] <= value <= _INT64[1] else None
+
+
+def _rate(value: Any) -> Optional[float]:
+    kind = type(value)
+    if (kind is int or kind is float) and math.isfinite(value):
+        return float(value)
+    return None
+
+
+def normalize(
+    records: Iterable[Any],
+    table: Optional[RigTable] = None,
+    read_at: int = 0,
+) -> RigTable:
+    """Append records of any format to ``table`` (a new one by default);
+    records without a timestamp get ``read_at``"""
+    if table is None:
+        table = RigTable()
+    for record in records:
+        if not isinstance(record, dict):
+            table.skipped += 1
+            continue
+        rig_id = _first(record, ID_KEYS)
+        count = _first(record, COUNT_KEYS)
+        rate = record.get("hashrate")
+        hash_count = _integer(count)
+        hashrate = _rate(rate)
+        if (
+            not isinstance(rig_id, str)
+            or (count is None and rate is None)
+            or (count is not None and hash_count is None)
+            or (rate is not None and hashrate is None)
+        ):
+            table.skipped += 1
+            continue
+        wallet = _first(record, WALLET_KEYS)
+        timestamp = _integer(_first(record, TIME_KEYS))
+        table.append(
+            rig_id,
+            wallet if isinstance(wallet, str) else None,
+            hash_count or 0,
+            read_at if timestamp is None else timestamp,
+            hashrate or 0.0,
+        )
+    return table
+
+
+def normalize_document(document: Any, read_at: int = 0) -> RigTable:
+    """Table for a parsed ``list`` or ``rigs`` scoreboard document"""
+    if isinstance(document, dict):
+        table = normalize(document.get("rigs", []), read_at=read_at)
+        table.cumulative = True
+        return table
+    return normalize(document, read_at=read_at)
+
+
+def detect_format(path: str) -> str:
+    """Sniff which of ``FORMATS`` a file (or its binary snapshot) holds"""
+    with open(resolve_snapshot(path), "rb") as f:
+        head = f.read(6)
+        if head[:4] == MAGIC:
+            return LAYOUTS[head[5]]
+        f.seek(0)
+        first = b""
+        for line in f:
+            first = line.strip()
+            if first:
+                break
+    if not first:
+        # Empty, e.g. a rig log before its first sample
+        return "termux"
+    if not first.startswith(b"{"):
+        return "list"
+    # A JSON document spans the whole file (or starts with a lone "{");
+    # JSONL has one complete object per line
+    try:
+        record = json.loads(first)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return "rigs"
+    if not isinstance(record, dict) or "rigs" in record:
+        return "rigs"
+    return "sessions" if "total_hashes" in record else "termux"
+
+
+def read_jsonl(path: str, read_at: int = 0) -> RigTable:
+    """Table for a Termux rig log or a session log"""
+    table = RigTable()
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                table.skipped += 1
+                continue
+            normalize((record,), table, read_at)
+    return table
+
+
+def rig_id_bytes32(rig_id: Any) -> Optional[bytes]:
+    """The ``bytes32`` rigId the contracts take for a hex rig id, with or
+    without ``0x``; None for anything else (token ids, wrong length)"""
+    if not isinstance(rig_id, str):
+        return None
+    digits = rig_id[2:] if rig_id[:2] in ("0x", "0X") else rig_id
+    if len(digits) != 64:
+        return None
+    try:
+        value = bytes.fromhex(digits)
+    except ValueError:
+        return None
+    # fromhex skips whitespace
+    return value if len(value) == 32 else None
+
+
+def proof_rows(table: RigTable) -> Tuple[List[Tuple[str, bytes, int]], List[str]]:
+    """``(rig_id, bytes32 rig id, hash_count)`` for the rows that can be
+    proven on chain, and the ids of those that cannot. Rows without hashes
+    to prove (``list`` rows only carry a hashrate) are left out: a proof of 0
+    would overwrite the rig's count on chain."""
+    rows, rejected = [], []
+    for rig_id, hash_count in zip(table.rig_id, table.hash_count):
+        if hash_count <= 0:
+            continue
+        rig_bytes = rig_id_bytes32(rig_id)
+        if rig_bytes is None:
+            rejected.append(rig_id)
+        else:
+            rows.append((rig_id, rig_bytes, hash_count))
+    return rows, rejected
+
+
+# store -> ((epoch, version), table)
+_tables: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def table_for(store: ScoreboardStore, read_at: Optional[int] = None) -> RigTable:
+    """Table for a store's current contents, rebuilt only after changes;
+    rows without a timestamp get ``read_at``, by default the build time"""
+    cached = _tables.get(store)
+    if cached is not None and cached[0] == (store.epoch, store.version):
+        return cached[1]
+    # Read before the records: a change in between only causes a rebuild
+    signature = (store.epoch, store.version)
+    document = store.to_document()
+    if read_at is None:
+        read_at = int(time.time())
+    table = normalize_document(document, read_at)
+    _tables[store] = (signature, table)
+    return table
+
+
+def load_table(location: str) -> RigTable:
+    """Table for a scoreboard file of any format or a service URL.
+
+    Raises FileNotFoundError, ``json.JSONDecodeError`` or ``OSError`` like
+    ``open_scoreboard``. Treat the result as read-only: it may be shared
+    with other callers until the scoreboard changes.
+    """
+    if location.startswith(("http://", "https://")):
+        return table_for(open_scoreboard(location))
+    read_at = int(os.path.getmtime(resolve_snapshot(location)))
+    if detect_format(location) in ("termux", "sessions"):
+        return read_jsonl(location, read_at)
+    return table_for(open_scoreboard(location), read_at)
@@ -0,0 +1,270 @@
+"""
+Incremental reader for the Termux rig logs
+
+``scripts/termux/miner_meshnet.sh`` appends one JSON object per line to
+``/sdcard/MESHNET/scoreboard.json``:
+
+    {"timestamp": 1700000000, "rig_id": "rig-1", "hash_count": 4200}
+
+``JsonlTail`` reads such a file from a persisted byte offset, so each pass
+parses only the lines appended since the last one. The checkpoint also stores
+the file's inode and a fingerprint of its first bytes:
+
+- a file shorter than the checkpoint offset was truncated (e.g. cleared after
+  a sync) and is read again from the start;
+- a different inode or fingerprint means the file was rotated: the rest of
+  the old file is read first if it is still next to it (``scoreboard.json.1``
+  etc.), then the new file from the start.
+
+A trailing line without a newline is left for the next pass, and the
+checkpoint only moves after the caller has consumed a batch, so a crash
+re-reads at most one batch: delivery is at-least-once. The live store keeps
+only the newest report per node, but a service with a history records every
+sample, so replayed lines are only dropped where it deduplicates
+``(node_id, timestamp)`` (``dedup``, see service.py).
+
+Stream a log into a scoreboard data directory of its own (a running server
+owns its directory; feed it with ``sync.py`` instead) with:
+
+    python -m scoreboard.tail /sdcard/MESHNET/scoreboard.json \
+        --data-dir rig-data --follow 60
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BYTES = 256
+# log_hash_count() in miner_meshnet.sh runs once a minute
+TERMUX_LOG_INTERVAL = 60
+
+
+class Batch(NamedTuple):
+    records: List[Any]
+    # Lines that were not valid JSON
+    errors: int
+    # Checkpoint to commit once the records are consumed
+    checkpoint: Dict[str, Any]
+
+
+class JsonlTail:
+    def __init__(
+        self,
+        path: str,
+        checkpoint_path: Optional[str] = None,
+        batch_bytes: int = 4 * 1024 * 1024,
+    ):
+        self.path = path
+        if checkpoint_path is None:
+            directory, name = os.path.split(os.path.abspath(path))
+            checkpoint_path = os.path.join(directory, f".{name}.checkpoint")
+        self.checkpoint_path = checkpoint_path
+        self.batch_bytes = batch_bytes
+        self.checkpoint = self._load_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"inode": None, "offset": 0, "fingerprint": ""}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(
+                f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}"
+            )
+            return {"inode": None, "offset": 0, "fingerprint": ""}
+
+    def commit(self, checkpoint: Dict[str, Any]):
+        """Persist ``checkpoint`` (from a ``Batch``) atomically"""
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self.checkpoint = checkpoint
+
+    @staticmethod
+    def _fingerprint(f, offset: int) -> str:
+        f.seek(0)
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        return hashlib.sha1(head).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _same_file(self, f, st: os.stat_result) -> bool:
+        checkpoint = self.checkpoint
+        if checkpoint["inode"] is None:
+            return True
+        if st.st_ino != checkpoint["inode"]:
+            return False
+        return self._fingerprint(f, checkpoint["offset"]) == checkpoint["fingerprint"]
+
+    def _rotated_path(self) -> Optional[str]:
+        """The renamed predecessor of the log, if it is still around"""
+        inode = self.checkpoint["inode"]
+        if inode is None:
+            return None
+        for path in glob.glob(glob.escape(self.path) + ".*"):
+            try:
+                if os.stat(path).st_ino == inode:
+                    return path
+            except OSError:
+                continue
+        return None
+
+    def batches(self) -> Iterator[Batch]:
+        """Yield the complete lines appended since the last commit.
+
+        Commit each batch's checkpoint after consuming it; uncommitted
+        batches are yielded again by the next call.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            # Rotated away and not recreated yet
+            rotated = self._rotated_path()
+            if rotated is not None:
+                with open(rotated, "rb") as old:
+                    offset = self.checkpoint["offset"]
+                    yield from self._read(old, os.fstat(old.fileno()), offset)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            offset = self.checkpoint["offset"]
+            if not self._same_file(f, st):
+                rotated = self._rotated_path()
+                if rotated is not None:
+                    with open(rotated, "rb") as old:
+                        yield from self._read(old, os.fstat(old.fileno()), offset)
+                    logger.info(f"Finished rotated log {rotated}")
+                else:
+                    logger.warning(f"{self.path} was replaced, reading from the start")
+                offset = 0
+            elif st.st_size < offset:
+                logger.warning(f"{self.path} was truncated, reading from the start")
+                offset = 0
+            yield from self._read(f, st, offset)
+
+    def _read(self, f, st: os.stat_result, offset: int) -> Iterator[Batch]:
+        fingerprint = None
+        # Bytes behind ``fingerprint``; _same_file hashes as many as the
+        # checkpoint's offset allows, so it is recomputed until they match
+        hashed = 0
+        while True:
+            f.seek(offset)
+            chunk = f.read(self.batch_bytes)
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                if len(chunk) < self.batch_bytes:
+                    # Nothing new, or a line still being written
+                    return
+                # One line longer than a batch: skip it rather than stall
+                logger.warning(f"Skipping oversized line at {offset} in {f.name}")
+                while True:
+                    chunk = f.read(self.batch_bytes)
+                    newline = chunk.find(b"\n")
+                    if newline >= 0:
+                        offset = f.tell() - len(chunk) + newline + 1
+                        break
+                    if not chunk:
+                        return
+                continue
+            records: List[Any] = []
+            errors = 0
+            for line in chunk[: end + 1].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    errors += 1
+            offset += end + 1
+            if fingerprint is None or hashed < min(offset, FINGERPRINT_BYTES):
+                fingerprint = self._fingerprint(f, offset)
+                hashed = min(offset, FINGERPRINT_BYTES)
+            yield Batch(
+                records,
+                errors,
+                {"inode": st.st_ino, "offset": offset, "fingerprint": fingerprint},
+            )
+
+
+def termux_submission(line: Any, interval: float = TERMUX_LOG_INTERVAL) -> Any:
+    """Map a Termux log line to a ``{node_id, hashrate, timestamp}`` report;
+    the hash count covers one logging interval, so it becomes a rate"""
+    if not isinstance(line, dict):
+        return line
+    hashes = line.get("hash_count")
+    if isinstance(hashes, (int, float)) and not isinstance(hashes, bool):
+        hashes = hashes / interval
+    submission = {
+        "node_id": line.get("rig_id"),
+        "hashrate": hashes,
+        "timestamp": line.get("timestamp"),
+    }
+    return {k: v for k, v in submission.items() if v is not None}
+
+
+def ingest(tail: JsonlTail, service, interval: float = TERMUX_LOG_INTERVAL) -> Counter:
+    """Stream every new log line into ``service`` (a ScoreboardService);
+    returns the counts of result statuses"""
+    counts: Counter = Counter()
+    for batch in tail.batches():
+        reports = [termux_submission(line, interval) for line in batch.records]
+        results = service.submit_batch(reports)
+        counts.update(r["status"] for r in results)
+        if batch.errors:
+            counts["unparsable"] += batch.errors
+        tail.commit(batch.checkpoint)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a Termux rig log")
+    parser.add_argument("log", help="e.g. /sdcard/MESHNET/scoreboard.json")
+    parser.add_argument(
+        "--data-dir",
+        required=True,
+        help="not the running server's: it owns its log and snapshots",
+    )
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--follow", type=float, default=0, help="poll every N seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from .service import ScoreboardService
+
+    service = ScoreboardService(args.data_dir)
+    service.start()
+    tail = JsonlTail(args.log, args.checkpoint)
+    try:
+        while True:
+            counts = ingest(tail, service)
+            if counts:
+                logger.info(f"Ingested {dict(counts)}")
+            if not args.follow:
+                break
+            time.sleep(args.follow)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Append-only write-ahead log for scoreboard submissions
+
+Each accepted record is appended to the log as one compact JSON line before it
+is acknowledged. Concurrent writers share fsyncs (group commit): whoever finds
+no sync in progress becomes the leader, waits ``sync_delay`` for more appends
+to arrive and fsyncs them all at once.
+
+``LogCompactor`` periodically seals the active log segment, folds everything
+into the JSON (and binary) snapshot and deletes the sealed segments. Replaying the
+remaining segments over the last snapshot rebuilds the exact store state.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .store import ScoreboardStore, read_document, resolve_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class WriteAheadLog:
+    def __init__(self, path: str, sync_delay: float = 0.002):
+        self.path = path
+        self.sync_delay = sync_delay
+
+        self._lock = threading.Lock()
+        self._sync_cond = threading.Condition(threading.Lock())
+        self._syncing = False
+        self._written = 0
+        self._durable = 0
+        self._next_segment = self._last_segment_number() + 1
+        self._file = open(self.path, "a")
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        record: Dict[str, Any],
+        apply: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        """Append ``record`` and return once it is on disk.
+
+        ``apply`` runs under the log lock, so the in-memory state changes in
+        exactly the order the records are written to the log.
+        """
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if apply is not None:
+                apply(record)
+            self._file.write(line)
+            self._written += 1
+            seq = self._written
+        self._wait_durable(seq)
+
+    def append_many(
+        self,
+        records: List[Dict[str, Any]],
+        apply: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Append several records and wait for a single fsync covering them.
+
+        ``accept`` is checked under the log lock, right before each record is
+        applied; rejected records are neither applied nor logged. Returns the
+        accepted records.
+        """
+        lines = [json.dumps(r, separators=(",", ":")) + "\n" for r in records]
+        accepted = []
+        with self._lock:
+            for record, line in zip(records, lines):
+                if accept is not None and not accept(record):
+                    continue
+                if apply is not None:
+                    apply(record)
+                self._file.write(line)
+                accepted.append(record)
+            self._written += len(accepted)
+            seq = self._written
+        if accepted:
+            self._wait_durable(seq)
+        return accepted
+
+    def backlog(self) -> int:
+        """Records appended but not yet fsynced"""
+        with self._sync_cond:
+            return self._written - self._durable
+
+    def _wait_durable(self, seq: int):
+        with self._sync_cond:
+            while self._durable < seq:
+                if not self._syncing:
+                    self._syncing = True
+                    break
+                self._sync_cond.wait()
+            else:
+                return
+
+        # Leader: give concurrent writers a moment to join this fsync
+        durable = None
+        try:
+            if self.sync_delay:
+                time.sleep(self.sync_delay)
+            with self._lock:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                durable = self._written
+        finally:
+            with self._sync_cond:
+                self._syncing = False
+                if durable is not None:
+                    self._durable = max(self._durable, durable)
+                self._sync_cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+
+    def _segment_paths(self) -> List[str]:
+        paths = [
+            p
+            for p in glob.glob(glob.escape(self.path) + ".*")
+            if p.rsplit(".", 1)[1].isdigit()
+        ]
+        return sorted(paths, key=lambda p: int(p.rsplit(".", 1)[1]))
+
+    def _last_segment_number(self) -> int:
+        paths = self._segment_paths()
+        return int(paths[-1].rsplit(".", 1)[1]) if paths else 0
+
+    def rotate(self) -> List[str]:
+        """Seal the active segment and start a new one.
+
+        Returns every sealed segment on disk (including ones left behind by an
+        earlier crash), oldest first.
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if self._file.tell() > 0:
+                self._file.close()
+                os.replace(self.path, f"{self.path}.{self._next_segment:06d}")
+                self._next_segment += 1
+                self._file = open(self.path, "a")
+            durable = self._written
+        with self._sync_cond:
+            self._durable = max(self._durable, durable)
+            self._sync_cond.notify_all()
+        return self._segment_paths()
+
+    def discard(self, segments: List[str]):
+        """Delete sealed segments whose contents are in the snapshot"""
+        for path in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def replay(self, apply: Callable[[Dict[str, Any]], Any]) -> int:
+        """Feed every logged record, oldest first, to ``apply``"""
+        count = 0
+        with self._lock:
+            self._file.flush()
+            for path in self._segment_paths() + [self.path]:
+                with open(path) as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # A torn tail from a crash mid-write was never acked
+                            logger.warning(f"Skipping corrupt log entry in {path}")
+                            continue
+                        apply(record)
+                        count += 1
+        return count
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+class LogCompactor:
+    def __init__(
+        self,
+        store: ScoreboardStore,
+        wal: WriteAheadLog,
+        snapshot_path: str,
+        interval: float = 300.0,
+        binary: bool = True,
+        select: Optional[Callable[[Optional[str]], bool]] = None,
+    ):
+        self.store = store
+        self.wal = wal
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.binary = binary
+        # The nodes this log holds when the store is sharded (see shards.py)
+        self.select = select
+
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def recover(
+        self,
+        apply: Callable[[Dict[str, Any]], Any],
+        seed_path: Optional[str] = None,
+    ) -> int:
+        """Load the last snapshot (or ``seed_path`` on first run) and replay
+        the log over it; returns the number of replayed records"""
+        for path in (self.snapshot_path, seed_path):
+            if path and os.path.exists(resolve_snapshot(path)):
+                self.store.replace(read_document(path))
+                break
+        replayed = self.wal.replay(apply)
+        logger.info(
+            f"Recovered scoreboard: {len(self.store)} nodes, "
+            f"{replayed} records replayed from the log"
+        )
+        return replayed
+
+    def compact(self) -> int:
+        """Fold the log into the snapshot; returns the segments folded"""
+        with self._compact_lock:
+            sealed = self.wal.rotate()
+            if not sealed:
+                return 0
+            # Every sealed record was applied before it was written, so the
+            # snapshot taken now contains all of them
+            self.store.save(
+                self.snapshot_path,
+                indent=None,
+                binary=self.binary,
+                select=self.select,
+            )
+            self.wal.discard(sealed)
+            logger.info(f"Compacted {len(sealed)} log segments into snapshot")
+            return len(sealed)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="scoreboard-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, compact=True):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if compact:
+            self.compact()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Error compacting scoreboard log: {e}")
@@ -0,0 +1,154 @@
+"""
+Event-time reward windows with a lateness watermark
+
+Offline rigs upload hours or days of samples at once, so the time a row
+arrives says little about when it was mined. ``EventTimeWindows`` assigns
+every row to the fixed window its own timestamp falls in and tracks a
+watermark: the newest event time seen minus ``allowed_lateness`` (or, when
+given, the wall clock minus ``allowed_lateness``, so windows still close while
+every rig is offline). A window is final once the watermark passes its end;
+``advance`` hands back each newly closed window exactly once, with one row
+per rig.
+
+Rows for a window that is already closed are not dropped: they go to the
+adjustment stream (``take_adjustments``) for the consumer to settle
+separately, e.g. by crediting them in the next reward round. With a
+``late_horizon``, rows for windows that closed more than that long ago are
+dropped and counted in ``dropped``, so a consumer remembering which rows it
+has routed only needs to remember them that long.
+
+Open windows live in memory only, to be rebuilt from the source after a
+restart; ``state`` and ``restore`` carry the watermark over, so windows that
+already closed are not closed (and settled) a second time, along with the
+adjustments not yet taken, which the source may not route again.
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .table import RigTable
+
+
+class ClosedWindow(NamedTuple):
+    start: int
+    # Exclusive
+    end: int
+    # One row per rig: summed hash counts, latest timestamp, last wallet
+    table: RigTable
+
+
+class EventTimeWindows:
+    def __init__(
+        self,
+        window: int = 3600,
+        allowed_lateness: int = 6 * 3600,
+        late_horizon: Optional[int] = None,
+    ):
+        if window <= 0 or allowed_lateness < 0:
+            raise ValueError("window must be positive, allowed_lateness >= 0")
+        if late_horizon is not None and late_horizon < 0:
+            raise ValueError("late_horizon must be >= 0")
+        self.window = window
+        self.allowed_lateness = allowed_lateness
+        self.late_horizon = late_horizon
+        self.watermark = -math.inf
+        self.max_event_time = -math.inf
+        # Every window starting before this has been closed
+        self.closed_until = -math.inf
+        self._open: Dict[int, RigTable] = {}
+        self._adjustments = RigTable()
+        self.on_time = 0
+        self.late = 0
+        self.dropped = 0
+
+    def window_start(self, timestamp: int) -> int:
+        return timestamp - timestamp % self.window
+
+    @property
+    def expired_before(self) -> float:
+        """Rows for windows starting before this are dropped"""
+        if self.late_horizon is None:
+            return -math.inf
+        return self.closed_until - self.late_horizon
+
+    def add(
+        self,
+        rig_id: str,
+        hash_count: int,
+        timestamp: int,
+        wallet: Optional[str] = None,
+    ) -> bool:
+        """Route one row; returns False when it was late (adjustment) or
+        dropped"""
+        start = self.window_start(timestamp)
+        if start < self.expired_before:
+            self.dropped += 1
+            return False
+        if start < self.closed_until:
+            self._adjustments.append(rig_id, wallet, hash_count, timestamp)
+            self.late += 1
+            return False
+        table = self._open.get(start)
+        if table is None:
+            table = self._open[start] = RigTable()
+        table.append(rig_id, wallet, hash_count, timestamp)
+        if timestamp > self.max_event_time:
+            self.max_event_time = timestamp
+        self.on_time += 1
+        return True
+
+    def add_table(self, table: RigTable) -> int:
+        """Route every row of ``table``; returns how many were late"""
+        late = self.late
+        for rig_id, wallet, hash_count, timestamp in table.rows():
+            self.add(rig_id, hash_count, timestamp, wallet)
+        return self.late - late
+
+    def advance(self, now: Optional[float] = None) -> List[ClosedWindow]:
+        """Move the watermark and return the windows it closed, oldest
+        first. ``now`` (wall clock) lets windows close without new data."""
+        watermark = self.max_event_time - self.allowed_lateness
+        if now is not None:
+            watermark = max(watermark, now - self.allowed_lateness)
+        if watermark <= self.watermark:
+            return []
+        self.watermark = watermark
+        # Windows ending at or before the watermark
+        boundary = self.window_start(math.floor(watermark))
+        self.closed_until = max(self.closed_until, boundary)
+        closed = sorted(start for start in self._open if start < self.closed_until)
+        return [
+            ClosedWindow(start, start + self.window, self._open.pop(start).per_rig())
+            for start in closed
+        ]
+
+    def take_adjustments(self) -> RigTable:
+        """Late rows received since the last call"""
+        adjustments, self._adjustments = self._adjustments, RigTable()
+        return adjustments
+
+    def open_windows(self) -> List[int]:
+        return sorted(self._open)
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serialisable watermark position and pending adjustments for
+        ``restore``"""
+        state: Dict[str, Any] = {
+            name: None if value == -math.inf else value
+            for name, value in (
+                ("watermark", self.watermark),
+                ("max_event_time", self.max_event_time),
+                ("closed_until", self.closed_until),
+            )
+        }
+        state["adjustments"] = [list(row) for row in self._adjustments.rows()]
+        return state
+
+    def restore(self, state: Dict[str, Any]):
+        """Resume from ``state()``; rows for the windows it had closed are
+        late from now on"""
+        for name in ("watermark", "max_event_time", "closed_until"):
+            value = state.get(name)
+            setattr(self, name, -math.inf if value is None else value)
+        for rig_id, wallet, hash_count, timestamp in state.get("adjustments", ()):
+            self._adjustments.append(rig_id, wallet, hash_count, timestamp)
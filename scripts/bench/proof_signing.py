@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of oracle proof signing
+
+Compares signing each proof with ``Account.sign_message(...,
+private_key=hex)``, as OracleSubmitter used to, with SigningService
+(scoreboard/signing.py) signing in-process with the preloaded key and across
+a process pool. Needs eth_account; the baseline runs on a sample and is
+extrapolated, since it is the slow one.
+
+Usage: python -m scripts.bench.proof_signing --signatures 100000 --processes 8
+"""
+
+import argparse
+import os
+import time
+
+from scoreboard.signing import SigningService, proof_message
+
+PRIVATE_KEY = "0x" + "4c0883a69102937d6231471b5dbb6204fe512961708279f1d7b1b3a6f1c9e1f3"
+
+
+def make_messages(count):
+    return [(f"0x{i:064x}", 100_000 + i * 7) for i in range(count)]
+
+
+def baseline(messages):
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+
+    return [
+        Account.sign_message(
+            encode_defunct(text=proof_message(rig_id, hashes)),
+            private_key=PRIVATE_KEY,
+        ).signature
+        for rig_id, hashes in messages
+    ]
+
+
+def bench(name, sign, messages, total):
+    start = time.perf_counter()
+    sign(messages)
+    elapsed = time.perf_counter() - start
+    rate = len(messages) / elapsed
+    print(
+        f"  {name:<22} {rate:>9.0f} sig/s  "
+        f"{total / rate:>8.1f}s for {total} signatures"
+    )
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--signatures", type=int, default=100_000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--baseline-sample",
+        type=int,
+        default=2_000,
+        help="signatures to time the per-call key parsing baseline on",
+    )
+    args = parser.parse_args()
+
+    messages = make_messages(args.signatures)
+    total = args.signatures
+    print(f"{total} proof signatures, {args.processes} processes")
+    slow = bench(
+        "sign_message(hex key)",
+        baseline,
+        messages[: min(args.baseline_sample, total)],
+        total,
+    )
+    single = SigningService(PRIVATE_KEY, processes=1)
+    preloaded = bench("preloaded key", single.sign, messages, total)
+    with SigningService(PRIVATE_KEY, processes=args.processes) as service:
+        # Start the workers outside the timed run
+        service.sign(messages[: service.chunk_size * args.processes + 1])
+        pooled = bench("process pool", service.sign, messages, total)
+    print(f"  speedup    {preloaded / slow:.2f}x preloaded, {pooled / slow:.2f}x pool")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Load test for the scoreboard service
+
+Drives the same number of /submit requests through
+  - sync:  the blocking request model of update_scoreboard.py (a pool of
+           request threads, each doing its own durable submit), and
+  - async: the ASGI app from update_scoreboard_async.py with every request
+           in flight at once,
+and reports requests per second for each. Requests are fed to the apps
+in-process, so the numbers measure the service, not an HTTP client.
+
+Usage: python -m scripts.bench.scoreboard_load --requests 20000 --nodes 2000
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scoreboard.asgi import ScoreboardApp
+from scoreboard.service import ScoreboardService
+
+
+def make_records(count, nodes):
+    return [
+        {"node_id": f"rig-{i % nodes:06d}", "hashrate": 1000 + i, "timestamp": i}
+        for i in range(count)
+    ]
+
+
+def run_sync(records, threads):
+    with tempfile.TemporaryDirectory() as data_dir:
+        service = ScoreboardService(data_dir, compact_interval=3600)
+        service.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(service.submit, records))
+        elapsed = time.perf_counter() - start
+        service.stop()
+    return elapsed
+
+
+async def _post(app, body):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    scope = {"type": "http", "method": "POST", "path": "/submit", "headers": []}
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def _run_async(records, concurrency):
+    with tempfile.TemporaryDirectory() as data_dir:
+        app = ScoreboardApp(ScoreboardService(data_dir, compact_interval=3600))
+        bodies = [json.dumps(r).encode() for r in records]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(body):
+            async with semaphore:
+                return await _post(app, body)
+
+        await _post(app, bodies[0])  # start the service outside the timing
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(one(b) for b in bodies))
+        elapsed = time.perf_counter() - start
+        await app.shutdown()
+    assert all(s == 200 for s in statuses)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16, help="sync workers")
+    parser.add_argument("--concurrency", type=int, default=5000)
+    args = parser.parse_args()
+
+    records = make_records(args.requests, args.nodes)
+
+    sync_s = run_sync(records, args.threads)
+    async_s = asyncio.run(_run_async(records, args.concurrency))
+
+    print(f"{'mode':<8}{'seconds':>10}{'req/s':>12}")
+    for name, elapsed in (("sync", sync_s), ("async", async_s)):
+        print(f"{name:<8}{elapsed:>10.2f}{args.requests / elapsed:>12.0f}")
+    print(f"speedup  {sync_s / async_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
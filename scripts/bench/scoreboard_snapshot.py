@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the scoreboard snapshot formats
+
+Writes the same synthetic scoreboard as pretty-printed JSON (what the
+publisher commits), compact JSON (what the compactor used to write) and the
+binary snapshot, then reports file size and the time to write and to load
+each one into a ScoreboardStore.
+
+Usage: python -m scripts.bench.scoreboard_snapshot --rigs 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from scoreboard.binary import read_snapshot, write_snapshot
+from scoreboard.store import ScoreboardStore
+
+
+def make_document(rigs, seed=1):
+    rng = random.Random(seed)
+    return [
+        {
+            "node_id": f"{rng.getrandbits(256):064x}",
+            "hashrate": rng.randint(100, 5_000_000),
+            "timestamp": 1_700_000_000 + i,
+        }
+        for i in range(rigs)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def write_json(path, document, indent):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=indent)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def run(rigs, tmp):
+    document = make_document(rigs)
+    formats = [
+        ("json (indent=2)", "pretty.json", lambda p: write_json(p, document, 2)),
+        ("json (compact)", "compact.json", lambda p: write_json(p, document, None)),
+        ("binary", "snapshot.bin", lambda p: write_snapshot(p, document)),
+    ]
+    print(f"\n{rigs} rigs")
+    print(f"  {'format':<16} {'size':>10} {'write':>9} {'load':>9} {'store':>9}")
+    for name, filename, write in formats:
+        path = os.path.join(tmp, filename)
+        write_s, _ = timed(lambda: write(path))
+        reader = read_snapshot if path.endswith(".bin") else read_json
+        load_s, loaded = timed(lambda: reader(path))
+        assert loaded == document
+        store_s, _ = timed(lambda: ScoreboardStore.from_document(loaded))
+        size = os.path.getsize(path) / 1e6
+        print(
+            f"  {name:<16} {size:>8.1f}MB {write_s:>8.3f}s {load_s:>8.3f}s "
+            f"{load_s + store_s:>8.3f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rigs", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for rigs in args.rigs:
+            run(rigs, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of scoreboard record validation
+
+Compares the precompiled submission validator (scoreboard/schema.py) with a
+naive validator that applies the same rules field by field through a table
+of checks, on a mix of well-formed, coercible and invalid reports.
+
+Usage: python -m scripts.bench.scoreboard_validation --records 1000000
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+
+from scoreboard.schema import (
+    MAX_HASHRATE,
+    MAX_TIMESTAMP,
+    submission_schema,
+)
+
+RULES = {
+    "node_id": ("id", None),
+    "hashrate": ("int", (0, MAX_HASHRATE)),
+    "timestamp": ("int", (0, MAX_TIMESTAMP)),
+}
+
+
+def naive_validate(data, node_id_format="token"):
+    """Straightforward per-field checks, as a request handler would write
+    them inline"""
+    if not isinstance(data, dict):
+        return None, "Record must be a JSON object"
+    missing = [field for field in RULES if field not in data]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    record = dict(data)
+    for field, (kind, limits) in RULES.items():
+        value = data[field]
+        if kind == "id":
+            if not isinstance(value, str):
+                return None, f"{field} must be a string"
+            if node_id_format == "hex":
+                value = value.lower()
+                if value.startswith("0x"):
+                    value = value[2:]
+                if not re.fullmatch(r"[0-9a-f]{1,128}", value):
+                    return None, f"{field} must be a hex string"
+            elif not re.fullmatch(r"[A-Za-z0-9_.:@-]{1,128}", value):
+                return None, f"{field} has invalid characters"
+        else:
+            if isinstance(value, bool):
+                return None, f"{field} must be a number"
+            if isinstance(value, str):
+                try:
+                    value = float(value)
+                except ValueError:
+                    return None, f"{field} must be a number"
+            if isinstance(value, float):
+                if not math.isfinite(value):
+                    return None, f"{field} must be a number"
+                value = int(value)
+            if not isinstance(value, int):
+                return None, f"{field} must be a number"
+            low, high = limits
+            if not low <= value <= high:
+                return None, f"{field} out of range"
+        record[field] = value
+    return record, None
+
+
+def make_records(count, seed=1):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        record = {
+            "node_id": f"{rng.getrandbits(160):040x}",
+            "hashrate": rng.randint(100, 5_000_000),
+            "timestamp": 1_700_000_000 + i,
+        }
+        roll = rng.random()
+        if roll < 0.05:
+            record["hashrate"] = float(record["hashrate"]) + 0.5
+        elif roll < 0.07:
+            record["timestamp"] = str(record["timestamp"])
+        elif roll < 0.08:
+            record["hashrate"] = -1
+        elif roll < 0.085:
+            del record["timestamp"]
+        records.append(record)
+    return records
+
+
+def bench(name, validate, records):
+    start = time.perf_counter()
+    invalid = sum(1 for r in records if validate(r)[1] is not None)
+    elapsed = time.perf_counter() - start
+    rate = len(records) / elapsed
+    print(
+        f"  {name:<10} {elapsed:>7.3f}s  {rate / 1e6:>5.2f}M rec/s  {invalid} invalid"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    for node_id_format in ("token", "hex"):
+        compiled = submission_schema(node_id_format)
+        print(f"{args.records} records, {node_id_format} node ids")
+        naive = bench("naive", lambda r: naive_validate(r, node_id_format), records)
+        fast = bench("compiled", compiled, records)
+        print(f"  speedup    {naive / fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,29 +9,37 @@ mkdir -p /sdcard/MESHNET
 # Rig ID file
 RIG_ID_FILE="$HOME/.xmrt_rigid"
 
-# Scoreboard file on sdcard
+# Raw per-minute log written by older versions of this script
 SCOREBOARD_FILE="/sdcard/MESHNET/scoreboard.json"
 
+# Session summaries compacted by scoreboard.rig_agent
+SESSIONS_FILE="/sdcard/MESHNET/sessions.jsonl"
+
+# Scoreboard service and local checkout of this repository (for the Python tools)
+SCOREBOARD_URL="${SCOREBOARD_URL:-http://localhost:7860}"
+MESHNET_DIR="${MESHNET_DIR:-$HOME/MESHNET}"
+
 # Function to log hash count (simplified for demonstration)
+# Samples go to stdout for the rig agent; messages go to stderr
 log_hash_count() {
     local timestamp=$(date +%s)
     local rig_id=$(cat "$RIG_ID_FILE" 2>/dev/null || echo "unknown_rig")
     local current_hashes=$(( RANDOM % 10000 + 1000 )) # Simulate hash count
 
-    echo "{\"timestamp\": $timestamp, \"rig_id\": \"$rig_id\", \"hash_count\": $current_hashes}" >> "$SCOREBOARD_FILE"
-    echo "Logged $current_hashes hashes for rig $rig_id"
+    echo "{\"timestamp\": $timestamp, \"rig_id\": \"$rig_id\", \"hash_count\": $current_hashes}"
+    echo "Logged $current_hashes hashes for rig $rig_id" >&2
 }
 
 # Main mining loop (simplified)
 start_mining() {
-    echo "Starting MESHNET miner..."
+    echo "Starting MESHNET miner..." >&2
     
     # Simulate XMRig call with rig ID
     if [ -f "$XMRIG_PATH" ]; then
-        echo "Running XMRig: $XMRIG_PATH --rig-id=$(cat $RIG_ID_FILE)"
+        echo "Running XMRig: $XMRIG_PATH --rig-id=$(cat $RIG_ID_FILE)" >&2
         # $XMRIG_PATH --rig-id=$(cat $RIG_ID_FILE) &
     else
-        echo "XMRig not found at $XMRIG_PATH. Simulating mining."
+        echo "XMRig not found at $XMRIG_PATH. Simulating mining." >&2
     fi
 
     while true;
@@ -41,14 +49,19 @@ start_mining() {
     done
 }
 
-# Function to sync with Eliza or ValidatorNode (placeholder)
+# Fold samples into per-session aggregates, compacting any old raw log first
+aggregate_sessions() {
+    PYTHONPATH="$MESHNET_DIR" python3 -m scoreboard.rig_agent "$SESSIONS_FILE" --backfill "$SCOREBOARD_FILE"
+}
+
+# Upload unsynced sessions (gzipped, resumable) and clear the log once acknowledged
 sync_data() {
-    echo "Syncing data with Eliza or ValidatorNode..."
-    # In a real scenario, this would involve:
-    # 1. Reading data from $SCOREBOARD_FILE
-    # 2. Sending data to Eliza (agent_loop.py) or ValidatorNode (submitter.py) via API/contract calls
-    # 3. Clearing $SCOREBOARD_FILE after successful sync
-    echo "Sync complete (simulated)."
+    echo "Syncing data with $SCOREBOARD_URL..."
+    if PYTHONPATH="$MESHNET_DIR" python3 -m scoreboard.sync --sessions "$SESSIONS_FILE" "$SCOREBOARD_URL"; then
+        echo "Sync complete."
+    else
+        echo "Sync incomplete, will resume from the last acknowledged line."
+    fi
 }
 
 # Check for rig ID
@@ -60,7 +73,7 @@ if [ ! -f "$RIG_ID_FILE" ]; then
 fi
 
 # Start mining in background and sync periodically
-start_mining &
+start_mining | aggregate_sessions &
 MINER_PID=$!
 
 # Simple loop to periodically sync (can be improved with network status checks)
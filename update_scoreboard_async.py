@@ -0,0 +1,31 @@
+"""
+ASGI version of the scoreboard endpoint
+
+Same /submit contract as update_scoreboard.py, served by an asyncio app so a
+slow disk or git operation never blocks other rigs. Run with:
+
+    uvicorn update_scoreboard_async:app --host 0.0.0.0 --port 7860
+"""
+
+from scoreboard.asgi import ScoreboardApp
+from scoreboard.config import (
+    MAX_BATCH_RECORDS,
+    MAX_QUEUE_DEPTH,
+    TRUST_FORWARDED,
+    build_limiter,
+    build_service,
+)
+
+app = ScoreboardApp(
+    build_service(),
+    max_batch_records=MAX_BATCH_RECORDS,
+    limiter=build_limiter(),
+    max_queue_depth=MAX_QUEUE_DEPTH,
+    trust_forwarded=TRUST_FORWARDED,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=7860)
@@ -0,0 +1,156 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.table import RigTable
+
+HAS_DEPS = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("web3", "eth_account", "requests")
+)
+
+if HAS_DEPS:
+    from agents.eliza.agent_loop import ElizaAgent
+
+POLICY = {
+    "canPropose": True,
+    "minRigProof": 10,
+    "proposalIntervalSec": 100,
+    "rewardWindowSec": 100,
+    "allowedLatenessSec": 50,
+    "lateHorizonSec": 200,
+}
+
+
+def table(*rows):
+    result = RigTable()
+    for rig_id, hash_count, timestamp in rows:
+        result.append(rig_id, f"0x{rig_id}", hash_count, timestamp)
+    return result
+
+
+@unittest.skipUnless(HAS_DEPS, "web3, eth_account or requests is not installed")
+class TestElizaAgent(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self._tmp.name, "meshnet_policy.json")
+        with open(config_path, "w") as f:
+            json.dump(POLICY, f)
+        self.agent = ElizaAgent(config_path, web3_provider="http://127.0.0.1:1")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_ingest_skips_rows_already_routed(self):
+        scoreboard = table(("a", 30, 10), ("a", 30, 20), ("b", 40, 30))
+        self.assertEqual(self.agent.ingest_scoreboard(scoreboard), 0)
+        # The whole scoreboard is read again, with one new row
+        scoreboard.append("b", "0xb", 40, 60)
+        self.assertEqual(self.agent.ingest_scoreboard(scoreboard), 0)
+        self.assertEqual(self.agent.windows.on_time, 4)
+
+        # Older than a's newest row, but not seen before
+        scoreboard.append("a", "0xa", 30, 5)
+        self.agent.ingest_scoreboard(scoreboard)
+        self.assertEqual(self.agent.windows.on_time, 5)
+
+    def test_late_rows_credited_in_next_window(self):
+        self.agent.ingest_scoreboard(table(("a", 30, 10), ("b", 10, 50)))
+        ((window, rewards),) = self.agent.close_reward_windows(now=160)
+        self.assertEqual((window.start, window.end), (0, 100))
+        self.assertEqual(
+            [(r["rig_id"], r["reward_amount"]) for r in rewards],
+            [("a", 750), ("b", 250)],
+        )
+        self.assertEqual(self.agent.close_reward_windows(now=160), [])
+
+        # A row from the closed window arrives with the next one's rows
+        late = self.agent.ingest_scoreboard(table(("a", 20, 120), ("b", 20, 40)))
+        self.assertEqual(late, 1)
+        ((window, rewards),) = self.agent.close_reward_windows(now=260)
+        self.assertEqual((window.start, window.end), (100, 200))
+        self.assertEqual(
+            [(r["rig_id"], r["hash_count"]) for r in rewards], [("a", 20), ("b", 20)]
+        )
+
+    def write_rigs(self, hash_count, mtime):
+        path = os.path.join(self._tmp.name, "meshnet_scoreboard.json")
+        with open(path, "w") as f:
+            json.dump({"rigs": [{"rig_id": "a", "hash_count": hash_count}]}, f)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_rigs_without_timestamps_are_settled_every_round(self):
+        agent = self.agent
+        # Re-read every cycle, rewritten between rounds with the running
+        # total; each round credits what was added since the last one
+        for mtime, now, total, credited in ((10, 160, 30, 30), (110, 260, 45, 15)):
+            path = self.write_rigs(total, mtime)
+            for _ in range(3):
+                agent.ingest_scoreboard(agent.load_meshnet_scoreboard(path))
+            ((window, rewards),) = agent.close_reward_windows(now=now)
+            self.assertEqual(window.start, mtime - mtime % 100)
+            self.assertEqual([r["hash_count"] for r in rewards], [credited])
+            self.assertTrue(agent.create_proposal(rewards, window))
+            self.assertIsNone(agent.create_proposal(rewards, window))
+
+        # Only windows that may still receive late rows are remembered
+        self.assertEqual(sorted(agent.seen), [0, 100])
+        agent.close_reward_windows(now=10_000)
+        self.assertEqual((agent.seen, agent.proposed), ({}, set()))
+
+    def test_restart_does_not_propose_closed_windows_again(self):
+        path = self.write_rigs(30, 10)
+        self.agent.ingest_scoreboard(self.agent.load_meshnet_scoreboard(path))
+        ((window, rewards),) = self.agent.close_reward_windows(now=160)
+        self.agent.create_proposal(rewards, window)
+
+        config_path = os.path.join(self._tmp.name, "meshnet_policy.json")
+        agent = ElizaAgent(config_path, web3_provider="http://127.0.0.1:1")
+        self.assertEqual(agent.windows.closed_until, 100)
+        self.assertEqual(
+            agent.ingest_scoreboard(agent.load_meshnet_scoreboard(path)), 0
+        )
+        self.assertEqual(agent.close_reward_windows(now=160), [])
+        self.assertIsNone(agent.create_proposal(rewards, window))
+
+    def test_rewrites_within_a_window_credit_the_latest_total(self):
+        agent = self.agent
+        for mtime, total in ((10, 30), (20, 40), (30, 55)):
+            path = self.write_rigs(total, mtime)
+            agent.ingest_scoreboard(agent.load_meshnet_scoreboard(path))
+        ((window, rewards),) = agent.close_reward_windows(now=160)
+        self.assertEqual([r["hash_count"] for r in rewards], [55])
+
+        # Restarted with a rewrite in the open window: only that one is
+        # read again, and credited against the closed windows' total
+        path = self.write_rigs(70, 110)
+        agent.ingest_scoreboard(agent.load_meshnet_scoreboard(path))
+        agent.save_state()
+        config_path = os.path.join(self._tmp.name, "meshnet_policy.json")
+        agent = ElizaAgent(config_path, web3_provider="http://127.0.0.1:1")
+        agent.ingest_scoreboard(agent.load_meshnet_scoreboard(path))
+        ((window, rewards),) = agent.close_reward_windows(now=260)
+        self.assertEqual([r["hash_count"] for r in rewards], [15])
+
+    def test_restart_keeps_late_rows_not_yet_credited(self):
+        self.agent.ingest_scoreboard(table(("a", 30, 10)))
+        self.agent.close_reward_windows(now=160)
+        self.assertEqual(self.agent.ingest_scoreboard(table(("b", 20, 40))), 1)
+        self.agent.save_state()
+
+        config_path = os.path.join(self._tmp.name, "meshnet_policy.json")
+        agent = ElizaAgent(config_path, web3_provider="http://127.0.0.1:1")
+        # Already routed: the scoreboard does not bring the row back
+        self.assertEqual(agent.ingest_scoreboard(table(("b", 20, 40))), 0)
+        agent.ingest_scoreboard(table(("a", 20, 120)))
+        ((window, rewards),) = agent.close_reward_windows(now=260)
+        self.assertEqual(
+            [(r["rig_id"], r["hash_count"]) for r in rewards], [("a", 20), ("b", 20)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
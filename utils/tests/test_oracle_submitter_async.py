@@ -0,0 +1,227 @@
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+HAS_WEB3 = importlib.util.find_spec("web3") is not None
+PRIVATE_KEY = "0x" + "4c0883a69102937d6231471b5dbb6204fe512961708279f1d7b1b3a6f1c9e1f3"
+CONTRACT = "0x" + "12" * 20
+PENDING = 7
+
+if HAS_WEB3:
+    import rlp
+    from eth_account import Account
+    from eth_utils import keccak
+    from web3.exceptions import TransactionNotFound
+
+    from oracle.scoreboard.submitter_async import AsyncOracleSubmitter
+
+
+class FakeEth:
+    """The parts of AsyncWeb3's ``eth`` the submitter uses, over a chain
+    that mines its mempool in nonce order whenever ``mine`` is called"""
+
+    def __init__(self):
+        self.next_nonce = PENDING
+        self.blocks = [[]]
+        self.mempool = []
+        self.sent = []
+        self.gas_prices = []
+        self.receipts = {}
+        self.calls = {"receipt": 0, "block": 0}
+        # Transactions for these rig ids are dropped or refused
+        self.drop = set()
+        self.refuse = set()
+
+    @property
+    async def chain_id(self):
+        return 1
+
+    @property
+    async def gas_price(self):
+        return 10**9
+
+    @property
+    async def block_number(self):
+        return len(self.blocks) - 1
+
+    async def get_transaction_count(self, address, block):
+        return PENDING if block == "pending" else self.next_nonce
+
+    async def send_raw_transaction(self, raw):
+        fields = rlp.decode(bytes(raw))
+        nonce = int.from_bytes(fields[0], "big")
+        data = bytes(fields[5])
+        if data in self.refuse:
+            raise ConnectionError("node unavailable")
+        if nonce < self.next_nonce:
+            raise ValueError("nonce too low")
+        tx_hash = keccak(bytes(raw))
+        self.sent.append((nonce, data))
+        self.gas_prices.append(int.from_bytes(fields[1], "big"))
+        if data in self.drop:
+            self.drop.discard(data)
+        else:
+            self.mempool.append((tx_hash, nonce))
+        return tx_hash
+
+    def mine(self):
+        # Nothing after a missing nonce can be mined
+        waiting = dict((nonce, tx_hash) for tx_hash, nonce in self.mempool)
+        block = []
+        while self.next_nonce in waiting:
+            tx_hash = waiting.pop(self.next_nonce)
+            self.receipts[tx_hash] = {"status": 1}
+            block.append(tx_hash)
+            self.next_nonce += 1
+        self.mempool = [(h, n) for n, h in waiting.items() if n >= self.next_nonce]
+        self.blocks.append(block)
+
+    async def get_block(self, number):
+        self.calls["block"] += 1
+        return {"transactions": self.blocks[number]}
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.calls["receipt"] += 1
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+
+class FakeCall:
+    def __init__(self, rig_id):
+        self.rig_id = rig_id
+
+    async def build_transaction(self, params):
+        return dict(params, to=CONTRACT, data="0x" + self.rig_id.hex())
+
+
+class FakeFunctions:
+    def submitProof(self, rig_id, hashes, signature):
+        return FakeCall(rig_id)
+
+
+@unittest.skipUnless(HAS_WEB3, "web3 is not installed")
+class TestAsyncOracleSubmitter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "meshnet_scoreboard.json")
+        rigs = [{"rig_id": "0x" + f"{i:064x}", "hash_count": 100 + i} for i in range(5)]
+        rigs.append({"rig_id": "rig-1", "hash_count": 5})
+        with open(self.path, "w") as f:
+            json.dump({"rigs": rigs}, f)
+        self.rig_ids = [bytes.fromhex(f"{i:064x}") for i in range(5)]
+
+    def tearDown(self):
+        self.submitter.close()
+        self._tmp.cleanup()
+
+    def submitter_for(self, eth, receipt_timeout=600):
+        submitter = AsyncOracleSubmitter(
+            receipt_timeout=receipt_timeout, poll_interval=0.01, signing_processes=1
+        )
+        submitter.w3 = type("FakeAsyncWeb3", (), {"eth": eth})()
+        submitter.private_key = PRIVATE_KEY
+        submitter.oracle_account = Account.from_key(PRIVATE_KEY)
+        submitter.mesh_miner_contract = type(
+            "FakeContract", (), {"functions": FakeFunctions()}
+        )()
+        self.submitter = submitter
+        return submitter
+
+    async def run_with_miner(self, submitter, eth, every=0.03):
+        async def miner():
+            while True:
+                await asyncio.sleep(every)
+                eth.mine()
+
+        mining = asyncio.ensure_future(miner())
+        try:
+            await asyncio.wait_for(submitter.run_submitter(self.path), 10)
+        finally:
+            mining.cancel()
+
+    async def test_send_block_receipt(self):
+        eth = FakeEth()
+        submitter = self.submitter_for(eth)
+        await self.run_with_miner(submitter, eth)
+
+        # The token id row is skipped; the rest use consecutive nonces
+        self.assertEqual(sorted(n for n, _ in eth.sent), list(range(PENDING, 12)))
+        self.assertEqual(sorted(d for _, d in eth.sent), self.rig_ids)
+        self.assertEqual(len(submitter.receipts), 0)
+        # One receipt lookup per transaction, found through its block
+        self.assertEqual(eth.calls["receipt"], 5)
+        self.assertLessEqual(eth.calls["block"], len(eth.blocks))
+
+    async def test_dropped_transaction_resent_on_its_nonce(self):
+        eth = FakeEth()
+        eth.drop.add(self.rig_ids[2])
+        submitter = self.submitter_for(eth, receipt_timeout=0.2)
+        await self.run_with_miner(submitter, eth)
+
+        resent = [i for i, (_, d) in enumerate(eth.sent) if d == self.rig_ids[2]]
+        self.assertEqual(len(resent), 2)
+        self.assertEqual(eth.sent[resent[0]][0], eth.sent[resent[1]][0])
+        # Priced to replace the original should it still be pending
+        prices = [eth.gas_prices[i] for i in resent]
+        self.assertEqual(prices, [10**9, 1125 * 10**6])
+        self.assertEqual(len(submitter.receipts), 0)
+
+    async def test_refused_resend_keeps_tracking_the_original(self):
+        eth = FakeEth()
+        # Plain transfers carry no data
+        eth.refuse.add(b"")
+        submitter = self.submitter_for(eth)
+        tx = {
+            "chainId": 1,
+            "to": CONTRACT,
+            "value": 0,
+            "gas": 21000,
+            "gasPrice": 2 * 10**9,
+        }
+        original = b"\x01" * 32
+        await submitter._on_receipt_timeout(original, (tx, "transfer", PENDING))
+        self.assertEqual(eth.sent, [])
+        self.assertEqual(len(submitter.receipts), 1)
+
+        eth.refuse.clear()
+        await submitter._on_receipt_timeout(original, (tx, "transfer", PENDING))
+        self.assertEqual(eth.gas_prices, [2250 * 10**6])
+
+    async def test_failed_last_send_gap_is_filled(self):
+        eth = FakeEth()
+        eth.refuse.add(self.rig_ids[4])
+        submitter = self.submitter_for(eth)
+        await self.run_with_miner(submitter, eth)
+
+        nonces = sorted(n for n, _ in eth.sent)
+        self.assertEqual(nonces, list(range(PENDING, 12)))
+        proofs = [n for n, d in eth.sent if d]
+        self.assertEqual(len(proofs), 4)
+        # Whichever nonce the refused proof held went to a 0-value filler
+        # (or was reused by a later proof, leaving no gap at all)
+        fillers = [n for n, d in eth.sent if not d]
+        self.assertLessEqual(len(fillers), 1)
+        self.assertEqual(submitter.nonces.take_released(), [])
+
+    async def test_list_scoreboard_sends_no_zero_proofs(self):
+        # A service scoreboard has hashrates but no hash counts
+        records = [
+            {"node_id": "0x" + f"{i:064x}", "hashrate": 10.0 + i, "timestamp": 1}
+            for i in range(3)
+        ]
+        with open(self.path, "w") as f:
+            json.dump(records, f)
+        eth = FakeEth()
+        submitter = self.submitter_for(eth)
+        await self.run_with_miner(submitter, eth)
+
+        self.assertEqual(eth.sent, [])
+        self.assertEqual(len(submitter.receipts), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from scoreboard.archive import BinaryArchive, JsonlArchive, open_archive
+from scoreboard.binary import write_snapshot
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "rigs.jsonl")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def append(self, timestamps, tail=""):
+        with open(self.path, "a") as f:
+            for t in timestamps:
+                line = {"timestamp": t, "rig_id": f"rig-{t % 7}", "hash_count": 60}
+                f.write(json.dumps(line) + "\n")
+            f.write(tail)
+
+    def test_jsonl_range_queries_match_a_full_scan(self):
+        rng = random.Random(7)
+        # Mostly ordered, with late lines mixed in
+        timestamps = [t if rng.random() > 0.05 else t - 500 for t in range(3000)]
+        self.append(timestamps, tail='not json\n{"timestamp": 10, "rig')
+        with JsonlArchive(self.path, block_bytes=2048) as archive:
+            self.assertGreater(len(archive.blocks), 10)
+            for start, end in ((100, 200), (None, 50), (2900, None), (5000, 6000)):
+                got = [r["timestamp"] for r in archive.records(start, end)]
+                expected = [
+                    t
+                    for t in timestamps
+                    if (start is None or t >= start) and (end is None or t < end)
+                ]
+                self.assertEqual(got, expected)
+            lines = list(archive.lines())
+            self.assertIsInstance(lines[0], memoryview)
+            # The partial last line is not read; the garbage line is a line
+            self.assertEqual(len(lines), 3001)
+            self.assertEqual(len(list(archive.records())), 3000)
+        # Closing with views still alive does not fail
+        self.assertEqual(json.loads(lines[0].tobytes())["timestamp"], 0)
+
+    def test_index_is_persisted_and_extended(self):
+        self.append(range(1000))
+        with JsonlArchive(self.path, block_bytes=1024) as archive:
+            blocks = archive.blocks
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+
+        self.append(range(1000, 1100))
+        with JsonlArchive(self.path, block_bytes=1024) as archive:
+            self.assertEqual(archive.blocks[: len(blocks) - 1], blocks[:-1])
+            self.assertEqual(
+                [r["timestamp"] for r in archive.records(990, 1010)],
+                list(range(990, 1010)),
+            )
+        # A different block size does not reuse the index
+        with JsonlArchive(self.path, block_bytes=4096) as archive:
+            self.assertLess(len(archive.blocks), len(blocks))
+
+    def test_binary_snapshot(self):
+        path = os.path.join(self._tmp.name, "meshnet_scoreboard.bin")
+        records = [
+            {"node_id": f"n{i}", "hashrate": i, "timestamp": 1000 + i}
+            for i in range(500)
+        ]
+        records.insert(3, {"node_id": "odd", "timestamp": 1200})
+        write_snapshot(path, records)
+        with open_archive(path, block_rows=64) as archive:
+            self.assertIsInstance(archive, BinaryArchive)
+            self.assertEqual(len(archive.blocks), 8)
+            self.assertEqual(archive.columns["hashrate"][499], 499)
+            got = list(archive.records(1198, 1201))
+            self.assertEqual(
+                [r["node_id"] for r in got], ["n198", "n199", "n200", "odd"]
+            )
+            self.assertEqual(len(list(archive.records())), 501)
+
+        with open(self.path, "w") as f:
+            f.write("{}\n")
+        with self.assertRaises(ValueError):
+            BinaryArchive(self.path)
+        # A format version this reader does not know
+        with open(path, "r+b") as f:
+            f.seek(4)
+            f.write(b"\x02")
+        with self.assertRaises(ValueError):
+            BinaryArchive(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.asgi import ScoreboardApp
+from scoreboard.history import HistoryStore
+from scoreboard.ratelimit import SubmissionLimiter
+from scoreboard.service import ScoreboardService
+
+
+async def request(app, method, path, body=b"", headers=()):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode(),
+        "headers": headers,
+    }
+    await app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+
+async def call(app, method, path, body=b""):
+    status, _, body = await request(app, method, path, body)
+    return status, json.loads(body)
+
+
+class TestScoreboardApp(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.service = ScoreboardService(self._tmp.name, compact_interval=3600)
+        self.app = ScoreboardApp(self.service)
+
+    async def asyncTearDown(self):
+        await self.app.shutdown()
+        self._tmp.cleanup()
+
+    async def test_concurrent_submits(self):
+        bodies = [
+            json.dumps({"node_id": f"n{i % 50}", "hashrate": i, "timestamp": i})
+            for i in range(500)
+        ]
+        responses = await asyncio.gather(
+            *(call(self.app, "POST", "/submit", b.encode()) for b in bodies)
+        )
+        self.assertTrue(all(status == 200 for status, _ in responses))
+
+        status, scoreboard = await call(self.app, "GET", "/scoreboard")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(scoreboard), 50)
+        self.assertEqual(self.service.store.get("n7")["hashrate"], 457)
+        # Reports queued for the same node collapse into one log record
+        self.assertLessEqual(self.service.wal.replay(lambda r: None), 500)
+
+    async def test_coalescing_keeps_newest_and_records_every_sample(self):
+        await self.app.shutdown()
+        history = HistoryStore(os.path.join(self._tmp.name, "history.sqlite3"))
+        self.service = ScoreboardService(
+            self._tmp.name, history=history, compact_interval=3600
+        )
+        self.app = ScoreboardApp(self.service)
+        await call(self.app, "GET", "/health")
+
+        # Queued together, so they collapse into one pending report
+        bodies = [
+            json.dumps({"node_id": "a", "hashrate": ts, "timestamp": ts}).encode()
+            for ts in (20, 30, 10)
+        ]
+        responses = await asyncio.gather(
+            *(call(self.app, "POST", "/submit", body) for body in bodies)
+        )
+        self.assertTrue(all(status == 200 for status, _ in responses))
+        self.assertEqual(self.service.store.get("a")["timestamp"], 30)
+        self.assertEqual(self.service.wal.replay(lambda r: None), 1)
+
+        history.flush()
+        rows = history.node_history("a")
+        self.assertEqual([r["timestamp"] for r in rows], [10, 20, 30])
+
+    async def test_rate_limit_and_load_shedding(self):
+        self.app.limiter = SubmissionLimiter(node_rate=0, node_burst=2)
+        body = json.dumps({"node_id": "a", "hashrate": 1, "timestamp": 1}).encode()
+        statuses = []
+        for _ in range(3):
+            statuses.append((await call(self.app, "POST", "/submit", body))[0])
+        self.assertEqual(statuses, [200, 200, 429])
+
+        self.app.max_queue_depth = 0
+        status, payload = await call(self.app, "POST", "/submit", body)
+        self.assertEqual((status, payload), (503, {"error": "Server busy"}))
+
+    async def test_submit_contract(self):
+        status, payload = await call(self.app, "POST", "/submit", b'{"node_id": "a"}')
+        self.assertEqual(
+            (status, payload), (400, {"error": "Missing fields: hashrate, timestamp"})
+        )
+        status, payload = await call(self.app, "POST", "/submit", b"{not json")
+        self.assertEqual(
+            (status, payload), (400, {"error": "Record must be a JSON object"})
+        )
+
+        record = {"node_id": "a", "hashrate": 1, "timestamp": 2}
+        status, payload = await call(
+            self.app, "POST", "/submit", json.dumps(record).encode()
+        )
+        self.assertEqual(payload, {"status": "success", "updated": record})
+        self.assertEqual(await call(self.app, "GET", "/scoreboard/a"), (200, record))
+        status, _ = await call(self.app, "GET", "/scoreboard/b")
+        self.assertEqual(status, 404)
+
+    async def test_truncated_gzip_batch_is_rejected(self):
+        raw = "".join(
+            json.dumps({"node_id": f"n{i}", "hashrate": i, "timestamp": i}) + "\n"
+            for i in range(1000)
+        )
+        body = gzip.compress(raw.encode())
+        headers = [(b"content-encoding", b"gzip")]
+        status, _, payload = await request(
+            self.app, "POST", "/submit/batch", body[: len(body) // 2], headers
+        )
+        self.assertEqual(status, 400)
+        self.assertEqual(json.loads(payload), {"error": "Truncated gzip body"})
+        self.assertEqual(len(self.service.store), 0)
+
+        status, _, payload = await request(
+            self.app, "POST", "/submit/batch", body, headers
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(payload)["counts"], {"applied": 1000})
+
+    async def test_scoreboard_etag_and_gzip(self):
+        record = {"node_id": "a", "hashrate": 1, "timestamp": 2}
+        await call(self.app, "POST", "/submit", json.dumps(record).encode())
+
+        status, headers, body = await request(
+            self.app, "GET", "/scoreboard", headers=[(b"accept-encoding", b"gzip")]
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertEqual(json.loads(gzip.decompress(body)), [record])
+        etag = headers[b"etag"]
+
+        status, _, body = await request(
+            self.app, "GET", "/scoreboard", headers=[(b"if-none-match", etag)]
+        )
+        self.assertEqual((status, body), (304, b""))
+
+        self.app.cache.max_staleness = 0
+        record["hashrate"] = 5
+        await call(self.app, "POST", "/submit", json.dumps(record).encode())
+        status, headers, _ = await request(
+            self.app, "GET", "/scoreboard", headers=[(b"if-none-match", etag)]
+        )
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers[b"etag"], etag)
+
+    async def test_scoreboard_changes(self):
+        for i in range(3):
+            record = {"node_id": f"n{i}", "hashrate": i, "timestamp": i}
+            await call(self.app, "POST", "/submit", json.dumps(record).encode())
+        status, first = await call(self.app, "GET", "/scoreboard/changes?since=0")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(first["changes"]), 3)
+
+        record = {"node_id": "n1", "hashrate": 9, "timestamp": 9}
+        await call(self.app, "POST", "/submit", json.dumps(record).encode())
+        query = f"since={first['version']}&epoch={first['epoch']}"
+        status, delta = await call(self.app, "GET", f"/scoreboard/changes?{query}")
+        self.assertEqual((delta["full"], delta["changes"]), (False, [record]))
+
+        # A version from another server instance gets the full document
+        query = f"since={first['version']}&epoch=other"
+        status, full = await call(self.app, "GET", f"/scoreboard/changes?{query}")
+        self.assertTrue(full["full"])
+        self.assertEqual(len(full["scoreboard"]), 3)
+
+        status, _ = await call(self.app, "GET", "/scoreboard/changes?since=x")
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import gzip
+import tempfile
+import unittest
+
+from scoreboard.batch import BatchFormatError, decode_body, parse_batch
+from scoreboard.service import ScoreboardService
+
+
+class TestScoreboardBatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.service = ScoreboardService(self._tmp.name, compact_interval=3600)
+        self.service.start()
+
+    def tearDown(self):
+        self.service.stop()
+        self._tmp.cleanup()
+
+    def test_parse_ndjson_and_array(self):
+        ndjson = b'{"node_id": "a", "hashrate": 1, "timestamp": 1}\n\nnot json\n'
+        records, errors = parse_batch(ndjson)
+        self.assertEqual(len(records), 2)
+        self.assertIn(1, errors)
+
+        records, errors = parse_batch(b'[{"node_id": "a"}, {"node_id": "b"}]')
+        self.assertEqual([r["node_id"] for r in records], ["a", "b"])
+        self.assertEqual(errors, {})
+
+        with self.assertRaises(BatchFormatError):
+            parse_batch(b"[{")
+
+    def test_decode_gzip_body(self):
+        raw = b"".join(
+            b'{"node_id": "n%d", "hashrate": 1, "timestamp": 1}\n' % i
+            for i in range(1000)
+        )
+        body = gzip.compress(raw)
+        self.assertEqual(decode_body(body, "gzip"), raw)
+        self.assertEqual(decode_body(raw, None), raw)
+        for bad in (body[: len(body) // 2], body[:-4], body + b"junk"):
+            with self.assertRaises(BatchFormatError):
+                decode_body(bad, "gzip")
+        with self.assertRaises(BatchFormatError):
+            decode_body(body, "gzip", limit=100)
+
+    def test_last_writer_wins_by_timestamp(self):
+        self.service.submit({"node_id": "a", "hashrate": 5, "timestamp": 50})
+        results = self.service.submit_batch(
+            [
+                {"node_id": "a", "hashrate": 1, "timestamp": 10},
+                {"node_id": "b", "hashrate": 2, "timestamp": 30},
+                {"node_id": "b", "hashrate": 3, "timestamp": 20},
+                {"node_id": "c", "hashrate": "fast", "timestamp": 1},
+                {"node_id": "a", "hashrate": 9, "timestamp": 60},
+            ]
+        )
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["superseded", "applied", "superseded", "invalid", "applied"],
+        )
+        self.assertEqual(self.service.store.get("a")["hashrate"], 9)
+        self.assertEqual(self.service.store.get("b")["hashrate"], 2)
+
+        results = self.service.submit_batch(
+            [{"node_id": "b", "hashrate": 7, "timestamp": 25}]
+        )
+        self.assertEqual(results[0]["status"], "stale")
+        self.assertEqual(self.service.store.get("b")["hashrate"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
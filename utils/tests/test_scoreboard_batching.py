@@ -0,0 +1,58 @@
+import unittest
+
+from scoreboard.batching import MAX_BATCH_PROOFS, BatchSizer
+
+
+def gas(size, overhead=50000, per_proof=40000):
+    return overhead + per_proof * size
+
+
+class TestBatchSizer(unittest.TestCase):
+    def test_starts_at_contract_maximum(self):
+        sizer = BatchSizer(gas_cap=30000000)
+        self.assertIsNone(sizer.model())
+        self.assertEqual(sizer.size(), MAX_BATCH_PROOFS)
+
+    def test_fits_overhead_and_per_proof_gas(self):
+        sizer = BatchSizer(gas_cap=30000000)
+        for size in (10, 4, 7, 10):
+            sizer.observe(size, gas(size))
+        overhead, per_proof = sizer.model()
+        self.assertAlmostEqual(overhead, 50000, delta=1)
+        self.assertAlmostEqual(per_proof, 40000, delta=1)
+        self.assertAlmostEqual(sizer.predict(3), gas(3), delta=1)
+
+    def test_shrinks_batches_under_the_gas_cap(self):
+        sizer = BatchSizer(gas_cap=320000, headroom=1.2)
+        sizer.observe(10, gas(10))
+        sizer.observe(5, gas(5))
+        # (320000 / 1.2 - 50000) / 40000 = 5.4
+        self.assertEqual(sizer.size(), 5)
+        self.assertLessEqual(sizer.gas_limit(gas(5)), 320000)
+
+    def test_single_observed_size_overestimates(self):
+        sizer = BatchSizer(gas_cap=300000, headroom=1.0)
+        sizer.observe(10, gas(10))
+        overhead, per_proof = sizer.model()
+        self.assertEqual(overhead, 0)
+        self.assertEqual(per_proof, gas(10) / 10)
+        self.assertLessEqual(sizer.predict(sizer.size()), 300000)
+
+    def test_follows_rising_gas_costs(self):
+        sizer = BatchSizer(gas_cap=1000000, headroom=1.0, decay=0.5)
+        for size in (10, 6) * 3:
+            sizer.observe(size, gas(size))
+        self.assertEqual(sizer.size(), 10)
+        for size in (10, 6) * 6:
+            sizer.observe(size, gas(size, per_proof=120000))
+        self.assertEqual(sizer.size(), 7)
+
+    def test_never_below_one(self):
+        sizer = BatchSizer(gas_cap=100000)
+        sizer.observe(2, gas(2, per_proof=500000))
+        self.assertEqual(sizer.size(), 1)
+        self.assertEqual(sizer.gas_limit(500000), 100000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from scoreboard.binary import (
+    binary_path_for,
+    decode,
+    encode,
+    is_binary_snapshot,
+    read_header,
+)
+from scoreboard.store import ScoreboardStore, open_store, read_document
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def test_round_trip_list_layout(self):
+        document = [
+            {"node_id": "a", "hashrate": 10, "timestamp": 1},
+            {"node_id": "b", "hashrate": 2.5, "timestamp": 2},
+            {"hashrate": 5},
+            {"node_id": "a", "hashrate": 99, "timestamp": 3},
+            {"node_id": "c", "hashrate": 2**70, "timestamp": 4},
+            {"timestamp": 5, "node_id": "d", "hashrate": 1},
+        ]
+        self.assertEqual(decode(encode(document)), document)
+        self.assertEqual(decode(encode([])), [])
+
+    def test_round_trip_mixed_rows(self):
+        # Every other row overflows (float hashrate), as do the last two
+        document = [
+            {"node_id": f"n{i}", "hashrate": i + 0.5 if i % 2 else i, "timestamp": i}
+            for i in range(1000)
+        ]
+        document += [{"hashrate": 1}, {"node_id": "z", "hashrate": 2.5}]
+        data = encode(document)
+        self.assertEqual(read_header(data).rows, 500)
+        self.assertEqual(decode(data), document)
+
+    def test_round_trip_rigs_layout(self):
+        document = {
+            "rigs": [
+                {"rig_id": "0xaa", "hash_count": 1, "wallet_address": "0x1"},
+                {"rig_id": "0xbb", "hash_count": 2, "wallet_address": "0x1"},
+                {"rig_id": "0xcc", "hash_count": None, "wallet_address": "0x2"},
+            ],
+            "epoch": 7,
+        }
+        self.assertEqual(decode(encode(document)), document)
+        document = {"rigs": [{"rig_id": "0xaa", "hash_count": 1.5}]}
+        self.assertEqual(decode(encode(document)), document)
+
+    def test_read_header(self):
+        document = {
+            "rigs": [{"rig_id": "0xaa", "hash_count": 1}, {"rig_id": 5}],
+            "epoch": 7,
+        }
+        data = encode(document)
+        header = read_header(data)
+        self.assertEqual(header.layout, "rigs")
+        self.assertEqual(header.rows, 1)
+        self.assertEqual(header.schema, [("rig_id", "s"), ("hash_count", "q")])
+        start, end = header.strings
+        self.assertEqual((header.string_count, data[start:end]), (1, b"0xaa"))
+        self.assertEqual(header.columns, end)
+        with self.assertRaises(ValueError):
+            read_header(b"MSHX" + data[4:])
+
+    def test_ids_are_interned(self):
+        row = {"node_id": "x" * 64, "hashrate": 1, "timestamp": 1}
+        one = len(encode([dict(row)]))
+        many = len(encode([dict(row, node_id="x" * 64) for _ in range(100)]))
+        self.assertLess(many - one, 100 * 20)
+
+    def test_readers_prefer_fresh_binary(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "meshnet_scoreboard.json")
+            store = ScoreboardStore()
+            store.upsert({"node_id": "a", "hashrate": 1, "timestamp": 1})
+            store.save(path, binary=True)
+            self.assertTrue(is_binary_snapshot(binary_path_for(path)))
+            self.assertEqual(open_store(path).get("a")["hashrate"], 1)
+
+            # A newer JSON file (e.g. pulled from git) wins over a stale binary
+            with open(path, "w") as f:
+                json.dump([{"node_id": "a", "hashrate": 2, "timestamp": 2}], f)
+            later = time.time() + 10
+            os.utime(path, (later, later))
+            self.assertEqual(read_document(path)[0]["hashrate"], 2)
+            self.assertEqual(open_store(path).get("a")["hashrate"], 2)
+
+            # Only the binary snapshot left
+            os.remove(path)
+            self.assertEqual(read_document(path)[0]["hashrate"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from scoreboard.dedup import Deduplicator, ScalableBloomFilter, record_key
+from scoreboard.history import HistoryStore
+from scoreboard.service import ScoreboardService
+
+
+class TestScalableBloomFilter(unittest.TestCase):
+    def test_grows_and_keeps_the_error_rate(self):
+        seen = ScalableBloomFilter(capacity=1000, error_rate=0.01)
+        keys = [record_key(f"rig-{i}", i) for i in range(10000)]
+        for key in keys:
+            seen.add(key)
+        self.assertEqual(len(seen), 10000)
+        self.assertGreater(len(seen.filters), 1)
+        self.assertTrue(all(key in seen for key in keys))
+
+        probes = 20000
+        hits = sum(record_key(f"other-{i}", i) in seen for i in range(probes))
+        self.assertLess(seen.current_error_rate(), 0.01)
+        # Observed rate, with room for sampling noise
+        self.assertLess(hits / probes, 0.015)
+        # Well under a set of 10k byte strings
+        self.assertLess(seen.memory_bytes(), 30000)
+
+    def test_confirms_only_filter_hits(self):
+        stored = {("a", 1)}
+        calls = []
+
+        def confirm(node_id, timestamp):
+            calls.append((node_id, timestamp))
+            return (node_id, timestamp) in stored
+
+        dedup = Deduplicator(confirm)
+        self.assertFalse(dedup.is_duplicate("a", 1))
+        self.assertEqual(calls, [])
+        dedup.add("a", 1)
+        dedup.add("b", 2)
+        self.assertTrue(dedup.is_duplicate("a", 1))
+        # Seen, but no longer in the store: counted as a false positive
+        self.assertFalse(dedup.is_duplicate("b", 2))
+        metrics = dedup.metrics()
+        self.assertEqual(metrics["exact_checks"], 2)
+        self.assertEqual(metrics["duplicates"], 1)
+        self.assertEqual(metrics["false_positives"], 1)
+        self.assertEqual(metrics["observed_fp_rate"], 0.5)
+
+    def test_check_and_add_claims_new_keys(self):
+        stored = set()
+        calls = []
+
+        def confirm(node_id, timestamp):
+            calls.append((node_id, timestamp))
+            return (node_id, timestamp) in stored
+
+        dedup = Deduplicator(confirm)
+        self.assertFalse(dedup.check_and_add("a", 1))
+        # Claimed but not stored yet: a concurrent repeat is a duplicate
+        self.assertTrue(dedup.check_and_add("a", 1))
+        self.assertEqual(calls, [])
+        stored.add(("a", 1))
+        dedup.release([("a", 1)])
+        self.assertTrue(dedup.check_and_add("a", 1))
+        self.assertEqual(calls, [("a", 1)])
+
+        # Older than the seeded range: a filter miss is confirmed too
+        dedup.seeded_since = 100
+        stored.add(("b", 50))
+        self.assertTrue(dedup.check_and_add("b", 50))
+        self.assertFalse(dedup.check_and_add("b", 150))
+        self.assertEqual(calls, [("a", 1), ("b", 50)])
+
+
+class TestServiceDedup(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def service(self):
+        history = HistoryStore(os.path.join(self._tmp.name, "history.sqlite3"))
+        service = ScoreboardService(
+            self._tmp.name,
+            history=history,
+            compact_interval=3600,
+            dedup=ScalableBloomFilter(100),
+        )
+        service.start()
+        return service
+
+    def test_repeated_reports_are_not_logged_again(self):
+        service = self.service()
+        batch = [
+            {"node_id": "a", "hashrate": 5, "timestamp": 50},
+            {"node_id": "b", "hashrate": 7, "timestamp": 70},
+        ]
+        self.assertEqual(
+            [r["status"] for r in service.submit_batch(batch)], ["applied", "applied"]
+        )
+        log_size = os.path.getsize(service.wal.path)
+        batch.append({"node_id": "a", "hashrate": 6, "timestamp": 60})
+        statuses = [r["status"] for r in service.submit_batch(batch)]
+        self.assertEqual(statuses, ["duplicate", "duplicate", "applied"])
+        self.assertGreater(os.path.getsize(service.wal.path), log_size)
+        self.assertEqual(service.metrics()["dedup"]["duplicates"], 2)
+        service.stop()
+
+        # The filter is seeded from the history after a restart, and a@50 is
+        # found there although the store has moved on to a@60
+        service = self.service()
+        results = service.submit_batch(batch)
+        self.assertEqual([r["status"] for r in results], ["duplicate"] * 3)
+        self.assertEqual(service.metrics()["dedup"]["false_positives"], 0)
+        service.stop()
+
+    def test_every_ingest_path(self):
+        service = self.service()
+        record = {"node_id": "a", "hashrate": 5, "timestamp": 50}
+        self.assertTrue(service.submit(record))
+        self.assertFalse(service.submit(dict(record)))
+        older = {"node_id": "a", "hashrate": 4, "timestamp": 40}
+        self.assertEqual(service.submit_many([record, older, older]), [older])
+        log_size = os.path.getsize(service.wal.path)
+        self.assertEqual(service.submit_many([record, older]), [])
+        statuses = [r["status"] for r in service.submit_batch([older, record])]
+        self.assertEqual(statuses, ["duplicate", "duplicate"])
+
+        service.history.flush()
+        rows = service.history.node_history("a")
+        self.assertEqual([r["timestamp"] for r in rows], [40, 50])
+        self.assertEqual(service.metrics()["dedup"]["duplicates"], 6)
+        self.assertEqual(os.path.getsize(service.wal.path), log_size)
+        service.stop()
+
+    def test_concurrent_identical_reports(self):
+        service = self.service()
+        record = {"node_id": "a", "hashrate": 5, "timestamp": 50}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            accepted = list(pool.map(lambda _: service.submit(dict(record)), range(32)))
+        self.assertEqual(accepted.count(True), 1)
+        service.history.flush()
+        self.assertEqual(len(service.history.node_history("a")), 1)
+        service.stop()
+
+    def test_seeds_only_recent_history(self):
+        service = self.service()
+        now = int(time.time())
+        service.submit_many(
+            [
+                {"node_id": "a", "hashrate": 1, "timestamp": now - 30 * 86400},
+                {"node_id": "a", "hashrate": 2, "timestamp": now},
+            ]
+        )
+        service.stop()
+
+        service = self.service()
+        self.assertEqual(service.metrics()["dedup"]["keys"], 1)
+        old = {"node_id": "a", "hashrate": 1, "timestamp": now - 30 * 86400}
+        self.assertFalse(service.submit(old))
+        service.stop()
+
+    def test_needs_history(self):
+        with self.assertRaises(ValueError):
+            ScoreboardService(self._tmp.name, dedup=ScalableBloomFilter(100))
+
+
+if __name__ == "__main__":
+    unittest.main()
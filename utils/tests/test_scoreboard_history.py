@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from scoreboard.history import HistoryStore
+from scoreboard.rollups import Rollups
+from scoreboard.service import ScoreboardService
+
+
+class FailingRollups(Rollups):
+    """Fails the transaction of the next ``failures`` flushes"""
+
+    failures = 0
+
+    def apply(self, conn, rows):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        super().apply(conn, rows)
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.history = HistoryStore(os.path.join(self._tmp.name, "history.sqlite3"))
+        self.service = ScoreboardService(
+            self._tmp.name, history=self.history, compact_interval=3600
+        )
+        self.service.start()
+
+    def tearDown(self):
+        self.service.stop()
+        self._tmp.cleanup()
+
+    def test_range_queries(self):
+        self.service.submit_many(
+            [
+                {"node_id": node, "hashrate": ts * 10, "timestamp": ts}
+                for ts in range(10)
+                for node in ("a", "b")
+            ]
+        )
+        self.history.flush()
+        # Durable in the log and written to the history
+        self.assertEqual(self.service.metrics()["backlog"], 0)
+
+        rows = self.history.node_history("a", start=3, end=6)
+        self.assertEqual([r["timestamp"] for r in rows], [3, 4, 5])
+        self.assertTrue(all(r["node_id"] == "a" for r in rows))
+        self.assertEqual(len(self.history.fleet_history(start=8)), 4)
+        self.assertEqual(len(self.history.fleet_history(limit=5)), 5)
+
+    def test_batch_records_every_sample(self):
+        self.service.submit({"node_id": "b", "hashrate": 1, "timestamp": 100})
+        samples = [{"node_id": "a", "hashrate": ts, "timestamp": ts} for ts in range(5)]
+        results = self.service.submit_batch(
+            samples
+            + [
+                {"node_id": "b", "hashrate": 2, "timestamp": 50},
+                {"node_id": "a", "hashrate": 3, "timestamp": 3},
+            ]
+        )
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["superseded"] * 4 + ["applied", "stale", "duplicate"],
+        )
+        self.history.flush()
+
+        rows = self.history.node_history("a")
+        self.assertEqual([r["timestamp"] for r in rows], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [r["timestamp"] for r in self.history.node_history("b")], [50, 100]
+        )
+        # The live scoreboard still holds only the newest report
+        self.assertEqual(self.service.store.get("a")["timestamp"], 4)
+        self.assertEqual(self.service.store.get("b")["timestamp"], 100)
+        self.assertEqual(self.history.latest(), self.service.store.to_document())
+
+    def test_export_matches_store(self):
+        self.service.submit({"node_id": "b", "hashrate": 1, "timestamp": 1})
+        self.service.submit({"node_id": "a", "hashrate": 2.5, "timestamp": 2})
+        self.service.submit({"node_id": "b", "hashrate": 3, "timestamp": 3})
+        self.history.flush()
+
+        path = os.path.join(self._tmp.name, "export.json")
+        self.history.export_snapshot(path)
+        with open(path) as f:
+            self.assertEqual(json.load(f), self.service.store.to_document())
+
+    def test_failed_flush_keeps_rows(self):
+        rollups = FailingRollups()
+        history = HistoryStore(
+            os.path.join(self._tmp.name, "failing.sqlite3"), rollups=rollups
+        )
+        history.record([{"node_id": "a", "hashrate": 1, "timestamp": 5}])
+        rollups.failures = 1
+        with self.assertRaises(sqlite3.OperationalError):
+            history.flush()
+        self.assertEqual(history.node_history("a"), [])
+        # Still counts towards the backlog the Flask app sheds load on
+        self.assertEqual(history.backlog(), 1)
+        self.assertTrue(history.contains("a", 5))
+
+        history.record([{"node_id": "a", "hashrate": 2, "timestamp": 6}])
+        self.assertEqual(history.flush(), 2)
+        self.assertEqual(history.backlog(), 0)
+        self.assertEqual([r["timestamp"] for r in history.node_history("a")], [5, 6])
+        self.assertTrue(history.contains("a", 5))
+        self.assertFalse(history.contains("a", 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from scoreboard.nonces import (
+    BlockReceiptTracker,
+    NonceManager,
+    ReceiptTracker,
+    is_nonce_too_low,
+)
+
+
+class TestNonceManager(unittest.TestCase):
+    def test_hands_out_nonces_locally(self):
+        fetches = []
+
+        def fetch():
+            fetches.append(1)
+            return 7
+
+        nonces = NonceManager(fetch)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            handed = list(pool.map(lambda _: nonces.next(), range(200)))
+        self.assertEqual(sorted(handed), list(range(7, 207)))
+        self.assertEqual(len(fetches), 1)
+
+    def test_released_nonces_fill_gaps_first(self):
+        nonces = NonceManager(lambda: 0)
+        first = [nonces.next() for _ in range(5)]
+        nonces.release(first[3])
+        nonces.release(first[1])
+        nonces.release(first[1])
+        self.assertEqual([nonces.next() for _ in range(3)], [1, 3, 5])
+
+    def test_take_released_leftovers(self):
+        nonces = NonceManager(lambda: 0)
+        handed = [nonces.next() for _ in range(4)]
+        # The sends for the last two failed and nothing came after them
+        nonces.release(handed[3])
+        nonces.release(handed[2])
+        self.assertEqual(nonces.take_released(), [2, 3])
+        self.assertEqual(nonces.take_released(), [])
+        self.assertEqual(nonces.next(), 4)
+
+    def test_seeded_without_fetch(self):
+        nonces = NonceManager()
+        self.assertEqual(nonces.resync(12), 12)
+        self.assertEqual([nonces.next(), nonces.next()], [12, 13])
+        self.assertEqual(nonces.resync(20), 20)
+
+    def test_resync_after_nonce_too_low(self):
+        pending = [0]
+        nonces = NonceManager(lambda: pending[0])
+        self.assertEqual(nonces.next(), 0)
+        nonces.release(0)
+        # Another sender used nonces 0-9
+        pending[0] = 10
+        self.assertEqual(nonces.resync(), 10)
+        self.assertEqual(nonces.next(), 10)
+        self.assertTrue(is_nonce_too_low(ValueError("Nonce too low: next nonce 10")))
+        self.assertFalse(is_nonce_too_low(ValueError("insufficient funds")))
+
+
+class TestReceiptTracker(unittest.TestCase):
+    def test_poll_reports_receipts_and_timeouts(self):
+        now = [0.0]
+        mined = {}
+        seen = []
+        tracker = ReceiptTracker(
+            mined.get,
+            on_receipt=lambda h, r, c: seen.append(("receipt", h, c)),
+            on_timeout=lambda h, c: seen.append(("timeout", h, c)),
+            timeout=10,
+            clock=lambda: now[0],
+        )
+        for tx in ("a", "b", "c"):
+            tracker.track(tx, tx.upper())
+        mined["b"] = {"status": 1}
+        tracker.poll()
+        self.assertEqual(seen, [("receipt", "b", "B")])
+        self.assertEqual(len(tracker), 2)
+
+        mined["a"] = {"status": 1}
+        now[0] = 11
+        tracker.poll()
+        self.assertEqual(seen[1:], [("receipt", "a", "A"), ("timeout", "c", "C")])
+        self.assertEqual(len(tracker), 0)
+
+    def test_background_polling(self):
+        mined = {}
+        tracker = ReceiptTracker(mined.get, poll_interval=0.01)
+        tracker.start()
+        try:
+            tracker.track("a")
+            self.assertFalse(tracker.wait(timeout=0.05))
+            threading.Timer(0.02, mined.__setitem__, ("a", {"status": 1})).start()
+            self.assertTrue(tracker.wait(timeout=5))
+        finally:
+            tracker.stop()
+
+
+class FakeChain:
+    def __init__(self):
+        self.blocks = [[]]
+        self.calls = {"block_number": 0, "block": 0, "receipt": 0}
+        self.flaky = set()
+
+    def mine(self, *hashes):
+        self.blocks.append(list(hashes))
+
+    async def block_number(self):
+        self.calls["block_number"] += 1
+        return len(self.blocks) - 1
+
+    async def block_transactions(self, number):
+        self.calls["block"] += 1
+        return self.blocks[number]
+
+    async def get_receipt(self, tx_hash):
+        self.calls["receipt"] += 1
+        if tx_hash in self.flaky:
+            self.flaky.discard(tx_hash)
+            raise ConnectionError("node unavailable")
+        return {"status": 1, "hash": tx_hash}
+
+
+class TestBlockReceiptTracker(unittest.IsolatedAsyncioTestCase):
+    async def test_receipt_calls_follow_blocks(self):
+        chain = FakeChain()
+        seen = []
+        tracker = BlockReceiptTracker(
+            chain.block_number,
+            chain.block_transactions,
+            chain.get_receipt,
+            on_receipt=lambda h, r, c: seen.append((h, c)),
+        )
+        tracker.block = 0
+        for i in range(100):
+            tracker.track(f"tx{i}", i)
+        chain.mine(*(f"tx{i}" for i in range(60)), "other")
+        chain.mine()
+        await tracker.poll()
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(len(tracker), 40)
+        # Nothing new: no block or receipt lookups
+        await tracker.poll()
+        self.assertEqual(chain.calls["block"], 2)
+        self.assertEqual(chain.calls["receipt"], 60)
+
+        chain.mine(*(f"tx{i}" for i in range(60, 100)))
+        await tracker.poll()
+        self.assertEqual(len(tracker), 0)
+        self.assertEqual(chain.calls["block"], 3)
+        self.assertEqual(chain.calls["receipt"], 100)
+
+    async def test_failed_lookup_retried_and_timeouts(self):
+        chain = FakeChain()
+        now = [0.0]
+        seen = []
+
+        async def on_timeout(tx_hash, context):
+            seen.append(("timeout", tx_hash))
+
+        tracker = BlockReceiptTracker(
+            chain.block_number,
+            chain.block_transactions,
+            chain.get_receipt,
+            on_receipt=lambda h, r, c: seen.append(("receipt", h)),
+            on_timeout=on_timeout,
+            timeout=10,
+            clock=lambda: now[0],
+        )
+        tracker.block = 0
+        tracker.track("a")
+        tracker.track("b")
+        chain.flaky.add("a")
+        chain.mine("a")
+        await tracker.poll()
+        self.assertEqual(seen, [])
+        now[0] = 11
+        await tracker.poll()
+        self.assertEqual(seen, [("receipt", "a"), ("timeout", "b")])
+
+    async def test_background_polling(self):
+        chain = FakeChain()
+        tracker = BlockReceiptTracker(
+            chain.block_number,
+            chain.block_transactions,
+            chain.get_receipt,
+            poll_interval=0.01,
+        )
+        await tracker.start()
+        try:
+            self.assertTrue(await tracker.wait(timeout=1))
+            tracker.track("a")
+            self.assertFalse(await tracker.wait(timeout=0.05))
+            chain.mine("a")
+            self.assertTrue(await tracker.wait(timeout=5))
+        finally:
+            await tracker.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import importlib.util
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+from scoreboard.publisher import WriteBehindPublisher
+from scoreboard.store import SCORE_FIELDS, ScoreboardStore
+
+HAS_GIT = importlib.util.find_spec("git") is not None
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@unittest.skipUnless(HAS_GIT, "GitPython is not installed")
+class TestWriteBehindPublisher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.remote = os.path.join(self._tmp.name, "scoreboard.git")
+        seed = os.path.join(self._tmp.name, "seed")
+        git("init", "-q", "--bare", "-b", "main", self.remote)
+        git("init", "-q", "-b", "main", seed)
+        with open(os.path.join(seed, "meshnet_scoreboard.json"), "w") as f:
+            json.dump([], f)
+        git("add", ".", cwd=seed)
+        git(
+            "-c",
+            "user.name=seed",
+            "-c",
+            "user.email=seed@example.com",
+            "commit",
+            "-q",
+            "-m",
+            "Empty scoreboard",
+            cwd=seed,
+        )
+        git("push", "-q", self.remote, "main", cwd=seed)
+
+        self.store = ScoreboardStore()
+        self.publisher = WriteBehindPublisher(
+            self.remote, os.path.join(self._tmp.name, "clone"), self.store, binary=True
+        )
+        repo = self.publisher.open_working_copy()
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "publisher")
+            config.set_value("user", "email", "publisher@example.com")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def submit(self, node_id, hashrate, timestamp):
+        record = {"node_id": node_id, "hashrate": hashrate, "timestamp": timestamp}
+        self.store.upsert(record, SCORE_FIELDS)
+        self.publisher.mark_dirty(node_id)
+
+    def remote_log(self):
+        result = subprocess.run(
+            ["git", "log", "--format=%s", "main"],
+            cwd=self.remote,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.splitlines()
+
+    def remote_files(self):
+        result = subprocess.run(
+            ["git", "ls-tree", "--name-only", "main"],
+            cwd=self.remote,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return sorted(result.stdout.split())
+
+    def test_flush_coalesces_updates(self):
+        self.submit("a", 5, 1)
+        self.submit("b", 7, 2)
+        self.submit("a", 6, 3)
+        self.assertEqual(self.publisher.pending_count(), 2)
+        self.assertEqual(self.publisher.flush(), 2)
+        self.assertEqual(self.publisher.pending_count(), 0)
+
+        log = self.remote_log()
+        self.assertEqual(len(log), 2)
+        self.assertTrue(log[0].startswith("Update 2 nodes at "))
+        self.assertEqual(
+            self.remote_files(), ["meshnet_scoreboard.bin", "meshnet_scoreboard.json"]
+        )
+        with open(self.publisher.scoreboard_path) as f:
+            self.assertEqual(json.load(f), self.store.snapshot())
+        # Nothing changed since: no commit
+        self.assertEqual(self.publisher.flush(), 0)
+        self.assertEqual(len(self.remote_log()), 2)
+
+    def test_new_binary_snapshot_is_published(self):
+        self.publisher.binary = False
+        self.submit("a", 5, 1)
+        self.assertEqual(self.publisher.flush(), 1)
+        self.assertEqual(self.remote_files(), ["meshnet_scoreboard.json"])
+
+        # Only the (untracked) binary snapshot differs from the repository
+        self.publisher.binary = True
+        self.publisher.mark_dirty("a")
+        self.assertEqual(self.publisher.flush(), 1)
+        self.assertEqual(
+            self.remote_files(), ["meshnet_scoreboard.bin", "meshnet_scoreboard.json"]
+        )
+
+    def test_failed_push_re_marks_nodes(self):
+        self.submit("a", 5, 1)
+        self.publisher.repo.git.remote("set-url", "--push", "origin", "/nonexistent")
+        self.assertEqual(self.publisher.flush(), 0)
+        self.assertEqual(self.publisher.pending_count(), 1)
+        self.assertEqual(len(self.remote_log()), 1)
+
+        self.publisher.repo.git.remote("set-url", "--push", "origin", self.remote)
+        self.submit("b", 7, 2)
+        self.assertEqual(self.publisher.flush(), 2)
+        self.assertEqual(len(self.remote_log()), 2)
+        self.assertEqual(self.publisher.pending_count(), 0)
+
+    def test_empty_flush_and_rigs_layout(self):
+        self.assertEqual(self.publisher.flush(), 0)
+        self.assertEqual(len(self.remote_log()), 1)
+
+        self.store.replace({"rigs": [{"rig_id": "0xaa", "hash_count": 5}]})
+        self.publisher.mark_dirty("0xaa")
+        self.assertEqual(self.publisher.flush(), 1)
+        self.assertTrue(self.remote_log()[0].startswith("Update from 0xaa at "))
+
+    def test_start_publishes_recovered_nodes(self):
+        self.store.upsert({"node_id": "a", "hashrate": 5, "timestamp": 1})
+        self.publisher.start()
+        self.publisher.stop()
+        self.assertEqual(self.remote_log()[0], "Update from a at 1")
+        self.assertEqual(self.publisher.pending_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
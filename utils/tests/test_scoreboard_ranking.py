@@ -0,0 +1,48 @@
+import random
+import unittest
+
+from scoreboard.ranking import RankIndex
+from scoreboard.store import ScoreboardStore
+
+
+class TestRankIndex(unittest.TestCase):
+    def test_matches_full_sort(self):
+        rng = random.Random(7)
+        rates = {f"n{i}": rng.randint(0, 50) for i in range(200)}
+        index = RankIndex(seed=1)
+        index.build(list(rates.items()))
+
+        for _ in range(2000):
+            node_id = f"n{rng.randrange(300)}"
+            if rng.random() < 0.05:
+                index.remove(node_id)
+                rates[node_id] = None
+            else:
+                rates[node_id] = rng.randint(0, 50)
+                index.update(node_id, rates[node_id])
+
+        ordered = sorted((-h, n) for n, h in rates.items() if h is not None)
+        expected = [(n, -h) for h, n in ordered]
+        self.assertEqual(len(index), len(expected))
+        self.assertEqual(index.top(25), expected[:25])
+        for rank, (node_id, _) in enumerate(expected, start=1):
+            self.assertEqual(index.rank(node_id), rank)
+            self.assertEqual(index.at(rank)[0], node_id)
+        self.assertEqual(index.value_at_percentile(100), expected[0][1])
+        self.assertEqual(index.value_at_percentile(0), expected[-1][1])
+
+    def test_store_standing(self):
+        store = ScoreboardStore(ranked=True)
+        for i, rate in enumerate([30, 10, 20, 40, 25]):
+            store.upsert({"node_id": f"n{i}", "hashrate": rate, "timestamp": i})
+        store.upsert({"node_id": "n1", "hashrate": 50}, fields=("hashrate",))
+
+        self.assertEqual([r["node_id"] for r in store.top(2)], ["n1", "n3"])
+        standing = store.standing("n2")
+        self.assertEqual((standing["rank"], standing["of"]), (5, 5))
+        self.assertEqual(standing["percentile"], 0.0)
+        self.assertEqual(store.score_at_percentile(50), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from scoreboard.replica import ScoreboardReplica
+from scoreboard.store import ScoreboardStore
+
+
+class TestScoreboardReplica(unittest.TestCase):
+    def setUp(self):
+        self.server = ScoreboardStore(change_log=3)
+        self.server.replace(
+            [{"node_id": f"n{i}", "hashrate": i, "timestamp": i} for i in range(5)]
+        )
+        self.fetched = []
+
+        def fetch(since, epoch):
+            response = self.server.changes_since(since, epoch)
+            self.fetched.append(response)
+            return response
+
+        self.replica = ScoreboardReplica("http://scoreboard", fetch=fetch)
+
+    def test_incremental_sync(self):
+        self.assertEqual(self.replica.refresh(), 5)
+        self.assertTrue(self.fetched[-1]["full"])
+
+        self.server.upsert({"node_id": "n1", "hashrate": 10, "timestamp": 10})
+        self.server.upsert({"node_id": "n1", "hashrate": 11, "timestamp": 11})
+        self.server.upsert({"node_id": "n9", "hashrate": 9, "timestamp": 9})
+        # Two changes to n1 arrive as its latest state only
+        self.assertEqual(self.replica.refresh(), 2)
+        self.assertFalse(self.fetched[-1]["full"])
+        self.assertEqual(self.replica.refresh(), 0)
+        self.assertEqual(self.replica.store.to_document(), self.server.to_document())
+
+    def test_truncated_log_falls_back_to_full(self):
+        self.replica.refresh()
+        for i in range(4):
+            self.server.upsert({"node_id": f"m{i}", "hashrate": i, "timestamp": i})
+        self.replica.refresh()
+        self.assertTrue(self.fetched[-1]["full"])
+        self.assertEqual(self.replica.store.to_document(), self.server.to_document())
+
+    def test_rigs_layout(self):
+        self.server.replace({"rigs": [{"rig_id": "r1", "hash_count": 1}]})
+        self.replica.refresh()
+        self.server.upsert({"rig_id": "r1", "hash_count": 5})
+        self.replica.refresh()
+        self.assertEqual(
+            self.replica.store.to_document(),
+            {"rigs": [{"rig_id": "r1", "hash_count": 5}]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.rig_agent import RigAgent, session_submission
+from scoreboard.schema import validate_submission
+
+
+def sample(timestamp, hashes=4200, rig="rig-1"):
+    return {"timestamp": timestamp, "rig_id": rig, "hash_count": hashes}
+
+
+class TestRigAgent(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "sessions.jsonl")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def sessions(self):
+        try:
+            with open(self.path) as f:
+                return [json.loads(line) for line in f]
+        except FileNotFoundError:
+            return []
+
+    def test_sessions_close_at_window_and_gaps(self):
+        agent = RigAgent(self.path)
+        for minute in range(150):
+            agent.add(sample(minute * 60, 3000 + minute))
+        # 20 minutes without samples end the third session early
+        for minute in range(170, 175):
+            agent.add(sample(minute * 60))
+        self.assertFalse(agent.add({"rig_id": "rig-1", "hash_count": True}))
+
+        first, second, third = self.sessions()
+        self.assertEqual((first["start"], first["end"]), (0, 3540))
+        self.assertEqual(first["samples"], 60)
+        self.assertEqual(first["total_hashes"], sum(3000 + m for m in range(60)))
+        self.assertEqual(first["min_rate"], 50.0)
+        self.assertEqual(first["max_rate"], 3059 / 60)
+        self.assertEqual(second["start"], 3600)
+        self.assertEqual((third["start"], third["end"]), (7200, 149 * 60))
+        self.assertEqual(agent.open["rig-1"]["samples"], 5)
+
+        agent.close_all()
+        self.assertEqual(len(self.sessions()), 4)
+        self.assertEqual(agent.open, {})
+
+    def test_restart_resumes_checkpointed_session(self):
+        agent = RigAgent(self.path, checkpoint_interval=600)
+        for minute in range(15):
+            agent.add(sample(minute * 60))
+        # Crash: samples after the last checkpoint (minute 10) are lost
+        agent = RigAgent(self.path, checkpoint_interval=600)
+        self.assertEqual(agent.open["rig-1"]["samples"], 11)
+        agent.add(sample(11 * 60))
+        self.assertEqual(agent.open["rig-1"]["start"], 0)
+        self.assertEqual(agent.open["rig-1"]["samples"], 12)
+        self.assertEqual(self.sessions(), [])
+
+    def test_backfill_compacts_a_week_of_raw_lines(self):
+        raw_path = os.path.join(self._tmp.name, "scoreboard.json")
+        with open(raw_path, "w") as f:
+            for minute in range(7 * 24 * 60):
+                f.write(json.dumps(sample(1700000000 + minute * 60)) + "\n")
+            f.write("not json\n")
+        raw_bytes = os.path.getsize(raw_path)
+
+        agent = RigAgent(self.path)
+        self.assertEqual(agent.backfill(raw_path), 7 * 24 * 60)
+        self.assertFalse(os.path.exists(raw_path))
+        agent.close_all()
+        self.assertEqual(len(self.sessions()), 7 * 24)
+        self.assertLess(os.path.getsize(self.path) * 20, raw_bytes)
+
+    def test_session_submission(self):
+        agent = RigAgent(self.path)
+        for minute in range(3):
+            agent.add(sample(minute * 60, 6000))
+        agent.close_all()
+        report = session_submission(self.sessions()[0])
+        self.assertEqual(
+            report, {"node_id": "rig-1", "hashrate": 100.0, "timestamp": 120}
+        )
+        self.assertIsNone(validate_submission(report)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
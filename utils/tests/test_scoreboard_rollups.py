@@ -0,0 +1,51 @@
+import sqlite3
+import unittest
+
+from scoreboard.rollups import Rollups
+
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.rollups = Rollups()
+        self.rollups.create_schema(self.conn)
+
+    def test_incremental_buckets(self):
+        day = 86400 * 20000
+        rows = [("a", 10, day + 30), ("a", 30, day + 90), ("b", 5, day + 3700)]
+        # Applying in two batches must equal applying once
+        self.rollups.apply(self.conn, rows[:2])
+        self.rollups.apply(self.conn, rows[2:])
+
+        minutes = self.rollups.query(self.conn, "a", resolution="1m")["buckets"]
+        self.assertEqual([b["count"] for b in minutes], [1, 1])
+
+        (hour,) = self.rollups.query(self.conn, "a", resolution="1h")["buckets"]
+        self.assertEqual(
+            (hour["count"], hour["sum"], hour["min"], hour["max"]),
+            (2, 40.0, 10.0, 30.0),
+        )
+
+        (fleet_day,) = self.rollups.query(self.conn, resolution="1d")["buckets"]
+        self.assertEqual((fleet_day["count"], fleet_day["avg"]), (3, 15.0))
+
+    def test_choose_resolution(self):
+        now = 86400 * 20000
+        choose = self.rollups.choose_resolution
+        self.assertEqual(choose(now - 7 * 86400, now, now=now)[0], "1d")
+        self.assertEqual(choose(now - 7 * 3600, now, now=now)[0], "1h")
+        self.assertEqual(choose(now - 300, now - 60, now=now)[0], "1m")
+        # Too old for 1m retention and not hour aligned: finest retained
+        self.assertEqual(choose(now - 5 * 86400 + 60, now, now=now)[0], "1h")
+
+    def test_prune_respects_retention(self):
+        now = 86400 * 20000
+        self.rollups.apply(self.conn, [("a", 1, now - 10 * 86400), ("a", 1, now)])
+        self.rollups.prune(self.conn, now=now)
+        minutes = self.rollups.query(self.conn, "a", resolution="1m")["buckets"]
+        days = self.rollups.query(self.conn, "a", resolution="1d")["buckets"]
+        self.assertEqual((len(minutes), len(days)), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from scoreboard.schema import submission_schema, validate_submission
+
+
+class TestSubmissionSchema(unittest.TestCase):
+    def test_coerces_numbers(self):
+        data = {"node_id": "rig-1", "hashrate": 12.9, "timestamp": "1700000000"}
+        record, error = validate_submission(data)
+        self.assertIsNone(error)
+        self.assertEqual(
+            record, {"node_id": "rig-1", "hashrate": 12, "timestamp": 1700000000}
+        )
+        self.assertIs(type(record["hashrate"]), int)
+        # The input is left untouched
+        self.assertEqual(data["hashrate"], 12.9)
+
+        record, _ = validate_submission(
+            {"node_id": "a", "hashrate": "1e3", "timestamp": 1, "extra": [1]}
+        )
+        self.assertEqual((record["hashrate"], record["extra"]), (1000, [1]))
+
+    def test_rejects_bad_values(self):
+        good = {"node_id": "rig-1", "hashrate": 1, "timestamp": 1}
+        bad = [
+            ([], "Record must be a JSON object"),
+            ({"node_id": "a"}, "Missing fields: hashrate, timestamp"),
+            (dict(good, hashrate=True), "hashrate must be a number"),
+            (dict(good, hashrate="fast"), "hashrate must be a number"),
+            (dict(good, hashrate=float("nan")), "hashrate must be a number"),
+            (dict(good, hashrate=-5), "hashrate must be between"),
+            (dict(good, timestamp=2**40), "timestamp must be between"),
+            (dict(good, node_id=""), "node_id must be"),
+            (dict(good, node_id="rig 1"), "node_id must be"),
+            (dict(good, node_id=7), "node_id must be"),
+        ]
+        for data, message in bad:
+            record, error = validate_submission(data)
+            self.assertIsNone(record)
+            self.assertTrue(error.startswith(message), (data, error))
+
+    def test_hex_node_ids(self):
+        validate = submission_schema("hex")
+        record, error = validate({"node_id": "0xABcd", "hashrate": 1, "timestamp": 1})
+        self.assertEqual((record["node_id"], error), ("abcd", None))
+        for node_id in ("0x", "rig-1", "ab cd", "f" * 129):
+            _, error = validate({"node_id": node_id, "hashrate": 1, "timestamp": 1})
+            self.assertIsNotNone(error, node_id)
+        with self.assertRaises(ValueError):
+            submission_schema("base58")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from scoreboard.service import ScoreboardService
+from scoreboard.shards import load_data_dir, reshard, shard_of, stored_count
+
+
+def record(node, hashrate, timestamp):
+    return {"node_id": f"node-{node}", "hashrate": hashrate, "timestamp": timestamp}
+
+
+class TestScoreboardShards(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def crash(self, service):
+        for compactor in service.compactors:
+            compactor.stop(compact=False)
+        for wal in service.wals:
+            wal.close()
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("node-1", 8), shard_of("node-1", 8))
+        self.assertEqual(shard_of("node-1", 1), 0)
+        self.assertEqual({shard_of(f"n{i}", 4) for i in range(100)}, {0, 1, 2, 3})
+
+    def test_sharded_service_recovers_every_shard(self):
+        service = ScoreboardService(self.data_dir, compact_interval=3600, shards=4)
+        service.start()
+        results = service.submit_batch([record(i, i, i) for i in range(100)])
+        self.assertTrue(all(r["status"] == "applied" for r in results))
+        for compactor in service.compactors:
+            compactor.compact()
+        service.submit(record(7, 700, 1000))
+        service.submit_many([record(i, -i, 2000 + i) for i in range(10)])
+        expected = sorted(service.store.to_document(), key=lambda r: r["node_id"])
+        self.crash(service)
+
+        self.assertEqual(stored_count(self.data_dir), 4)
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, "shard-003")))
+        restarted = ScoreboardService(self.data_dir, compact_interval=3600, shards=4)
+        restarted.start()
+        document = restarted.store.to_document()
+        self.assertEqual(sorted(document, key=lambda r: r["node_id"]), expected)
+        self.crash(restarted)
+
+        with self.assertRaises(ValueError):
+            ScoreboardService(self.data_dir, shards=2)
+
+    def test_reshard(self):
+        service = ScoreboardService(self.data_dir, compact_interval=3600)
+        service.start()
+        service.submit_many([record(i, i, i) for i in range(50)])
+        service.compactor.compact()
+        service.submit(record(1, 100, 100))
+        expected = sorted(service.store.to_document(), key=lambda r: r["node_id"])
+        self.crash(service)
+        with self.assertRaises(ValueError):
+            ScoreboardService(self.data_dir, shards=3)
+
+        for count in (3, 5, 1):
+            reshard(self.data_dir, count)
+            self.assertEqual(stored_count(self.data_dir), count)
+            document = load_data_dir(self.data_dir).to_document()
+            self.assertEqual(sorted(document, key=lambda r: r["node_id"]), expected)
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "shard-000")))
+
+        service = ScoreboardService(self.data_dir, compact_interval=3600, shards=1)
+        service.start()
+        self.assertEqual(len(service.store), 50)
+        self.crash(service)
+
+
+if __name__ == "__main__":
+    unittest.main()
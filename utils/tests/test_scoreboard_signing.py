@@ -0,0 +1,55 @@
+import importlib.util
+import unittest
+
+from scoreboard.signing import SigningService, proof_message
+
+HAS_ETH_ACCOUNT = importlib.util.find_spec("eth_account") is not None
+PRIVATE_KEY = "0x" + "4c0883a69102937d6231471b5dbb6204fe512961708279f1d7b1b3a6f1c9e1f3"
+
+
+def messages(count):
+    return [(f"0x{i:064x}", 1000 + i) for i in range(count)]
+
+
+@unittest.skipUnless(HAS_ETH_ACCOUNT, "eth_account is not installed")
+class TestSigningService(unittest.TestCase):
+    def test_matches_sign_message(self):
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        service = SigningService(PRIVATE_KEY, processes=1)
+        account = Account.from_key(PRIVATE_KEY)
+        self.assertEqual(service.address, account.address)
+        for rig_id, hashes in messages(3):
+            expected = Account.sign_message(
+                encode_defunct(text=proof_message(rig_id, hashes)),
+                private_key=PRIVATE_KEY,
+            ).signature
+            signature = service.sign_one(rig_id, hashes)
+            self.assertTrue(signature.startswith("0x"))
+            self.assertEqual(bytes.fromhex(signature[2:]), bytes(expected))
+
+    def test_pool_keeps_input_order(self):
+        batch = messages(23)
+        expected = SigningService(PRIVATE_KEY, processes=1).sign(batch)
+        with SigningService(PRIVATE_KEY, processes=2, chunk_size=4) as service:
+            self.assertEqual(service.sign(batch), expected)
+            # The pool is reused for the next batch
+            self.assertEqual(service.sign(batch[5:]), expected[5:])
+        self.assertIsNone(service._pool)
+
+    def test_signatures_recover_to_oracle(self):
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        service = SigningService(PRIVATE_KEY, processes=1)
+        rig_id, hashes = messages(1)[0]
+        signer = Account.recover_message(
+            encode_defunct(text=proof_message(rig_id, hashes)),
+            signature=service.sign_one(rig_id, hashes),
+        )
+        self.assertEqual(signer, service.address)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.store import ScoreboardStore, open_store
+
+
+class TestScoreboardStore(unittest.TestCase):
+    def test_list_layout_round_trip(self):
+        document = [
+            {"node_id": "a", "hashrate": 10, "timestamp": 1},
+            {"node_id": "b", "hashrate": 20, "timestamp": 2},
+            {"hashrate": 5},
+            {"node_id": "a", "hashrate": 99, "timestamp": 3},
+        ]
+        store = ScoreboardStore.from_document(json.loads(json.dumps(document)))
+        self.assertEqual(store.to_document(), document)
+        self.assertEqual(store.get("a")["hashrate"], 10)
+
+    def test_rigs_layout_round_trip(self):
+        document = {"rigs": [{"rig_id": "0xaa", "hash_count": 1}], "epoch": 7}
+        store = ScoreboardStore.from_document(json.loads(json.dumps(document)))
+        self.assertEqual(store.layout, "rigs")
+        self.assertEqual(store.to_document(), document)
+
+    def test_upsert_matches_linear_scan(self):
+        store = ScoreboardStore()
+        self.assertTrue(store.upsert({"node_id": "a", "hashrate": 1, "timestamp": 1}))
+        self.assertFalse(
+            store.upsert(
+                {"node_id": "a", "hashrate": 2, "timestamp": 2, "extra": True},
+                fields=("hashrate", "timestamp"),
+            )
+        )
+        self.assertEqual(
+            store.to_document(), [{"node_id": "a", "hashrate": 2, "timestamp": 2}]
+        )
+
+    def test_open_store_reloads_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "meshnet_scoreboard.json")
+            store = ScoreboardStore.from_document(
+                [{"node_id": "a", "hashrate": 1, "timestamp": 1}]
+            )
+            store.save(path)
+            first = open_store(path)
+            self.assertIs(open_store(path), first)
+
+            store.upsert({"node_id": "b", "hashrate": 2, "timestamp": 2})
+            store.save(path)
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(len(open_store(path)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scoreboard.batch import decode_body, parse_batch
+from scoreboard.sync import SyncClient, SyncError
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Stand-in for /submit/batch that fails according to server.script"""
+
+    def do_POST(self):
+        action = self.server.script.pop(0) if self.server.script else "ok"
+        if action == "drop_before":
+            self.close_connection = True
+            return
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if action in ("400", "503"):
+            self.send_response(int(action))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        records, _ = parse_batch(
+            decode_body(body, self.headers.get("Content-Encoding"))
+        )
+        self.server.received.extend(records)
+        self.server.requests += 1
+        if action == "drop_after":
+            # Applied, but the acknowledgement never reaches the client
+            self.close_connection = True
+            return
+        payload = json.dumps({"counts": {"applied": len(records)}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSyncClient(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "scoreboard.json")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.server.script = []
+        self.server.received = []
+        self.server.requests = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def append(self, start, count):
+        with open(self.path, "a") as f:
+            for t in range(start, start + count):
+                record = {"timestamp": t, "rig_id": f"rig-{t % 3}", "hash_count": 600}
+                f.write(json.dumps(record) + "\n")
+
+    def client(self, **kwargs):
+        kwargs.setdefault("max_attempts", 3)
+        return SyncClient(
+            self.path, self.url, chunk_bytes=600, sleep=lambda s: None, **kwargs
+        )
+
+    def received(self):
+        return sorted({r["timestamp"] for r in self.server.received})
+
+    def test_resumes_through_disconnects(self):
+        self.append(0, 50)
+        self.server.script = ["ok", "drop_after", "ok", "drop_before", "503"]
+        counts = self.client().sync()
+        self.assertEqual(self.received(), list(range(50)))
+        self.assertEqual(self.server.received[0]["hashrate"], 10.0)
+        self.assertEqual(counts["applied"], 50)
+        # Everything acknowledged, so the log is gone
+        self.assertFalse(os.path.exists(self.path))
+
+        self.append(50, 2)
+        self.server.received.clear()
+        self.client().sync()
+        self.assertEqual(self.received(), [50, 51])
+
+    def test_failed_sync_keeps_unacknowledged_lines(self):
+        self.append(0, 30)
+        self.server.script = ["ok"] + ["drop_before"] * 3
+        with self.assertRaises(SyncError):
+            self.client().sync()
+        self.assertTrue(os.path.exists(self.path))
+        sent = self.server.requests
+        acked = self.received()
+
+        self.server.received.clear()
+        self.client().sync()
+        # Resumed after the acknowledged chunk instead of starting over
+        self.assertEqual(sent, 1)
+        self.assertEqual(sorted(acked + self.received()), list(range(30)))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_rejected_chunk_is_not_retried(self):
+        self.append(0, 5)
+        self.server.script = ["400", "ok"]
+        with self.assertRaises(SyncError):
+            self.client().sync()
+        self.assertEqual(self.server.script, ["ok"])
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_rig_tools_load_without_the_server_stack(self):
+        code = (
+            "import sys, scoreboard.sync, scoreboard.rig_agent; "
+            "print(sorted(m for m in sys.modules if m.startswith('scoreboard')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        self.assertNotIn("scoreboard.service", result.stdout)
+        self.assertNotIn("scoreboard.config", result.stdout)
+        self.assertIn("scoreboard.tail", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.binary import write_snapshot
+from scoreboard.table import (
+    detect_format,
+    load_table,
+    normalize_document,
+    proof_rows,
+    rig_id_bytes32,
+)
+
+
+class TestRigTable(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_detects_and_normalizes_every_format(self):
+        service = [
+            {"node_id": "n1", "hashrate": 1200, "timestamp": 10},
+            {"node_id": "n2", "hashrate": 7.9, "timestamp": 11},
+            {"node_id": "n3", "hashrate": "fast", "timestamp": 12},
+        ]
+        rigs = {
+            "rigs": [
+                {"rig_id": "0xaa", "hash_count": 100, "wallet_address": "0xw"},
+                {"rig_id": "0xbb", "hash_count": 150},
+                {"hash_count": 5},
+            ]
+        }
+        termux = "".join(
+            json.dumps({"timestamp": t, "rig_id": rig, "hash_count": 60}) + "\n"
+            for t, rig in ((1, "r1"), (2, "r2"), (3, "r1"))
+        )
+        session = {"rig_id": "r1", "start": 0, "end": 3540, "total_hashes": 9000}
+        paths = {
+            "list": self.write("list.json", json.dumps(service, indent=2)),
+            "rigs": self.write("rigs.json", json.dumps(rigs, indent=2)),
+            "termux": self.write("scoreboard.json", termux + "garbage\n"),
+            "sessions": self.write("sessions.jsonl", json.dumps(session) + "\n"),
+        }
+        for expected, path in paths.items():
+            self.assertEqual(detect_format(path), expected)
+        # Compact single-line documents too
+        self.assertEqual(detect_format(self.write("r.json", json.dumps(rigs))), "rigs")
+
+        table = load_table(paths["list"])
+        self.assertEqual(table.rig_id, ["n1", "n2"])
+        # A hashrate is not a count of hashes
+        self.assertEqual(list(table.hashrate), [1200.0, 7.9])
+        self.assertEqual(list(table.hash_count), [0, 0])
+        self.assertEqual(list(table.timestamp), [10, 11])
+        self.assertEqual(table.skipped, 1)
+
+        # No timestamps: the rows are stamped with the file's mtime
+        os.utime(paths["rigs"], (5000, 5000))
+        table = load_table(paths["rigs"])
+        self.assertEqual(
+            list(table.rows()),
+            [("0xaa", "0xw", 100, 5000), ("0xbb", None, 150, 5000)],
+        )
+
+        table = load_table(paths["termux"])
+        self.assertEqual((len(table), table.skipped), (3, 1))
+        per_rig = table.per_rig()
+        self.assertEqual(per_rig.rig_id, ["r1", "r2"])
+        self.assertEqual(list(per_rig.hash_count), [120, 60])
+        self.assertEqual(list(per_rig.timestamp), [3, 2])
+
+        table = load_table(paths["sessions"])
+        self.assertEqual(list(table.rows()), [("r1", None, 9000, 3540)])
+
+    def test_binary_snapshot_and_cached_table(self):
+        document = {"rigs": [{"rig_id": "0xaa", "hash_count": 1}]}
+        path = os.path.join(self._tmp.name, "meshnet_scoreboard.json")
+        write_snapshot(path[: -len(".json")] + ".bin", document)
+        self.assertEqual(detect_format(path), "rigs")
+        table = load_table(path)
+        self.assertEqual(table.rig_id, ["0xaa"])
+        # Unchanged scoreboard: the same table is handed out again
+        self.assertIs(load_table(path), table)
+        self.assertEqual(len(normalize_document([])), 0)
+
+    def test_bad_counts_and_empty_files(self):
+        table = normalize_document(
+            {
+                "rigs": [
+                    {"rig_id": "a", "hash_count": 2**63},
+                    {"rig_id": "b", "hash_count": -(2**64)},
+                    {"rig_id": "c", "hash_count": 1e30},
+                    {"rig_id": "d", "hash_count": 2**63 - 1},
+                    {"rig_id": "d", "hash_count": 5},
+                ]
+            }
+        )
+        self.assertEqual((len(table), table.skipped), (2, 3))
+        # Summed counts saturate instead of overflowing
+        self.assertEqual(list(table.per_rig().hash_count), [2**63 - 1])
+
+        for text in ("", "\n  \n"):
+            path = self.write("empty.json", text)
+            self.assertEqual(len(load_table(path)), 0)
+
+    def test_rig_ids_for_contracts(self):
+        digits = "ab" * 32
+        self.assertEqual(rig_id_bytes32("0x" + digits), bytes.fromhex(digits))
+        self.assertEqual(rig_id_bytes32("0X" + digits), bytes.fromhex(digits))
+        # Normalized hex ids have no prefix and keep all 32 bytes
+        self.assertEqual(rig_id_bytes32(digits), bytes.fromhex(digits))
+        for bad in ("rig-1", "0x" + digits[:-2], digits + "00", "zz" * 32, None):
+            self.assertIsNone(rig_id_bytes32(bad))
+        self.assertIsNone(rig_id_bytes32(" " * 4 + "ab" * 30))
+
+        table = normalize_document(
+            {
+                "rigs": [
+                    {"rig_id": "rig-1", "hash_count": 5},
+                    {"rig_id": digits, "hash_count": 7},
+                    {"rig_id": "cd" * 32, "hash_count": 0},
+                ]
+            }
+        )
+        rows, rejected = proof_rows(table)
+        self.assertEqual(rows, [(digits, bytes.fromhex(digits), 7)])
+        self.assertEqual(rejected, ["rig-1"])
+
+        # list rows carry only a hashrate: nothing to prove
+        table = normalize_document([{"node_id": digits, "hashrate": 3, "timestamp": 1}])
+        self.assertEqual(proof_rows(table), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
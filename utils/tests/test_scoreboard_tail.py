@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+
+from scoreboard.service import ScoreboardService
+from scoreboard.tail import JsonlTail, ingest
+
+
+def line(rig, hashes, timestamp):
+    record = {"timestamp": timestamp, "rig_id": rig, "hash_count": hashes}
+    return json.dumps(record) + "\n"
+
+
+class TestJsonlTail(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "scoreboard.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def append(self, text):
+        with open(self.path, "a") as f:
+            f.write(text)
+
+    def read(self, tail):
+        records = []
+        for batch in tail.batches():
+            records.extend(r["timestamp"] for r in batch.records)
+            tail.commit(batch.checkpoint)
+        return records
+
+    def test_reads_only_new_complete_lines(self):
+        tail = JsonlTail(self.path, batch_bytes=100)
+        self.assertEqual(self.read(tail), [])
+        self.append("".join(line("r", 60, t) for t in range(5)))
+        self.append('{"timestamp": 5, "rig')
+        self.assertEqual(self.read(tail), [0, 1, 2, 3, 4])
+        self.append('_id": "r", "hash_count": 60}\nnot json\n')
+
+        # A new reader resumes from the persisted checkpoint
+        tail = JsonlTail(self.path)
+        batches = list(tail.batches())
+        self.assertEqual([b.records[0]["timestamp"] for b in batches], [5])
+        self.assertEqual(batches[0].errors, 1)
+        # Not committed, so the same lines come again
+        self.assertEqual(self.read(tail), [5])
+        self.assertEqual(self.read(tail), [])
+
+    def test_checkpoint_past_fingerprint_bytes(self):
+        # Batches end before and after FINGERPRINT_BYTES
+        tail = JsonlTail(self.path, batch_bytes=120)
+        self.append("".join(line("r", 60, t) for t in range(10)))
+        self.assertEqual(self.read(tail), list(range(10)))
+        self.append(line("r", 60, 10))
+        self.assertEqual(self.read(tail), [10])
+
+    def test_truncation_and_rotation(self):
+        tail = JsonlTail(self.path)
+        self.append(line("r", 60, 1) + line("r", 60, 2))
+        self.assertEqual(self.read(tail), [1, 2])
+
+        # Cleared after a sync, then new lines
+        open(self.path, "w").close()
+        self.append(line("r", 60, 3))
+        self.assertEqual(self.read(tail), [3])
+
+        # Rotated with a line the reader has not seen yet
+        self.append(line("r", 60, 4))
+        os.rename(self.path, self.path + ".1")
+        self.append(line("r", 60, 5))
+        self.assertEqual(self.read(tail), [4, 5])
+        self.assertEqual(self.read(tail), [])
+
+    def test_ingest_into_service(self):
+        service = ScoreboardService(
+            os.path.join(self._tmp.name, "data"), compact_interval=3600
+        )
+        service.start()
+        self.append(line("rig-1", 6000, 10) + line("rig-1", 1200, 20))
+        self.append(line("rig-2", 600, 15) + "garbage\n")
+        tail = JsonlTail(self.path)
+        counts = ingest(tail, service)
+        self.assertEqual(counts["applied"], 2)
+        self.assertEqual(counts["superseded"], 1)
+        self.assertEqual(counts["unparsable"], 1)
+        self.assertEqual(service.store.get("rig-1")["hashrate"], 20)
+        self.assertEqual(ingest(tail, service), {})
+        service.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
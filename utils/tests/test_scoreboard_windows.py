@@ -0,0 +1,65 @@
+import json
+import unittest
+
+from scoreboard.table import RigTable
+from scoreboard.windows import EventTimeWindows
+
+
+class TestEventTimeWindows(unittest.TestCase):
+    def test_windows_close_when_the_watermark_passes(self):
+        windows = EventTimeWindows(window=100, allowed_lateness=50)
+        for t in (0, 10, 99, 120, 160):
+            self.assertTrue(windows.add("a", 1, t))
+        windows.add("b", 5, 30, wallet="0xb")
+        # Watermark 110: only [0, 100) has ended
+        closed = windows.advance()
+        self.assertEqual([(w.start, w.end) for w in closed], [(0, 100)])
+        table = closed[0].table
+        self.assertEqual(list(table.rows()), [("a", None, 3, 99), ("b", "0xb", 5, 30)])
+        self.assertEqual(windows.advance(), [])
+        self.assertEqual(windows.open_windows(), [100])
+
+        # Out of order but within the lateness: still on time
+        self.assertTrue(windows.add("b", 2, 101))
+        # Its window is closed: adjustment stream
+        self.assertFalse(windows.add("c", 7, 50))
+        self.assertEqual(list(windows.take_adjustments().rows()), [("c", None, 7, 50)])
+        self.assertEqual(len(windows.take_adjustments()), 0)
+        self.assertEqual((windows.on_time, windows.late), (7, 1))
+
+    def test_wall_clock_closes_idle_windows(self):
+        windows = EventTimeWindows(window=100, allowed_lateness=50)
+        table = RigTable()
+        table.append("a", None, 4, 120)
+        self.assertEqual(windows.add_table(table), 0)
+        self.assertEqual(windows.advance(now=240), [])
+        closed = windows.advance(now=250)
+        self.assertEqual([w.start for w in closed], [100])
+        self.assertEqual(windows.add_table(table), 1)
+
+    def test_late_horizon_and_restore(self):
+        windows = EventTimeWindows(window=100, allowed_lateness=50, late_horizon=200)
+        windows.add("a", 1, 10)
+        windows.add("a", 1, 420)
+        self.assertEqual([w.start for w in windows.advance()], [0])
+        self.assertEqual(windows.expired_before, 100)
+        # Closed too long ago to be credited
+        self.assertFalse(windows.add("b", 1, 50))
+        self.assertFalse(windows.add("b", 1, 150))
+        self.assertEqual((windows.late, windows.dropped), (1, 1))
+        self.assertEqual(windows.state()["adjustments"], [["b", None, 1, 150]])
+
+        restarted = EventTimeWindows(window=100, allowed_lateness=50)
+        restarted.restore(json.loads(json.dumps(windows.state())))
+        self.assertEqual(restarted.closed_until, 300)
+        # Re-read from the source: the closed window stays closed
+        self.assertFalse(restarted.add("a", 1, 10))
+        self.assertTrue(restarted.add("a", 1, 420))
+        self.assertEqual(restarted.advance(), [])
+        # Late rows not yet taken survive the restart
+        self.assertEqual(restarted.take_adjustments().rig_id, ["b", "a"])
+        self.assertEqual(EventTimeWindows().state()["closed_until"], None)
+
+
+if __name__ == "__main__":
+    unittest.main()